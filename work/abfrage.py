@@ -0,0 +1,176 @@
+"""Wer arbeitet / wer ist frei? Schnelle Abfragen auf einem Snapshot.
+
+Vor dem Herumtelefonieren für eine Korrektur: Snapshot (CSV oder Versions-ID)
+plus einstellungen.txt werden einmal in invertierte Indizes übersetzt, danach
+ist jede Abfrage ein Dict-Zugriff:
+    besetzt[Tag]           -> {Dienst: [Name, ...]}
+    frei[(Tag, Dienst)]    -> Kandidaten, die den Dienst übernehmen dürfen
+    rest[Name]             -> freie Kapazität (Limit minus Dienste im Snapshot)
+"Dürfen" heißt: nicht abwesend, Limit nicht erreicht, an dem Tag noch kein
+Dienst und kein Konflikt mit den Nachbartagen im Snapshot (danach_nicht und
+Ruhetage aus der Regeltabelle, Standard: kein T nach N). Wer vor einer
+Abwesenheit eine Nacht übernehmen würde, steht als Notfall am Ende.
+
+Die Reihenfolge ist die von wer_kann(): erst Wunsch (in Pool-Reihenfolge),
+dann wenigste Dienste, bei Gleichstand Pool-Reihenfolge. Mit --springer nur
+der SPRINGER-Pool in dessen Reihenfolge, wie in der Korrektur.
+
+Aufruf:
+    py abfrage.py snapshot_1201_1813.csv [--tage 20,22..24] [--dienst N] [--springer] [--ma Anna]
+    (ohne --tage: alle Tage mit Lücken)
+"""
+import argparse
+import calendar
+import os
+import time
+
+import snapshot_store
+from einstellungen_compiler import lade_einstellungen, parse_daten
+from gen_snapshot import kompiliere_einstellungen
+
+WOCHENTAGE = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
+
+def sperr_masken(plan, dienste, alle):
+    """{Name: {Tag: Bitmaske der Dienste, die Nachbartage im Plan verbieten}}.
+
+    Rückwärts: wer morgen q hat, darf heute keinen Dienst c mit q in danach_nicht
+    und keinen c, dessen Ruhetage q treffen. Vorwärts: Folgeverbot und Ruhe
+    des eigenen Dienstes von gestern (bzw. den Tagen davor)."""
+    tabelle = {d["code"]: d for d in dienste}
+    sperren = {}
+    for m, tage in plan.items():
+        s = sperren[m] = {}
+        for t, code in tage.items():
+            d = tabelle.get(code)
+            if d is None: continue
+            if d["folge"]: s[t + 1] = s.get(t + 1, 0) | d["folge"]
+            for k in range(1, d["ruhe"] + 1): s[t + k] = alle
+            for c in dienste:
+                if c["folge"] & d["bit"]: s[t - 1] = s.get(t - 1, 0) | c["bit"]
+                for k in range(1, c["ruhe"] + 1): s[t - k] = s.get(t - k, 0) | c["bit"]
+    return sperren
+
+def baue_indizes(snap, modell, jahr, monat):
+    """Indizes aus Snapshot-DataFrame und kompiliertem Modell (siehe Modul-Doku).
+
+    frei und frei_springer enthalten je (Tag, Dienst) die fertig sortierte
+    Kandidatenliste als dicts mit name, dienste, rest, wunsch, notfall, springer.
+    """
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    namen, abw, limit = modell["namen"], modell["abw"], modell["limit"]
+    # Ohne SPRINGER-Zeile ist der Korrektur-Pool wie in wer_kann() die ganze Liste
+    springer = [m for m in modell["springer"] if m in modell["namen_set"]] if modell["springer"] else namen
+
+    ist_luecke = snap["Name"] == "LÜCKEN"
+    plan = {m: {} for m in namen}
+    besetzt = {t: {} for t in range(1, tage_im_monat + 1)}
+    ma = snap[~ist_luecke]
+    for m, t, d in zip(ma["Name"], ma["Tag"].astype(int), ma["Dienst"]):
+        plan.setdefault(m, {})[t] = d
+        besetzt[t].setdefault(d, []).append(m)
+    luecken = dict(zip(snap.loc[ist_luecke, "Tag"].astype(int), snap.loc[ist_luecke, "Dienst"]))
+    rest = {m: max(0, limit[m] - len(plan[m])) for m in namen}
+    sperren = sperr_masken(plan, modell["dienste"], modell["alle_dienste"])
+
+    def sortiert(kand, pool):
+        # wer_kann(): Wunsch vor allem (Pool-Reihenfolge), sonst wenigste Dienste;
+        # Notfall zuletzt, dort zählt der Wunsch nicht
+        pos = {m: i for i, m in enumerate(pool)}
+        def rang(k):
+            wunsch = k["wunsch"] and not k["notfall"]
+            return k["notfall"], not wunsch, 0 if wunsch else k["dienste"], pos[k["name"]]
+        return sorted(kand, key=rang)
+
+    im_pool = set(springer)
+    frei, frei_springer = {}, {}
+    for t in range(1, tage_im_monat + 1):
+        bit, wd_bit = 1 << t, 1 << calendar.weekday(jahr, monat, t)
+        for d in modell["dienste"]:
+            if not d["wochentage"] & wd_bit: continue
+            kand = [{"name": m, "dienste": len(plan[m]), "rest": rest[m], "wunsch": bool(d["wun"][m] & bit),
+                     "notfall": bool(d["nacht"] and abw[m] & bit << 1), "springer": m in modell["springer"]}
+                    for m in namen
+                    if not abw[m] & bit and rest[m] > 0 and t not in plan[m]
+                    and not sperren[m].get(t, 0) & d["bit"]]
+            frei[(t, d["code"])] = sortiert(kand, namen)
+            frei_springer[(t, d["code"])] = sortiert([k for k in kand if k["name"] in im_pool], springer)
+    return {"jahr": jahr, "monat": monat, "plan": plan, "besetzt": besetzt, "luecken": luecken,
+            "rest": rest, "frei": frei, "frei_springer": frei_springer,
+            "codes": [d["code"] for d in modell["dienste"]]}
+
+def kandidaten(idx, tag, dienst, nur_springer=False):
+    """Sortierte Kandidaten für (Tag, Dienst); [] wenn der Dienst an dem Tag nicht stattfindet."""
+    return idx["frei_springer" if nur_springer else "frei"].get((tag, dienst), [])
+
+def abfrage(idx, tage, dienste=None, nur_springer=False):
+    """Batch über mehrere Tage: [(Tag, Dienst, [besetzt von], [Kandidaten]), ...]."""
+    dienste = dienste or idx["codes"]
+    return [(t, d, idx["besetzt"].get(t, {}).get(d, []), kandidaten(idx, t, d, nur_springer))
+            for t in tage for d in dienste if (t, d) in idx["frei"]]
+
+def drucke_antwort(idx, antwort, top):
+    for t, d, wer, kand in antwort:
+        wt = WOCHENTAGE[calendar.weekday(idx["jahr"], idx["monat"], t)]
+        offen = idx["luecken"].get(t, "").count(d)
+        status = ", ".join(wer) + (" + " if wer and offen else "") + (f"{offen}x LÜCKE" if offen else "")
+        print(f"Tag {t:02d} ({wt}) {d}: {status or '-'}")
+        if not kand: print("   keine Kandidaten")
+        for i, k in enumerate(kand[:top], 1):
+            marken = "".join(f" [{x}]" for x, an in (("Wunsch", k["wunsch"]), ("Springer", k["springer"]),
+                                                     ("Notfall: morgen abwesend", k["notfall"])) if an)
+            print(f"   {i}. {k['name']} ({k['dienste']} Dienste, noch {k['rest']}){marken}")
+        if len(kand) > top: print(f"   ... {len(kand) - top} weitere")
+
+def main():
+    parser = argparse.ArgumentParser(description="Wer arbeitet / wer ist frei und darf? Abfragen auf einem Snapshot")
+    parser.add_argument("snapshot", help="Snapshot-CSV oder Versions-ID")
+    parser.add_argument("--einstellungen", default="einstellungen.txt")
+    parser.add_argument("--tage", default=None, help="z.B. 20 oder 20,22..24 (Standard: alle Tage mit Lücken)")
+    parser.add_argument("--dienst", default=None, help="nur diese Dienste, z.B. N oder T,N")
+    parser.add_argument("--springer", action="store_true", help="nur SPRINGER (wie in der Korrektur)")
+    parser.add_argument("--ma", default=None, help="Restkapazität dieser MA (Komma-getrennt, 'alle' für alle)")
+    parser.add_argument("--top", type=int, default=5, help="Kandidaten je Dienst")
+    args = parser.parse_args()
+
+    if not snapshot_store.existiert(args.snapshot):
+        print(f"Fehler: Datei {args.snapshot} nicht gefunden.")
+        return
+    if not os.path.exists(args.einstellungen):
+        print(f"Fehler: Datei {args.einstellungen} nicht gefunden.")
+        return
+    snap = snapshot_store.lade_snapshot(args.snapshot)
+    config = lade_einstellungen(args.einstellungen)
+    jahr, monat = int(snap["Jahr"].iloc[0]), int(snap["Monat"].iloc[0])
+    if (jahr, monat) != (config["jahr"], config["monat"]):
+        print(f"Fehler: Snapshot ist aus {monat}/{jahr}, {args.einstellungen} gilt für {config['monat']}/{config['jahr']}.")
+        return
+
+    t0 = time.perf_counter()
+    idx = baue_indizes(snap, kompiliere_einstellungen(config), jahr, monat)
+    t_index = time.perf_counter()
+
+    if args.tage:
+        daten, fehler = parse_daten(args.tage, jahr, monat)
+        if fehler: print(f"WARNUNG: ungültige Tage ignoriert: {', '.join(fehler)}")
+        tage = sorted({d.day for d in daten if (d.year, d.month) == (jahr, monat)})
+    else:
+        tage = sorted(idx["luecken"])
+    dienste = [d.strip() for d in args.dienst.split(",")] if args.dienst else None
+    if dienste and set(dienste) - set(idx["codes"]):
+        print(f"WARNUNG: unbekannte Dienste ignoriert: {', '.join(sorted(set(dienste) - set(idx['codes'])))}")
+
+    t1 = time.perf_counter()
+    antwort = abfrage(idx, tage, dienste, args.springer)
+    t_abfrage = time.perf_counter()
+
+    print(f"--- ABFRAGE {monat:02d}/{jahr} ({args.snapshot}{', nur SPRINGER' if args.springer else ''}) ---")
+    if not args.tage: print("Tage mit Lücken" + ("" if tage else ": keine"))
+    drucke_antwort(idx, antwort, args.top)
+    if args.ma:
+        namen = sorted(idx["rest"]) if args.ma == "alle" else [m.strip() for m in args.ma.split(",")]
+        print("Restkapazität: " + ", ".join(f"{m} {idx['rest'][m]}" if m in idx["rest"] else f"{m} (unbekannt)"
+                                             for m in namen))
+    print(f"(Indizes {(t_index - t0) * 1000:.1f} ms, {len(antwort)} Abfrage(n) {(t_abfrage - t1) * 1e6:.0f} µs)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Laufzeit- und Speichermessung der einzelnen Stufen über verschiedene Größen.
+
+Je Kombination aus Mitarbeiterzahl und Monatsanzahl werden synthetische
+Einstellungen erzeugt und die Stufen gemessen:
+    kompilieren  einstellungen.txt parsen + Bitmasken-Modell
+    gen          Neuplanung wie gen_snapshot.py (CSV + Snapshot-Speicher)
+    gen_anker    Korrektur mit --anker auf den vorigen Plan
+    wer_kann     Zeit je Aufruf (Mittel über alle Tage eines Monats, T und N)
+    html         snapshot_to_html, alle Monate in einem Dokument
+    plaene       snapshot_to_personal_plans mit Anker
+    diff         compare_snapshots.vergleiche
+Zeit: Minimum und Median aus --wiederholungen Läufen; Speicher: Spitzenwert
+laut tracemalloc in einem eigenen Lauf (damit die Zeiten unverfälscht bleiben).
+
+Aufruf (aus work/):
+    py -m benchmark.messung --ma 7,50,200,500 --monate 1,12 --out bench.json
+    py -m benchmark.messung --vergleiche bench_alt.json bench.json
+"""
+import argparse
+import calendar
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from benchmark.synthetik import erzeuge_spec, als_text, stoere
+from einstellungen_compiler import kompiliere_text
+from gen_snapshot import kompiliere_einstellungen, erstelle_plan, wer_kann, anker_aus_df
+from snapshot_to_html import rendere_dokument
+from snapshot_to_personal_plans import schreibe_plaene
+from compare_snapshots import vergleiche
+
+def _miss(funktion, wiederholungen):
+    """(Zeiten in s, Spitze in MB) – Zeiten ohne tracemalloc, Spitze in einem Extralauf."""
+    zeiten = []
+    for _ in range(wiederholungen):
+        t0 = time.perf_counter()
+        funktion()
+        zeiten.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    funktion()
+    _, spitze = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return zeiten, spitze / 1e6
+
+def _wer_kann_serie(modell, jahr, monat):
+    # Alle Tage eines Monats einmal als T und N abfragen, ohne Planzustand
+    counter = {m: 0 for m in modell["namen"]}
+    for t in range(1, calendar.monthrange(jahr, monat)[1] + 1):
+        wer_kann(t, False, set(), modell, counter)
+        wer_kann(t, True, set(), modell, counter, True)
+
+def miss_groesse(anzahl_ma, monate, jahr, start_monat, wiederholungen, param):
+    """Alle Stufen für eine Größe; Rückgabe: Liste von Ergebnis-dicts."""
+    specs = [erzeuge_spec(anzahl_ma, jahr + (start_monat - 1 + i) // 12, (start_monat - 1 + i) % 12 + 1,
+                          seed=i, **param) for i in range(monate)]
+    texte = [als_text(s) for s in specs]
+    configs = [kompiliere_text(t) for t in texte]
+    modelle = [kompiliere_einstellungen(c) for c in configs]
+
+    ergebnisse = []
+    def erfasse(stufe, funktion, einheit_je=1):
+        zeiten, spitze = _miss(funktion, wiederholungen)
+        ergebnisse.append({
+            "stufe": stufe, "ma": anzahl_ma, "monate": monate,
+            "sekunden_min": min(zeiten) / einheit_je, "sekunden_median": statistics.median(zeiten) / einheit_je,
+            "peak_mb": round(spitze, 3), "laeufe": wiederholungen,
+        })
+        print(f"  {stufe:12} {anzahl_ma:4d} MA {monate:2d} Mon.  "
+              f"min {min(zeiten) * 1000 / einheit_je:9.3f} ms  peak {spitze:8.2f} MB")
+
+    alt_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # gen_snapshot schreibt CSV und Snapshot-Speicher ins Arbeitsverzeichnis
+        os.chdir(tmp)
+        try:
+            def gen():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return [erstelle_plan(c, m) for c, m in zip(configs, modelle)]
+            erfasse("kompilieren", lambda: [kompiliere_einstellungen(kompiliere_text(t)) for t in texte])
+            erfasse("gen", gen)
+
+            # Korrektur: je Monat ein paar neue Ausfälle, Anker = Plan aus gen
+            ergebnisse_gen = gen()
+            gestoert = [kompiliere_text(als_text(stoere(s, max(1, anzahl_ma // 20), seed=99))) for s in specs]
+            gestoert_modelle = [kompiliere_einstellungen(c) for c in gestoert]
+            anker = [(e["datei"], anker_aus_df(e["df"])) for e in ergebnisse_gen]
+            def gen_anker():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return [erstelle_plan(c, m, datei, anker_dict=dict(a))
+                            for c, m, (datei, a) in zip(gestoert, gestoert_modelle, anker)]
+            erfasse("gen_anker", gen_anker)
+            dfs_alt = [e["df"] for e in ergebnisse_gen]
+            dfs_neu = [e["df"] for e in gen_anker()]
+
+            aufrufe = sum(2 * calendar.monthrange(s["jahr"], s["monat"])[1] for s in specs)
+            erfasse("wer_kann", lambda: [_wer_kann_serie(m, s["jahr"], s["monat"])
+                                          for m, s in zip(modelle, specs)], aufrufe)
+            erfasse("html", lambda: rendere_dokument(dfs_neu))
+            # Jeder Lauf in einen frischen Ordner, sonst greift das Manifest
+            erfasse("plaene", lambda: [schreibe_plaene(n, a, tempfile.mkdtemp(dir=tmp))
+                                       for n, a in zip(dfs_neu, dfs_alt)])
+            erfasse("diff", lambda: [vergleiche(a, n) for a, n in zip(dfs_alt, dfs_neu)])
+        finally:
+            os.chdir(alt_cwd)
+    return ergebnisse
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def vergleiche_laeufe(alt_pfad, neu_pfad):
+    """Gegenüberstellung zweier Ergebnis-Dateien (z.B. zweier Commits)."""
+    with open(alt_pfad, encoding="utf-8") as f: alt = json.load(f)
+    with open(neu_pfad, encoding="utf-8") as f: neu = json.load(f)
+    alt_werte = {(e["stufe"], e["ma"], e["monate"]): e for e in alt["ergebnisse"]}
+    print(f"Alt: {alt['meta'].get('commit') or alt_pfad}   Neu: {neu['meta'].get('commit') or neu_pfad}")
+    print(f"{'Stufe':12} {'MA':>4} {'Mon.':>4} {'alt ms':>10} {'neu ms':>10} {'Faktor':>7} {'MB alt':>8} {'MB neu':>8}")
+    for e in neu["ergebnisse"]:
+        a = alt_werte.get((e["stufe"], e["ma"], e["monate"]))
+        if not a: continue
+        faktor = a["sekunden_min"] / e["sekunden_min"] if e["sekunden_min"] else float("inf")
+        print(f"{e['stufe']:12} {e['ma']:4d} {e['monate']:4d} {a['sekunden_min'] * 1000:10.3f} "
+              f"{e['sekunden_min'] * 1000:10.3f} {faktor:6.2f}x {a['peak_mb']:8.2f} {e['peak_mb']:8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Stufen über verschiedene Größen messen (JSON-Ergebnis)")
+    parser.add_argument("--ma", default="7,50,200,500", help="Mitarbeiterzahlen, kommagetrennt")
+    parser.add_argument("--monate", default="1,12", help="Anzahl aufeinanderfolgender Monate, kommagetrennt")
+    parser.add_argument("--jahr", type=int, default=2026)
+    parser.add_argument("--monat", type=int, default=1, help="Startmonat")
+    parser.add_argument("--abw", type=float, default=0.1, help="Abwesenheits-Dichte")
+    parser.add_argument("--wunsch", type=float, default=0.05, help="Wunsch-Dichte")
+    parser.add_argument("--limit", type=int, default=8, help="Maximale Dienste je MA (0 = kein LIMIT_)")
+    parser.add_argument("--springer", type=float, default=0.4, help="Anteil SPRINGER")
+    parser.add_argument("--wiederholungen", type=int, default=3)
+    parser.add_argument("--out", default=None, help="Ergebnis-JSON (Standard: bench_<Zeitstempel>.json)")
+    parser.add_argument("--vergleiche", nargs=2, metavar=("ALT", "NEU"), help="Zwei Ergebnis-Dateien gegenüberstellen")
+    args = parser.parse_args()
+
+    if args.vergleiche:
+        vergleiche_laeufe(*args.vergleiche)
+        return
+
+    param = {"abw_dichte": args.abw, "wunsch_dichte": args.wunsch, "limit": args.limit or None,
+             "springer_anteil": args.springer}
+    ergebnisse = []
+    for monate in [int(x) for x in args.monate.split(",")]:
+        for anzahl_ma in [int(x) for x in args.ma.split(",")]:
+            ergebnisse += miss_groesse(anzahl_ma, monate, args.jahr, args.monat, args.wiederholungen, param)
+
+    out = args.out or f"bench_{datetime.now().strftime('%d%m_%H%M')}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {"commit": _commit(), "erstellt": datetime.now().isoformat(timespec="seconds"),
+                     "python": platform.python_version(), "plattform": platform.platform(), "parameter": param},
+            "ergebnisse": ergebnisse,
+        }, f, ensure_ascii=False, indent=1)
+    print(f"Ergebnisse gespeichert: {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Synthetische Einstellungen und Snapshot-Ketten für Messungen.
+
+Aufruf (aus work/):
+    py -m benchmark.synthetik --ma 200 --monat 3 --ordner bench_200
+    py -m benchmark.synthetik --ma 50 --kette 4 --ordner bench_kette
+"""
+import argparse
+import calendar
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from einstellungen_compiler import kompiliere_text
+from gen_snapshot import kompiliere_einstellungen, plane_greedy, snapshot_df
+
+def erzeuge_spec(anzahl_ma=7, jahr=2026, monat=3, abw_dichte=0.1, wunsch_dichte=0.05,
+                 limit=8, springer_anteil=0.4, seed=0):
+    """Zufällige, aber reproduzierbare Einstellungen als dict.
+
+    abw_dichte/wunsch_dichte sind der Anteil der Tage, an denen ein MA fehlt
+    bzw. sich einen T- oder N-Dienst wünscht; limit=None lässt LIMIT_ weg.
+    """
+    rnd = random.Random(seed)
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    tage = range(1, tage_im_monat + 1)
+    breite = max(2, len(str(anzahl_ma)))
+    ids = [f"MA_{i:0{breite}d}" for i in range(1, anzahl_ma + 1)]
+
+    def ziehe(dichte, ausser=()):
+        return sorted(t for t in tage if t not in ausser and rnd.random() < dichte)
+
+    spec = {"jahr": jahr, "monat": monat, "namen": {}, "abw": {}, "wunsch_t": {}, "wunsch_n": {},
+            "limits": {}, "springer": sorted(rnd.sample(ids, round(anzahl_ma * springer_anteil)))}
+    for i, ma_id in enumerate(ids, start=1):
+        spec["namen"][ma_id] = f"Person_{i:0{breite}d}"
+        spec["abw"][ma_id] = ziehe(abw_dichte)
+        spec["wunsch_t"][ma_id] = ziehe(wunsch_dichte / 2, spec["abw"][ma_id])
+        spec["wunsch_n"][ma_id] = ziehe(wunsch_dichte / 2, spec["abw"][ma_id] + spec["wunsch_t"][ma_id])
+        if limit is not None: spec["limits"][ma_id] = limit
+    return spec
+
+def als_text(spec):
+    """spec -> Inhalt einer einstellungen.txt im gewohnten Aufbau."""
+    zeilen = ["# Zeitraum", f"JAHR: {spec['jahr']}", f"MONAT: {spec['monat']}", "",
+              "# Wer darf bei Ausfällen einspringen? (IDs getrennt durch Komma)",
+              f"SPRINGER: {', '.join(spec['springer'])}", ""]
+    for titel, praefix, schluessel in [("Abwesenheiten", "ABW_", "abw"),
+                                       ("Wunsch-Nachtdienste", "WUNSCH_NACHT_", "wunsch_n"),
+                                       ("Wunsch-Tagdienste", "WUNSCH_TAG_", "wunsch_t")]:
+        zeilen.append(f"# {titel}")
+        zeilen += [f"{praefix}{ma_id}:{','.join(map(str, tage))}" for ma_id, tage in spec[schluessel].items() if tage]
+        zeilen.append("")
+    zeilen.append("# Limits (Name: MaxDienste)")
+    zeilen += [f"LIMIT_{ma_id}: {wert}" for ma_id, wert in spec["limits"].items()]
+    zeilen += ["", "# Mitarbeiter Namen"]
+    zeilen += [f"{ma_id}: {name}" for ma_id, name in spec["namen"].items()]
+    return "\n".join(zeilen) + "\n"
+
+def stoere(spec, ausfaelle=2, seed=0):
+    """Neue Abwesenheiten für einige MA (eine Korrektur-Runde); ändert spec."""
+    rnd = random.Random(seed)
+    _, tage_im_monat = calendar.monthrange(spec["jahr"], spec["monat"])
+    for ma_id in rnd.sample(list(spec["namen"]), min(ausfaelle, len(spec["namen"]))):
+        spec["abw"][ma_id] = sorted(set(spec["abw"][ma_id]) | {rnd.randint(1, tage_im_monat)})
+    return spec
+
+def plane(spec, anker_dict=None):
+    """Greedy-Plan zu spec; Rückgabe: (config, plan, luecken, df)."""
+    config = kompiliere_text(als_text(spec))
+    modell = kompiliere_einstellungen(config)
+    plan, luecken, _ = plane_greedy(modell, spec["jahr"], spec["monat"], anker_dict, anker_dict is not None)
+    return config, plan, luecken, snapshot_df(plan, luecken, config, spec["jahr"], spec["monat"])
+
+def erzeuge_kette(spec, laenge=3, ausfaelle=2, seed=0):
+    """Erster Plan plus laenge-1 Korrekturen mit Anker auf den Vorgänger.
+
+    Rückgabe: Liste von (spec-Text, Snapshot-DataFrame) in zeitlicher Reihenfolge.
+    """
+    kette, anker_dict = [], None
+    for schritt in range(laenge):
+        if schritt: stoere(spec, ausfaelle, seed + schritt)
+        _, plan, _, df = plane(spec, anker_dict)
+        kette.append((als_text(spec), df))
+        anker_dict = {(t, d): m for m, dienste in plan.items() for t, d in dienste.items()}
+    return kette
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetische einstellungen.txt (und Snapshot-Kette) erzeugen")
+    parser.add_argument("--ma", type=int, default=7, help="Anzahl Mitarbeiter")
+    parser.add_argument("--jahr", type=int, default=2026)
+    parser.add_argument("--monat", type=int, default=3)
+    parser.add_argument("--abw", type=float, default=0.1, help="Abwesenheits-Dichte (Anteil der Tage)")
+    parser.add_argument("--wunsch", type=float, default=0.05, help="Wunsch-Dichte (Anteil der Tage)")
+    parser.add_argument("--limit", type=int, default=8, help="Maximale Dienste je MA (0 = kein LIMIT_)")
+    parser.add_argument("--springer", type=float, default=0.4, help="Anteil SPRINGER")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--kette", type=int, default=0, help="Zusätzlich Snapshot-Kette dieser Länge schreiben")
+    parser.add_argument("--ordner", default="bench_daten", help="Zielordner")
+    args = parser.parse_args()
+
+    spec = erzeuge_spec(args.ma, args.jahr, args.monat, args.abw, args.wunsch,
+                        args.limit or None, args.springer, args.seed)
+    os.makedirs(args.ordner, exist_ok=True)
+    if args.kette:
+        for schritt, (text, df) in enumerate(erzeuge_kette(spec, args.kette, seed=args.seed)):
+            df.to_csv(os.path.join(args.ordner, f"kette_{schritt:02d}.csv"), index=False)
+        print(f"{args.kette} Snapshots: {args.ordner}/kette_00.csv ... kette_{args.kette - 1:02d}.csv")
+    with open(os.path.join(args.ordner, "einstellungen.txt"), "w", encoding="utf-8") as f:
+        f.write(als_text(spec))
+    print(f"Einstellungen ({args.ma} MA, {args.monat:02d}/{args.jahr}): {args.ordner}/einstellungen.txt")
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,137 @@
 import pandas as pd
+import numpy as np
 import argparse
 import os
 from datetime import datetime
 
-def main():
-    parser = argparse.ArgumentParser(description="Zwei Snapshots vergleichen")
-    parser.add_argument("alt", help="Pfad zur alten Snapshot-CSV")
-    parser.add_argument("neu", help="Pfad zur neuen Snapshot-CSV")
-    args = parser.parse_args()
+import snapshot_store
 
-    if not os.path.exists(args.alt) or not os.path.exists(args.neu):
-        print("Fehler: Eine oder beide Dateien wurden nicht gefunden.")
-        return
+def vergleiche(df_alt, df_neu):
+    """Vergleicht zwei Snapshots (Long-Format) per Outer-Merge auf (Name, Tag).
+
+    Rückgabe: DataFrame mit Mitarbeiter, Tag, Status (NEU/ENTFERNT/GEÄNDERT),
+    Alt, Neu, sortiert nach Name und Tag.
+    """
+    m = pd.merge(df_alt[["Name", "Tag", "Dienst"]], df_neu[["Name", "Tag", "Dienst"]],
+                 on=["Name", "Tag"], how="outer", suffixes=("_alt", "_neu"))
+    alt = m["Dienst_alt"].fillna("")
+    neu = m["Dienst_neu"].fillna("")
+    diff = alt != neu
+    m, alt, neu = m[diff], alt[diff], neu[diff]
+    status = np.select([alt == "", neu == ""], ["NEU", "ENTFERNT"], "GEÄNDERT")
+    return (pd.DataFrame({"Mitarbeiter": m["Name"], "Tag": m["Tag"], "Status": status, "Alt": alt, "Neu": neu})
+            .sort_values(["Mitarbeiter", "Tag"], kind="stable").reset_index(drop=True))
+
+def _dienst_inhaber(df):
+    """(Tag, Dienst) -> Name, ohne LÜCKEN-Zeilen."""
+    return df.loc[df["Name"] != "LÜCKEN", ["Tag", "Dienst", "Name"]]
 
-    # Daten laden und Index setzen
-    df_alt = pd.read_csv(args.alt).set_index(["Name", "Tag"])
-    df_neu = pd.read_csv(args.neu).set_index(["Name", "Tag"])
+def _abgegeben(df_von, df_nach):
+    """Je (Tag, Dienst) die Inhaber in df_von, die den Dienst in df_nach nicht
+    mehr haben – eine Zeile je Dienst, bei Besetzung > 1 mit ", " verbunden."""
+    m = _dienst_inhaber(df_von).merge(_dienst_inhaber(df_nach), on=["Tag", "Dienst", "Name"],
+                                      how="left", indicator=True)
+    m = m[m["_merge"] == "left_only"]
+    return m.groupby(["Tag", "Dienst"], as_index=False)["Name"].agg(", ".join)
 
+def mit_uebergabe(diff, df_alt, df_neu):
+    """Ergänzt je Änderung, von wem ein neuer Dienst kam (Von) und an wen ein
+    weggefallener Dienst ging (An). Ohne Inhaber steht dort LÜCKE."""
+    diff = diff.merge(_abgegeben(df_alt, df_neu).rename(columns={"Dienst": "Neu", "Name": "Von"}),
+                      on=["Tag", "Neu"], how="left")
+    diff = diff.merge(_abgegeben(df_neu, df_alt).rename(columns={"Dienst": "Alt", "Name": "An"}),
+                      on=["Tag", "Alt"], how="left")
+    ist_luecke = diff["Mitarbeiter"] == "LÜCKEN"
+    diff["Von"] = diff["Von"].where(diff["Neu"] != "", "").fillna("LÜCKE").where(~ist_luecke, "")
+    diff["An"] = diff["An"].where(diff["Alt"] != "", "").fillna("LÜCKE").where(~ist_luecke, "")
+    return diff
+
+def zeitverlauf(dateien):
+    """Änderungshistorie über eine Kette von Snapshots (z.B. Anker-Korrekturen).
+
+    Generator: je Paar aufeinanderfolgender Snapshots ein DataFrame mit Schritt,
+    Datei, Mitarbeiter, Tag, Status, Alt, Neu, Von, An. Die Dateien werden
+    nacheinander gelesen; im Speicher liegen nur der vorige und der aktuelle
+    Snapshot, der Aufrufer entscheidet, was er von den Änderungen behält.
+    """
+    df_alt = snapshot_store.lade_snapshot(dateien[0])
+    for schritt, datei in enumerate(dateien[1:], start=1):
+        df_neu = snapshot_store.lade_snapshot(datei)
+        diff = mit_uebergabe(vergleiche(df_alt, df_neu), df_alt, df_neu)
+        diff.insert(0, "Schritt", schritt)
+        diff.insert(1, "Datei", os.path.basename(datei))
+        yield diff
+        df_alt = df_neu
+
+def berichte_vergleich(df_alt, df_neu, zeitstempel):
+    """Vergleich zweier geladener Snapshots mit CSV-Export und Vorschau; Rückgabe: diff_df."""
     # Metadaten prüfen (optionaler Hinweis)
     m_alt = f"{df_alt.iloc[0]['Monat']}/{df_alt.iloc[0]['Jahr']}"
     m_neu = f"{df_neu.iloc[0]['Monat']}/{df_neu.iloc[0]['Jahr']}"
     if m_alt != m_neu:
         print(f"HINWEIS: Du vergleichst verschiedene Zeiträume ({m_alt} vs. {m_neu})!")
 
-    # Alle Mitarbeiter/Tag Kombinationen beider Dateien finden
-    alle_kombis = df_alt.index.union(df_neu.index)
-    änderungen = []
-
-    for name, tag in alle_kombis:
-        d_alt = df_alt.loc[(name, tag), "Dienst"] if (name, tag) in df_alt.index else ""
-        d_neu = df_neu.loc[(name, tag), "Dienst"] if (name, tag) in df_neu.index else ""
-
-        if d_alt != d_neu:
-            status = "GEÄNDERT"
-            if d_alt == "": status = "NEU"
-            elif d_neu == "": status = "ENTFERNT"
-            
-            änderungen.append({
-                "Mitarbeiter": name,
-                "Tag": tag,
-                "Status": status,
-                "Alt": d_alt,
-                "Neu": d_neu
-            })
-
-    if änderungen:
-        diff_df = pd.DataFrame(änderungen)
-        zeitstempel = datetime.now().strftime("%d%m_%H%M")
+    diff_df = vergleiche(df_alt, df_neu)
+
+    if len(diff_df):
         output_file = f"kandidaten_aenderung_{zeitstempel}.csv"
         diff_df.to_csv(output_file, index=False, sep=";")
-        print(f"Vergleich abgeschlossen. {len(änderungen)} Änderungen gefunden.")
+        print(f"Vergleich abgeschlossen. {len(diff_df)} Änderungen gefunden.")
         print(f"Datei erstellt: {output_file}")
         print("\nVorschau der Änderungen:")
         print(diff_df.head(10))
     else:
         print("Keine Unterschiede zwischen den Snapshots gefunden.")
+    return diff_df
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshots vergleichen")
+    parser.add_argument("snapshots", nargs="+", help="Alter und neuer Snapshot (CSV oder Versions-ID); mit --timeline "
+                                                     "beliebig viele in zeitlicher Reihenfolge oder eine Version samt Anker-Linie")
+    parser.add_argument("--timeline", action="store_true", help="Änderungshistorie je Mitarbeiter und Tag über alle Snapshots")
+    args = parser.parse_args()
+
+    fehlend = [d for d in args.snapshots if not snapshot_store.existiert(d)]
+    if fehlend:
+        print(f"Fehler: Datei(en) nicht gefunden: {', '.join(fehlend)}")
+        return
+    if not args.timeline and len(args.snapshots) != 2:
+        print("Fehler: Ohne --timeline werden genau zwei Snapshots erwartet (alt neu).")
+        return
+
+    zeitstempel = datetime.now().strftime("%d%m_%H%M")
+
+    if args.timeline:
+        if len(args.snapshots) == 1 and snapshot_store.ist_version(args.snapshots[0]):
+            # Eine Version: ihre Anker-Linie vom ältesten Stand bis zu ihr
+            args.snapshots = snapshot_store.linie(args.snapshots[0])[::-1]
+        # CSV wird je Schritt fortgeschrieben (Reihenfolge: Schritt, Mitarbeiter, Tag);
+        # behalten werden nur die kurzen Texte für die Ausgabe je Mitarbeiter und Tag
+        output_file = f"verlauf_{zeitstempel}.csv"
+        anzahl, verlauf = 0, {}
+        with open(output_file, "w", encoding="utf-8", newline="") as f:
+            for diff in zeitverlauf(args.snapshots):
+                if diff.empty: continue
+                diff.to_csv(f, index=False, sep=";", header=anzahl == 0)
+                anzahl += len(diff)
+                for r in diff[diff["Mitarbeiter"] != "LÜCKEN"].itertuples():
+                    verlauf.setdefault((r.Mitarbeiter, r.Tag), []).append(
+                        f"#{r.Schritt} {r.Status} {r.Alt or '-'} -> {r.Neu or '-'}"
+                        + (f" (an {r.An})" if r.An else "") + (f" (von {r.Von})" if r.Von else ""))
+        if not anzahl:
+            os.remove(output_file)
+            print("Keine Unterschiede über die Snapshot-Kette gefunden.")
+            return
+        print(f"Zeitverlauf über {len(args.snapshots)} Snapshots: {anzahl} Änderungen.")
+        print(f"Datei erstellt: {output_file}")
+        for (name, tag), schritte in sorted(verlauf.items()):
+            print(f"  {name}, Tag {tag:02d}: {' | '.join(schritte)}")
+        return
+
+    # Daten laden
+    df_alt = snapshot_store.lade_snapshot(args.snapshots[0])
+    df_neu = snapshot_store.lade_snapshot(args.snapshots[1])
+    berichte_vergleich(df_alt, df_neu, zeitstempel)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,289 @@
+import calendar
+import hashlib
+import json
+import os
+import re
+from datetime import date, timedelta
+
+# Bei Änderungen am Format hochzählen, damit alte Cache-Einträge verfallen
+VERSION = 3
+CACHE_DIR = ".einstellungen_cache"
+
+TAGES_SCHLUESSEL = {"ABW_": "abwesenheiten", "WUNSCH_TAG_": "wünsche_t", "WUNSCH_NACHT_": "wünsche_n"}
+
+WT_KUERZEL = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
+MAX_DIENSTE = 7   # Snapshot-Speicher: ein Bit je Dienstart in int8
+# Ohne DIENST_-Zeilen: die beiden bisherigen Dienste
+STANDARD_DIENSTE = [
+    {"code": "T", "tage": [0, 1, 2, 3, 4], "besetzung": 1, "danach_nicht": [], "ruhe": 0, "nacht": False,
+     "name": "Tagdienst", "farbe": "#90ee90"},
+    {"code": "N", "tage": [0, 1, 2, 3, 4, 5, 6], "besetzung": 1, "danach_nicht": ["T"], "ruhe": 0, "nacht": True,
+     "name": "Nachtdienst", "farbe": "#add8e6"},
+]
+
+def leere_einstellungen():
+    return {
+        "abwesenheiten": {}, "wünsche_n": {}, "wünsche_t": {},
+        "limits": {}, "namen": {}, "jahr": 2026, "monat": 1,
+        "springer": [], "limit_ids": [], "warnungen": [],
+        "dienste": [dict(d) for d in STANDARD_DIENSTE],
+        # Alle Einträge als echte Daten (ISO), auch außerhalb von JAHR/MONAT
+        "daten": {ziel: {} for ziel in TAGES_SCHLUESSEL.values()},
+    }
+
+def parse_tage(wert, tage_im_monat):
+    """"1, 4,5" -> ([1, 4, 5], [ungültige Einträge]); nur Tage 1..tage_im_monat."""
+    tage, fehler = [], []
+    for teil in wert.split(","):
+        teil = teil.strip()
+        if not teil: continue
+        if teil.isdigit() and 1 <= int(teil) <= tage_im_monat: tage.append(int(teil))
+        else: fehler.append(teil)
+    return tage, fehler
+
+def parse_datum(teil, jahr, monat):
+    """Ein Eintrag -> date oder None: "12" (Tag in JAHR/MONAT), "2026-04-03", "3.4.2026", "3.4."."""
+    try:
+        if teil.isdigit(): return date(jahr, monat, int(teil))
+        if re.fullmatch(r"\d{4}-\d{1,2}-\d{1,2}", teil): return date(*map(int, teil.split("-")))
+        m = re.fullmatch(r"(\d{1,2})\.(\d{1,2})\.(\d{4})?", teil)
+        if m: return date(int(m.group(3) or jahr), int(m.group(2)), int(m.group(1)))
+    except ValueError:
+        pass
+    return None
+
+def parse_daten(wert, jahr, monat):
+    """"12, 2026-04-01..2026-04-03" -> ([date, ...], [ungültige Einträge]); ".." = Bereich."""
+    daten, fehler = [], []
+    for teil in wert.split(","):
+        teil = teil.strip()
+        if not teil: continue
+        von, _, bis = teil.partition("..")
+        a = parse_datum(von.strip(), jahr, monat)
+        b = parse_datum(bis.strip(), jahr, monat) if bis else a
+        if a is None or b is None or b < a:
+            fehler.append(teil)
+            continue
+        daten += [a + timedelta(n) for n in range((b - a).days + 1)]
+    return daten, fehler
+
+def parse_wochentage(wert):
+    """"Mo-Fr", "Sa,So", "Mo-So" -> [0..6] oder None bei Unsinn."""
+    tage = set()
+    for teil in wert.replace(" ", "").split(","):
+        von, _, bis = teil.partition("-")
+        if von not in WT_KUERZEL or (bis and bis not in WT_KUERZEL): return None
+        a, b = WT_KUERZEL.index(von), WT_KUERZEL.index(bis or von)
+        tage.update(range(a, b + 1) if a <= b else list(range(a, 7)) + list(range(b + 1)))
+    return sorted(tage)
+
+def parse_dienst(code, wert, warnungen, nr):
+    """DIENST_F: tage=Mo-Fr; besetzung=2; danach_nicht=N; ruhe=0; nacht=nein; name=Frühdienst; farbe=#ffd580"""
+    dienst = {"code": code, "tage": list(range(7)), "besetzung": 1, "danach_nicht": [], "ruhe": 0,
+              "nacht": False, "name": f"Dienst {code}", "farbe": None}
+    for teil in wert.split(";"):
+        if not teil.strip(): continue
+        k, _, v = [x.strip() for x in teil.partition("=")]
+        k = k.lower()
+        if k == "tage":
+            tage = parse_wochentage(v)
+            if tage is None: warnungen.append(f"Zeile {nr}: DIENST_{code} tage '{v}' nicht lesbar (z.B. Mo-Fr, Sa,So)")
+            else: dienst["tage"] = tage
+        elif k in ("besetzung", "ruhe"):
+            if v.isdigit(): dienst[k] = int(v)
+            else: warnungen.append(f"Zeile {nr}: DIENST_{code} {k} '{v}' ist keine Zahl")
+        elif k == "danach_nicht": dienst[k] = [c.strip() for c in v.split(",") if c.strip()]
+        elif k == "nacht": dienst[k] = v.lower() in ("ja", "1", "true")
+        elif k in ("name", "farbe"): dienst[k] = v
+        else: warnungen.append(f"Zeile {nr}: DIENST_{code} unbekannte Angabe '{k}'")
+    return dienst
+
+def kompiliere_text(text):
+    """Liest einstellungen.txt in einem Durchgang.
+
+    Zuordnung zu Mitarbeitern exakt über die ID hinter dem Präfix (ABW_MA_10
+    gehört zu MA_10, nicht zu MA_1). Tage werden gegen die echte Monatslänge
+    geprüft; Unstimmigkeiten landen in "warnungen" statt den Rest abzubrechen.
+    Statt Tagen sind auch echte Daten und Bereiche erlaubt (parse_daten); nur
+    die aus JAHR/MONAT zählen für den Monatsplan, alle stehen unter "daten".
+    DIENST_-Zeilen ersetzen die Standard-Dienste T und N (Reihenfolge der
+    Zeilen = Reihenfolge der Besetzung je Tag).
+    """
+    einst = leere_einstellungen()
+    warnungen = einst["warnungen"]
+    roh = []
+    springer_ids = None
+    dienste = []
+
+    for nr, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"): continue
+        if ":" not in line:
+            warnungen.append(f"Zeile {nr}: kein ':' in '{line}'")
+            continue
+        key, val = [x.strip() for x in line.split(":", 1)]
+        if key.startswith("MA_"): einst["namen"][key] = val
+        elif key in ("JAHR", "MONAT"):
+            if val.isdigit(): einst[key.lower()] = int(val)
+            else: warnungen.append(f"Zeile {nr}: {key} '{val}' ist keine Zahl")
+        elif key == "SPRINGER": springer_ids = [s.strip() for s in val.split(",") if s.strip()]
+        elif key.startswith("DIENST_"):
+            code = key[len("DIENST_"):]
+            if len(code) != 1 or not code.isalpha() or not code.isupper():
+                warnungen.append(f"Zeile {nr}: {key} – Dienstkürzel muss ein Großbuchstabe sein")
+            elif code in {d["code"] for d in dienste}:
+                warnungen.append(f"Zeile {nr}: {key} doppelt, verwende die erste Angabe")
+            elif len(dienste) >= MAX_DIENSTE:
+                warnungen.append(f"Zeile {nr}: {key} ignoriert, höchstens {MAX_DIENSTE} Dienstarten")
+            else:
+                dienste.append(parse_dienst(code, val, warnungen, nr))
+        else: roh.append((nr, key, val))
+
+    if dienste:
+        codes = {d["code"] for d in dienste}
+        for d in dienste:
+            for c in d["danach_nicht"]:
+                if c not in codes: warnungen.append(f"DIENST_{d['code']}: danach_nicht nennt unbekannten Dienst {c}")
+            d["danach_nicht"] = [c for c in d["danach_nicht"] if c in codes]
+        einst["dienste"] = dienste
+
+    if not 1 <= einst["monat"] <= 12:
+        warnungen.append(f"MONAT {einst['monat']} ungültig, verwende 1")
+        einst["monat"] = 1
+    _, tage_im_monat = calendar.monthrange(einst["jahr"], einst["monat"])
+    namen = einst["namen"]
+
+    if springer_ids is not None:
+        einst["_springer_ids"] = springer_ids
+        einst["springer"] = [namen[sid] for sid in springer_ids if sid in namen]
+        for sid in springer_ids:
+            if sid not in namen: warnungen.append(f"SPRINGER: unbekannte ID {sid}")
+
+    for nr, key, val in roh:
+        if key.startswith("LIMIT_"):
+            ma_id, ziel = key[len("LIMIT_"):], None
+        else:
+            praefix = next((p for p in TAGES_SCHLUESSEL if key.startswith(p)), None)
+            if praefix is None:
+                warnungen.append(f"Zeile {nr}: unbekannter Schlüssel {key}")
+                continue
+            ma_id, ziel = key[len(praefix):], TAGES_SCHLUESSEL[praefix]
+        if ziel is None and ma_id.startswith("MA_"): einst["limit_ids"].append(ma_id)
+        if ma_id not in namen:
+            warnungen.append(f"Zeile {nr}: {key} – keine Mitarbeiter-ID {ma_id}")
+            continue
+        name = namen[ma_id]
+        if ziel is None:
+            if val.isdigit(): einst["limits"][name] = int(val)
+            else: warnungen.append(f"Zeile {nr}: {key} '{val}' ist keine Zahl")
+            continue
+        daten, fehler = parse_daten(val, einst["jahr"], einst["monat"])
+        if fehler:
+            warnungen.append(f"Zeile {nr}: {key} ungültige Tage {', '.join(fehler)} (Monat hat {tage_im_monat})")
+        einst[ziel][name] = [d.day for d in daten if (d.year, d.month) == (einst["jahr"], einst["monat"])]
+        einst["daten"][ziel][name] = [d.isoformat() for d in daten]
+    return einst
+
+def _cache_pfad(dateiname, inhalt):
+    schluessel = hashlib.sha256(inhalt + f"|v{VERSION}".encode()).hexdigest()
+    return os.path.join(os.path.dirname(os.path.abspath(dateiname)), CACHE_DIR, f"{schluessel}.json")
+
+def lade_einstellungen(dateiname, cache=True, warnen=True):
+    """einstellungen.txt lesen und kompilieren, mit Cache auf der Platte.
+
+    Der Cache-Eintrag ist über den SHA-256 des Dateiinhalts adressiert; bei
+    unveränderter Datei entfällt das Parsen komplett.
+    """
+    if not os.path.exists(dateiname): return leere_einstellungen()
+    with open(dateiname, "rb") as f:
+        inhalt = f.read()
+    pfad = _cache_pfad(dateiname, inhalt)
+    einst = None
+    if cache and os.path.exists(pfad):
+        try:
+            with open(pfad, encoding="utf-8") as f:
+                einst = json.load(f)
+        except (OSError, ValueError):
+            einst = None
+
+    if einst is None:
+        einst = kompiliere_text(inhalt.decode("utf-8-sig"))
+        if cache:
+            try:
+                os.makedirs(os.path.dirname(pfad), exist_ok=True)
+                tmp = f"{pfad}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(einst, f, ensure_ascii=False)
+                os.replace(tmp, pfad)
+            except OSError:
+                pass
+    if warnen:
+        for w in einst["warnungen"]: print(f"WARNUNG {os.path.basename(dateiname)}: {w}")
+    return einst
+
+def ist_standard(dienste):
+    """True, wenn nur T und N nach den bisherigen Regeln geplant werden (Name/Farbe egal)."""
+    def regeln(d): return {k: v for k, v in d.items() if k not in ("name", "farbe")}
+    return [regeln(d) for d in dienste] == [regeln(d) for d in STANDARD_DIENSTE]
+
+def lade_dienste(dateiname="einstellungen.txt"):
+    """Dienstarten für die Ausgabe (Name, Farbe); ohne Datei die Standard-Dienste."""
+    if not os.path.exists(dateiname): return [dict(d) for d in STANDARD_DIENSTE]
+    return lade_einstellungen(dateiname, warnen=False)["dienste"]
+
+def merge_werte(dateiname, werte, ueberschreiben=False):
+    """Übernimmt {Schlüssel: [Tage]} (ABW_/WUNSCH_*) direkt in einstellungen.txt.
+
+    Neue Schlüssel werden hinter die letzte Zeile derselben Art eingefügt,
+    identische bleiben unverändert. Steht ein Schlüssel mit anderen Tagen schon
+    in der Datei, ist das ein Konflikt: er wird gemeldet und nur mit
+    ueberschreiben=True ersetzt. Kommentare und Zeilenenden bleiben erhalten.
+
+    Rückgabe: dict mit Listen neu, gleich, konflikte und ueberschrieben
+    (die beiden letzten als (Schlüssel, alt, neu)).
+    """
+    with open(dateiname, encoding="utf-8", newline="") as f:
+        text = f.read()
+    nl = "\r\n" if "\r\n" in text else "\n"
+    zeilen = text.splitlines()
+
+    aktiv, letzte = {}, {}
+    for i, zeile in enumerate(zeilen):
+        s = zeile.strip()
+        ist_aktiv = not s.startswith("#")
+        s = s.lstrip("#").strip()
+        if ":" not in s: continue
+        key = s.split(":", 1)[0].strip()
+        praefix = next((p for p in TAGES_SCHLUESSEL if key.startswith(p)), None)
+        if praefix: letzte[praefix] = i
+        if ist_aktiv: aktiv[key] = i
+
+    ergebnis = {"neu": [], "gleich": [], "konflikte": [], "ueberschrieben": []}
+    einfuegen, anhang = {}, []
+    for key, tage in sorted(werte.items()):
+        neu_wert = ",".join(map(str, sorted(set(tage))))
+        if key in aktiv:
+            alt_wert = zeilen[aktiv[key]].split(":", 1)[1].strip()
+            alt_tage = sorted({int(x) for x in alt_wert.split(",") if x.strip().isdigit()})
+            if alt_tage == sorted(set(tage)):
+                ergebnis["gleich"].append(key)
+            elif ueberschreiben:
+                zeilen[aktiv[key]] = f"{key}:{neu_wert}"
+                ergebnis["ueberschrieben"].append((key, alt_wert, neu_wert))
+            else:
+                ergebnis["konflikte"].append((key, alt_wert, neu_wert))
+            continue
+        praefix = next((p for p in TAGES_SCHLUESSEL if key.startswith(p)), None)
+        if praefix in letzte: einfuegen.setdefault(letzte[praefix], []).append(f"{key}:{neu_wert}")
+        else: anhang.append(f"{key}:{neu_wert}")
+        ergebnis["neu"].append(key)
+
+    if ergebnis["neu"] or ergebnis["ueberschrieben"]:
+        neu_zeilen = []
+        for i, zeile in enumerate(zeilen):
+            neu_zeilen.append(zeile)
+            neu_zeilen.extend(einfuegen.get(i, []))
+        if anhang: neu_zeilen += ["", "# Aus PDF-Formularen übernommen"] + anhang
+        with open(dateiname, "w", encoding="utf-8", newline="") as f:
+            f.write(nl.join(neu_zeilen) + nl)
+    return ergebnis
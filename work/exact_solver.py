@@ -0,0 +1,231 @@
+import calendar
+import math
+import time
+import numpy as np
+
+# --- ZIELFUNKTION (ganzzahlig, wird minimiert) ---
+KOSTEN_LUECKE = 1000      # unbesetzter Dienst
+KOSTEN_ANKER = 100        # verankerter Dienst geht an jemand anderen (nur Korrektur)
+KOSTEN_VOR_ABW = 50       # Nachtdienst direkt vor einem Abwesenheitstag
+KOSTEN_GEGENWUNSCH = 5    # Dienst an einem Tag, an dem die andere Schicht gewünscht war
+BONUS_WUNSCH = 10         # gewünschter Dienst erfüllt
+
+INF = np.inf
+
+def baue_kosten(modell, jahr, monat, anker_dict=None, anker_aktiv=False):
+    """Kostenmatrizen kT/kN[Tag, MA] mit inf für unzulässige Zuordnungen.
+
+    Die letzte Spalte (Index n) steht für "keiner" = Lücke. Harte Regeln:
+    Abwesenheit, kein T am Wochenende und im Korrekturmodus dürfen nur
+    SPRINGER einen fremden Dienst übernehmen.
+    """
+    anker_dict = anker_dict or {}
+    namen = modell["namen"]
+    n = len(namen)
+    _, tage = calendar.monthrange(jahr, monat)
+    springer = set(modell["springer"]) if anker_aktiv and modell["springer"] else None
+
+    kT = np.full((tage + 2, n + 1), INF)
+    kN = np.full((tage + 2, n + 1), INF)
+    kT[:, n] = kN[:, n] = 0.0
+    for t in range(1, tage + 1):
+        bit = 1 << t
+        for d, k in (("T", kT), ("N", kN)):
+            if d == "T" and calendar.weekday(jahr, monat, t) > 4: continue
+            a = anker_dict.get((t, d))
+            k[t, n] = KOSTEN_LUECKE + (KOSTEN_ANKER if a else 0)
+            wun, gegen = (modell["wun_t"], modell["wun_n"]) if d == "T" else (modell["wun_n"], modell["wun_t"])
+            for i, m in enumerate(namen):
+                if modell["abw"][m] & bit: continue
+                if springer is not None and m != a and m not in springer: continue
+                c = 0
+                if a and m != a: c += KOSTEN_ANKER
+                if wun[m] & bit: c -= BONUS_WUNSCH
+                if gegen[m] & bit: c += KOSTEN_GEGENWUNSCH
+                if d == "N" and modell["abw"][m] & (bit << 1): c += KOSTEN_VOR_ABW
+                k[t, i] = c
+    return kT, kN
+
+def _paare(cT, g, n):
+    """Paarkosten P[T, N] eines Tages; derselbe MA darf nicht T und N haben (TN)."""
+    P = cT[:, None] + g[None, :]
+    P[np.arange(n), np.arange(n)] = INF
+    return P
+
+def rueckwaerts(kT, kN, lam, tage, n):
+    """Lagrange-Relaxation der Limits, exakt gelöst per DP über die Tage.
+
+    Zustand ist, wer gestern Nacht hatte (NT-Regel). Liefert V[t, y] = minimale
+    relaxierte Restkosten ab Tag t, sowie je Tag die beste und zweitbeste Zeile
+    für die Rekonstruktion.
+    """
+    lam_ext = np.append(lam, 0.0)
+    V = np.zeros((tage + 2, n + 1))
+    wahl = [None] * (tage + 2)
+    zeilen = np.arange(n + 1)
+    for t in range(tage, 0, -1):
+        P = _paare(kT[t] + lam_ext, kN[t] + lam_ext + V[t + 1], n)
+        arg_n = P.argmin(axis=1)
+        zmin = P[zeilen, arg_n]
+        b1, b2 = np.argsort(zmin, kind="stable")[:2]
+        V[t, :] = zmin[b1]
+        if b1 < n: V[t, b1] = zmin[b2]
+        wahl[t] = (b1, b2, arg_n)
+    return V, wahl
+
+def _relaxierte_anzahl(wahl, tage, n):
+    anzahl = np.zeros(n + 1)
+    y = n
+    for t in range(1, tage + 1):
+        b1, b2, arg_n = wahl[t]
+        T = b2 if (y == b1 and b1 < n) else b1
+        N = arg_n[T]
+        anzahl[T] += 1
+        anzahl[N] += 1
+        y = N
+    return anzahl[:n]
+
+def vorwaerts(kT, kN, lam, V, lim, tage, n):
+    """Lagrange-Heuristik: Tag für Tag das günstigste zulässige Paar unter Beachtung
+    der echten Limits, mit V als Vorausschau. Bei Gleichstand gewinnt, wer weniger
+    Dienste hat (wie in wer_kann)."""
+    lam_ext = np.append(lam, 0.0)
+    anzahl = np.zeros(n + 1)
+    y, kosten, zuordnung = n, 0.0, []
+    for t in range(1, tage + 1):
+        cT = kT[t] + lam_ext
+        cN = kN[t] + lam_ext + V[t + 1]
+        voll = np.append(anzahl[:n] >= lim, False)
+        cT = np.where(voll, INF, cT + 1e-6 * anzahl)
+        cN = np.where(voll, INF, cN + 1e-6 * anzahl)
+        if y < n: cT[y] = INF
+        P = _paare(cT, cN, n)
+        T, N = divmod(int(P.argmin()), n + 1)
+        kosten += kT[t, T] + kN[t, N]
+        anzahl[T] += 1
+        anzahl[N] += 1
+        zuordnung.append((T, N))
+        y = N
+    return kosten, zuordnung
+
+def bewerte(zuordnung, kT, kN):
+    return sum(kT[t, T] + kN[t, N] for t, (T, N) in enumerate(zuordnung, start=1))
+
+def plan_zu_zuordnung(plan, namen, tage):
+    idx = {m: i for i, m in enumerate(namen)}
+    n = len(namen)
+    zuordnung = [[n, n] for _ in range(tage)]
+    for m, dienste in plan.items():
+        for t, d in dienste.items():
+            zuordnung[t - 1][0 if d == "T" else 1] = idx[m]
+    return [tuple(z) for z in zuordnung]
+
+def zuordnung_zu_plan(zuordnung, namen, kT):
+    """Umkehrung von plan_zu_zuordnung; Lücken nur für Dienste, die es gibt."""
+    n = len(namen)
+    plan = {m: {} for m in namen}
+    luecken = {}
+    for t, (T, N) in enumerate(zuordnung, start=1):
+        if T < n: plan[namen[T]][t] = "T"
+        elif kT[t, n] > 0: luecken[t] = "T"
+        if N < n: plan[namen[N]][t] = "N"
+        else: luecken[t] = luecken.get(t, "") + "N"
+    return plan, luecken
+
+def loese_exakt(modell, jahr, monat, anker_dict=None, anker_aktiv=False, zeitbudget=10.0, start=None):
+    """Optimiert den ganzen Monat als ein Problem (Branch-and-Bound).
+
+    Schranke: Lagrange-Relaxation der Limits (Subgradient), pro Relaxation exakt
+    per DP gelöst. Startlösung ist der übergebene Plan (z.B. Greedy), sonst die
+    Lagrange-Heuristik. Die Suche verzweigt Tag für Tag über (T, N)-Paare.
+
+    Rückgabe: dict mit plan, luecken, kosten, schranke, gap, gap_prozent,
+    optimal und knoten.
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + zeitbudget
+    namen = modell["namen"]
+    n = len(namen)
+    _, tage = calendar.monthrange(jahr, monat)
+    kT, kN = baue_kosten(modell, jahr, monat, anker_dict, anker_aktiv)
+    lim = np.array([modell["limit"][m] for m in namen], dtype=float)
+
+    beste_kosten, beste = INF, None
+    if start is not None:
+        beste = plan_zu_zuordnung(start, namen, tage)
+        beste_kosten = bewerte(beste, kT, kN)
+
+    # --- 1. SCHRANKE: Subgradienten-Verfahren ---
+    lam = np.zeros(n)
+    beste_lam, schranke = lam.copy(), -INF
+    theta = 2.0
+    for it in range(300):
+        V, wahl = rueckwaerts(kT, kN, lam, tage, n)
+        wert = V[1, n] - lam @ lim
+        if wert > schranke + 1e-9:
+            schranke, beste_lam = wert, lam.copy()
+        else:
+            theta *= 0.9
+        kosten, zuordnung = vorwaerts(kT, kN, lam, V, lim, tage, n)
+        if kosten < beste_kosten:
+            beste_kosten, beste = kosten, zuordnung
+        if math.ceil(schranke - 1e-6) >= beste_kosten or theta < 1e-4: break
+        if time.perf_counter() > t0 + 0.4 * zeitbudget: break
+        g = _relaxierte_anzahl(wahl, tage, n) - lim
+        g[(lam <= 0) & (g < 0)] = 0
+        norm = g @ g
+        if norm == 0: break
+        lam = np.maximum(0.0, lam + theta * max(beste_kosten - wert, 1.0) / norm * g)
+
+    # --- 2. BRANCH-AND-BOUND mit der besten Schranke ---
+    V, _ = rueckwaerts(kT, kN, beste_lam, tage, n)
+    lam_ext = np.append(beste_lam, 0.0)
+    konstante = beste_lam @ lim
+    knoten = 0
+    abgebrochen = False
+    anzahl = np.zeros(n + 1)
+    pfad = []
+
+    def suche(t, y, A, K):
+        nonlocal beste_kosten, beste, knoten, abgebrochen
+        knoten += 1
+        if t > tage:
+            if K < beste_kosten: beste_kosten, beste = K, list(pfad)
+            return
+        if time.perf_counter() > deadline:
+            abgebrochen = True
+            return
+        voll = np.append(anzahl[:n] >= lim, False)
+        cT = np.where(voll, INF, kT[t] + lam_ext)
+        cN = np.where(voll, INF, kN[t] + lam_ext + V[t + 1])
+        if y < n: cT[y] = INF
+        P = _paare(cT, cN, n).ravel()
+        grenze = beste_kosten - 1 + 1e-6 - A + konstante
+        kandidaten = np.flatnonzero(P <= grenze)
+        if not len(kandidaten): return
+        tiebreak = anzahl[kandidaten // (n + 1)] + anzahl[kandidaten % (n + 1)]
+        for k in kandidaten[np.lexsort((tiebreak, P[kandidaten]))]:
+            if A + P[k] - konstante > beste_kosten - 1 + 1e-6: break
+            T, N = divmod(int(k), n + 1)
+            anzahl[T] += 1
+            anzahl[N] += 1
+            pfad.append((T, N))
+            suche(t + 1, N, A + cT[T] + kN[t, N] + lam_ext[N], K + kT[t, T] + kN[t, N])
+            pfad.pop()
+            anzahl[T] -= 1
+            anzahl[N] -= 1
+            if abgebrochen: return
+
+    if math.ceil(schranke - 1e-6) < beste_kosten:
+        suche(1, n, 0.0, 0.0)
+        if not abgebrochen: schranke = beste_kosten
+
+    plan, luecken = zuordnung_zu_plan(beste, namen, kT)
+    schranke = min(schranke, beste_kosten)
+    gap = beste_kosten - schranke
+    return {
+        "plan": plan, "luecken": luecken,
+        "kosten": int(beste_kosten), "schranke": float(schranke),
+        "gap": float(gap), "gap_prozent": 100.0 * gap / max(abs(beste_kosten), 1.0),
+        "optimal": gap < 1 - 1e-6, "knoten": knoten,
+    }
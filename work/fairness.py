@@ -0,0 +1,219 @@
+"""Fairness-Planer: Auswahl über einen indizierten Heap statt Sortierung.
+
+Je Mitarbeiter wird die Last aus diesem Monat plus den Vormonaten geführt
+(Dienste, Nächte, Wochenend-Nächte). Für T, N und N am Wochenende gibt es je
+einen Heap mit passendem Schlüssel; nach jeder Besetzung werden die drei
+Einträge des Betroffenen in O(log n) nachgezogen. Die Auswahl läuft in
+Schlüssel-Reihenfolge durch den Heap, bis der erste freie Kandidat kommt.
+
+Sonst gelten dieselben Regeln wie in plane_greedy: gültiger Anker bleibt,
+dann Wunsch, dann der fairste freie Kandidat (Nacht vor Abwesenheit nur als
+Notfall), in der Korrektur nur SPRINGER.
+"""
+import calendar
+import heapq
+
+import snapshot_store
+
+GEWICHT_WE = 2    # eine Wochenend-Nacht zählt im Nacht-Schlüssel wie zwei Nächte
+
+def leere_last(namen):
+    return {m: {"dienste": 0, "naechte": 0, "we_naechte": 0} for m in namen}
+
+def addiere_last(last, plan, jahr, monat):
+    """Dienste eines Plans {Name: {Tag: Dienst}} auf last aufaddieren."""
+    for m, dienste in plan.items():
+        if m not in last: last[m] = {"dienste": 0, "naechte": 0, "we_naechte": 0}
+        for t, d in dienste.items():
+            last[m]["dienste"] += 1
+            if "N" in d:
+                last[m]["naechte"] += 1
+                if calendar.weekday(jahr, monat, t) >= 5: last[m]["we_naechte"] += 1
+    return last
+
+def lade_historie(jahr, monat, quellen=None, ordner=snapshot_store.STORE_DIR, ids=None):
+    """Übertrag aus früheren Monaten: {Name: {dienste, naechte, we_naechte}}.
+
+    Ohne quellen wird je früherem Monat die jüngste Version aus dem
+    Snapshot-Speicher genommen, deren Mitarbeiter-IDs genau ids sind (andere
+    Stationen oder Teams zählen nicht mit; ohne ids keine automatische
+    Auswahl), sonst die angegebenen CSVs/Versions-IDs.
+    Rückgabe: (last, verwendete_quellen)
+    """
+    if quellen is None:
+        juengste = {}
+        ids = set(ids or ())
+        for vid, meta in sorted(snapshot_store.lade_index(ordner).items()):
+            if (meta["jahr"], meta["monat"]) < (jahr, monat) and {i for i, _ in meta["ids"]} == ids:
+                juengste[(meta["jahr"], meta["monat"])] = vid
+        quellen = [juengste[k] for k in sorted(juengste)]
+    last = {}
+    for q in quellen:
+        if snapshot_store.ist_version(q, ordner):
+            plan, _, meta = snapshot_store.lade_plan(q, ordner)
+            addiere_last(last, plan, meta["jahr"], meta["monat"])
+        else:
+            df = snapshot_store.lade_snapshot(q, ordner)
+            df = df[df["Name"] != "LÜCKEN"]
+            plan = {}
+            for m, t, d in zip(df["Name"], df["Tag"], df["Dienst"]): plan.setdefault(m, {})[int(t)] = d
+            addiere_last(last, plan, int(df["Jahr"].iloc[0]), int(df["Monat"].iloc[0]))
+    return last, quellen
+
+# --- Indizierter Min-Heap: {"h": [(schluessel, name)], "pos": {name: index}} ---
+
+def _tausche(heap, i, j):
+    h = heap["h"]
+    h[i], h[j] = h[j], h[i]
+    heap["pos"][h[i][1]], heap["pos"][h[j][1]] = i, j
+
+def _hoch(heap, i):
+    h = heap["h"]
+    while i and h[i] < h[(i - 1) // 2]:
+        _tausche(heap, i, (i - 1) // 2)
+        i = (i - 1) // 2
+
+def _runter(heap, i):
+    h, n = heap["h"], len(heap["h"])
+    while True:
+        k = min((c for c in (2 * i + 1, 2 * i + 2) if c < n), key=h.__getitem__, default=None)
+        if k is None or h[i] <= h[k]: return
+        _tausche(heap, i, k)
+        i = k
+
+def baue_heap(eintraege):
+    """eintraege: [(schluessel, name)] -> Heap (O(n))."""
+    h = list(eintraege)
+    heapq.heapify(h)
+    return {"h": h, "pos": {m: i for i, (_, m) in enumerate(h)}}
+
+def setze_schluessel(heap, name, schluessel):
+    """Neuer Schlüssel für name in O(log n)."""
+    i = heap["pos"][name]
+    heap["h"][i] = (schluessel, name)
+    _hoch(heap, i)
+    _runter(heap, heap["pos"][name])
+
+def in_reihenfolge(heap):
+    """Namen aufsteigend nach Schlüssel, ohne den Heap zu verändern.
+
+    Best-first über den Heap-Baum: die ersten k Namen kosten O(k log k).
+    """
+    h = heap["h"]
+    if not h: return
+    rand = [(h[0], 0)]
+    while rand:
+        (_, m), i = heapq.heappop(rand)
+        yield m
+        for c in (2 * i + 1, 2 * i + 2):
+            if c < len(h): heapq.heappush(rand, (h[c], c))
+
+# --- Planung ---
+
+def plane_fair(modell, jahr, monat, historie=None, anker_dict=None, anker_aktiv=False, nacht_vormonat=""):
+    """Tag-für-Tag-Plan mit fairer Auswahl über Heaps.
+
+    historie ist der Übertrag aus lade_historie(), nacht_vormonat wie in
+    plane_greedy. Rückgabe wie plane_greedy:
+    (plan, luecken, aenderungen).
+    """
+    anker_dict = anker_dict or {}
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    abw, limit = modell["abw"], modell["limit"]
+    pool = modell["springer"] if anker_aktiv and modell["springer"] else modell["namen"]
+    rang = {m: i for i, m in enumerate(pool)}
+
+    last = leere_last(modell["namen"])
+    for m, werte in (historie or {}).items():
+        if m in last: last[m] = dict(werte)
+    counter = {m: 0 for m in modell["namen"]}
+
+    # Schlüssel je Heap; der Rang im Pool entscheidet Gleichstände wie bisher
+    def k_tag(m):
+        l = last[m]
+        return (l["dienste"], l["naechte"], rang[m])
+    def k_nacht(m):
+        l = last[m]
+        return (l["naechte"] + GEWICHT_WE * l["we_naechte"], l["dienste"], rang[m])
+    def k_we(m):
+        l = last[m]
+        return (l["we_naechte"], l["naechte"], l["dienste"], rang[m])
+    heaps = {art: (baue_heap([(k(m), m) for m in pool]), k) for art, k in
+             (("T", k_tag), ("N", k_nacht), ("WE", k_we))}
+
+    plan = {m: {} for m in modell["namen"]}
+    luecken = {}
+    aenderungen = []
+
+    def besetze(m, t, d, we):
+        plan[m][t] = d
+        counter[m] += 1
+        last[m]["dienste"] += 1
+        if d == "N":
+            last[m]["naechte"] += 1
+            if we: last[m]["we_naechte"] += 1
+        if m in rang:
+            for heap, k in heaps.values(): setze_schluessel(heap, m, k(m))
+
+    def waehle(t, d, gesperrt, we):
+        bit = 1 << t
+        bit_morgen = bit << 1 if d == "N" else 0
+        def frei(m):
+            return not abw[m] & bit and counter[m] < limit[m] and m not in gesperrt
+
+        a = anker_dict.get((t, d))
+        if a in modell["namen_set"] and frei(a) and not abw[a] & bit_morgen: return a, False
+        wun = modell["wun_n"] if d == "N" else modell["wun_t"]
+        for m in pool:
+            if wun[m] & bit and frei(m) and not abw[m] & bit_morgen: return m, True
+        notfall = None
+        heap = heaps["WE" if we and d == "N" else d][0]
+        for m in in_reihenfolge(heap):
+            if not frei(m): continue
+            if not abw[m] & bit_morgen: return m, True
+            if notfall is None: notfall = m
+        return notfall, notfall is not None
+
+    nacht_gestern = nacht_vormonat
+    for t in range(1, tage_im_monat + 1):
+        we = calendar.weekday(jahr, monat, t) >= 5
+        heute_tag = ""
+        if not we:
+            bes, ersetzt = waehle(t, "T", {nacht_gestern}, we)
+            a_ma = anker_dict.get((t, "T"))
+            if bes:
+                besetze(bes, t, "T", we)
+                heute_tag = bes
+                if ersetzt: aenderungen.append(f"Tag {t:02d} (T): {a_ma if a_ma else 'LÜCKE'} -> {bes}")
+            else:
+                luecken[t] = luecken.get(t, "") + "T"
+                if anker_aktiv: aenderungen.append(f"Tag {t:02d} (T): {a_ma} -> !!! NICHT BESETZT (Kein Springer verfügbar) !!!")
+
+        bes_n, ersetzt_n = waehle(t, "N", {heute_tag}, we)
+        a_ma_n = anker_dict.get((t, "N"))
+        if bes_n:
+            besetze(bes_n, t, "N", we)
+            nacht_gestern = bes_n
+            if ersetzt_n: aenderungen.append(f"Tag {t:02d} (N): {a_ma_n if a_ma_n else 'LÜCKE'} -> {bes_n}")
+        else:
+            nacht_gestern = ""
+            luecken[t] = luecken.get(t, "") + "N"
+            if anker_aktiv and a_ma_n: aenderungen.append(f"Tag {t:02d} (N): {a_ma_n} -> !!! NICHT BESETZT (Kein Springer verfügbar) !!!")
+
+    return plan, luecken, aenderungen
+
+def fairness_bericht(plan, jahr, monat, historie=None):
+    """Tabelle je MA (Monat / inkl. Übertrag) und Spannweiten als Textzeilen."""
+    monat_last = addiere_last(leere_last(plan), plan, jahr, monat)
+    gesamt = {m: {k: v + (historie or {}).get(m, {}).get(k, 0) for k, v in l.items()} for m, l in monat_last.items()}
+    zeilen = [f"{'Name':15} {'Dienste':>8} {'Nächte':>7} {'WE-N':>5}   {'gesamt D':>8} {'N':>4} {'WE-N':>5}"]
+    for m in sorted(plan):
+        a, g = monat_last[m], gesamt[m]
+        zeilen.append(f"{m:15} {a['dienste']:8d} {a['naechte']:7d} {a['we_naechte']:5d}   "
+                      f"{g['dienste']:8d} {g['naechte']:4d} {g['we_naechte']:5d}")
+    for titel, werte in (("Monat", monat_last), ("inkl. Übertrag", gesamt)):
+        spann = {k: max(l[k] for l in werte.values()) - min(l[k] for l in werte.values()) for k in
+                 ("dienste", "naechte", "we_naechte")} if werte else {"dienste": 0, "naechte": 0, "we_naechte": 0}
+        zeilen.append(f"Spannweite {titel}: Dienste {spann['dienste']}, Nächte {spann['naechte']}, "
+                      f"WE-Nächte {spann['we_naechte']}")
+    return zeilen
@@ -2,170 +2,426 @@ import pandas as pd
 import calendar
 import os
 import argparse
+import json
+import time
 from datetime import datetime
 
+import snapshot_store
+from einstellungen_compiler import lade_einstellungen, ist_standard
+
+NUR_GREEDY = ("Eigene Dienstarten (DIENST_) plant bisher nur der greedy-Planer "
+              "(ohne --repair, --sweep, --solver exact/fair, --local-search)")
+
 # --- FUNKTIONEN ---
 
-def lade_einstellungen(dateiname):
-    einst = {
-        "abwesenheiten": {}, "wünsche_n": {}, "wünsche_t": {}, 
-        "limits": {}, "namen": {}, "jahr": 2026, "monat": 1,
-        "springer": []
+def kompiliere_einstellungen(config):
+    """Baut aus lade_einstellungen() einmalig das Verfügbarkeitsmodell.
+
+    Abwesenheiten und Wünsche werden je Mitarbeiter als Bitmaske über die Tage
+    abgelegt (Bit t = Tag t), Limits und Namensreihenfolge vorberechnet. Damit
+    kostet jede Prüfung in wer_kann() nur noch eine Bit-Operation.
+    """
+    def maske(tage):
+        m = 0
+        for t in tage: m |= 1 << t
+        return m
+
+    namen = sorted(list(config["namen"].values()))
+    wun_t = {m: maske(config["wünsche_t"].get(m, [])) for m in namen}
+    wun_n = {m: maske(config["wünsche_n"].get(m, [])) for m in namen}
+    return {
+        "namen": namen,
+        "namen_set": set(namen),
+        "abw": {m: maske(config["abwesenheiten"].get(m, [])) for m in namen},
+        "wun_t": wun_t,
+        "wun_n": wun_n,
+        "limit": {m: config["limits"].get(m, 31) for m in namen},
+        "springer": list(config["springer"]),
+        **kompiliere_dienste(config["dienste"], namen, wun_t, wun_n),
     }
-    temp_daten = []
-    try:
-        if not os.path.exists(dateiname): return einst
-        with open(dateiname, "r", encoding="utf-8") as f:
-            lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
-            for line in lines:
-                key, val = [x.strip() for x in line.split(":", 1)]
-                if key.startswith("MA_"): einst["namen"][key] = val
-                elif key == "JAHR": einst["jahr"] = int(val)
-                elif key == "MONAT": einst["monat"] = int(val)
-                elif key == "SPRINGER": einst["_springer_ids"] = [s.strip() for s in val.split(",")]
-                else: temp_daten.append((key, val))
-            
-            if "_springer_ids" in einst:
-                einst["springer"] = [einst["namen"][sid] for sid in einst["_springer_ids"] if sid in einst["namen"]]
-            
-            for key, val in temp_daten:
-                ma_id = next((pid for pid in einst["namen"].keys() if pid in key), None)
-                if not ma_id: continue
-                name = einst["namen"][ma_id]
-                if key.startswith("LIMIT_"): einst["limits"][name] = int(val)
-                elif key.startswith("WUNSCH_TAG_"): einst["wünsche_t"][name] = [int(x) for x in val.split(",")]
-                elif key.startswith("WUNSCH_NACHT_"): einst["wünsche_n"][name] = [int(x) for x in val.split(",")]
-                elif key.startswith("ABW_"): einst["abwesenheiten"][name] = [int(x) for x in val.split(",")]
-    except Exception as e: print(f"Fehler beim Laden: {e}")
-    return einst
-
-def wer_kann(tag, ist_nacht, wer_gesperrt, config, counter, check_morgen_abwesend=False, anker_ma=None, nutze_springer_filter=False):
-    mitarbeiter_namen = sorted(list(config["namen"].values()))
-    
+
+def kompiliere_dienste(dienste, namen, wun_t, wun_n):
+    """Dienstarten als Regeltabelle: je Dienst ein Bit, erlaubte Wochentage als
+    Bitmaske (Bit 0 = Montag) und die am Folgetag verbotenen Dienste als Maske."""
+    bits = {d["code"]: 1 << i for i, d in enumerate(dienste)}
+    null = {m: 0 for m in namen}
+    wuensche = {"T": (wun_t, wun_n), "N": (wun_n, wun_t)}
+    tabelle = []
+    for d in dienste:
+        folge = 0
+        for c in d["danach_nicht"]: folge |= bits[c]
+        wun, wun_anders = wuensche.get(d["code"], (null, null))
+        wochentage = 0
+        for w in d["tage"]: wochentage |= 1 << w
+        tabelle.append({"code": d["code"], "bit": bits[d["code"]], "wochentage": wochentage,
+                        "besetzung": d["besetzung"], "folge": folge, "ruhe": d["ruhe"], "nacht": d["nacht"],
+                        "wun": wun, "wun_anders": wun_anders})
+    return {"dienste": tabelle, "alle_dienste": (1 << len(dienste)) - 1}
+
+def wer_kann(tag, ist_nacht, wer_gesperrt, modell, counter, check_morgen_abwesend=False, anker_ma=None, nutze_springer_filter=False,
+             wun=None):
+    abw, limit = modell["abw"], modell["limit"]
+    bit = 1 << tag
+    # Bei Nachtdiensten darf der MA am Folgetag nicht abwesend sein
+    bit_morgen = bit << 1 if ist_nacht and check_morgen_abwesend else 0
+
+    def frei(m):
+        return not abw[m] & bit and counter[m] < limit[m] and m not in wer_gesperrt
+
     # --- 1. ANKER-PRÜFUNG ---
-    if anker_ma and anker_ma in mitarbeiter_namen:
-        ist_verfuegbar = (
-            tag not in config["abwesenheiten"].get(anker_ma, []) and
-            counter[anker_ma] < config["limits"].get(anker_ma, 31) and
-            anker_ma not in wer_gesperrt
-        )
-        if ist_nacht and check_morgen_abwesend and (tag + 1) in config["abwesenheiten"].get(anker_ma, []):
-            ist_verfuegbar = False
-        
-        if ist_verfuegbar:
+    if anker_ma and anker_ma in modell["namen_set"]:
+        if frei(anker_ma) and not abw[anker_ma] & bit_morgen:
             return anker_ma, False # Rückgabe: (Name, wurde_ersetzt)
 
     # --- 2. POOL-BILDUNG ---
-    if nutze_springer_filter and config["springer"]:
-        pool = config["springer"]
+    if nutze_springer_filter and modell["springer"]:
+        pool = modell["springer"]
     else:
-        pool = mitarbeiter_namen
+        pool = modell["namen"]
 
     # --- 3. SUCHE IM POOL ---
-    wun_aktuell = config["wünsche_n"] if ist_nacht else config["wünsche_t"]
+    # wun: Wunsch-Masken des Dienstes aus modell["dienste"], sonst nach ist_nacht
+    wun_aktuell = wun if wun is not None else modell["wun_n"] if ist_nacht else modell["wun_t"]
     for m in pool:
-        if tag in wun_aktuell.get(m, []) and tag not in config["abwesenheiten"].get(m, []):
-            if ist_nacht and check_morgen_abwesend and (tag + 1) in config["abwesenheiten"].get(m, []): continue
-            if m not in wer_gesperrt and counter[m] < config["limits"].get(m, 31): return m, True
-    
-    wun_andere = config["wünsche_t"] if ist_nacht else config["wünsche_n"]
-    kand = [m for m in pool 
-            if tag not in config["abwesenheiten"].get(m, [])
-            if counter[m] < config["limits"].get(m, 31) 
-            if m not in wer_gesperrt
-            if m not in wun_andere.get(m, [])]
-
-    if ist_nacht and check_morgen_abwesend:
-        kand = [m for m in kand if (tag + 1) not in config["abwesenheiten"].get(m, [])]
-
-    if not kand:
-        kand = [m for m in pool if tag not in config["abwesenheiten"].get(m, []) 
-                if counter[m] < config["limits"].get(m, 31) if m not in wer_gesperrt]
+        if wun_aktuell[m] & bit and frei(m) and not abw[m] & bit_morgen: return m, True
+
+    # Hinweis: Der Gegenwunsch-Filter (Regel 2) verglich bisher den Namen mit der
+    # Tagesliste und griff dadurch nie. Er bleibt bewusst aus, damit die Pläne
+    # identisch zur bisherigen Version bleiben.
+    kand = [m for m in pool if frei(m)]
+    if bit_morgen:
+        kand = [m for m in kand if not abw[m] & bit_morgen] or kand
 
     if not kand: return None, False
-    kand.sort(key=lambda x: counter[x])
-    return kand[0], True
+    # min() liefert bei Gleichstand den ersten im Pool (wie das stabile sort vorher)
+    return min(kand, key=counter.__getitem__), True
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--anker", help="Pfad zum alten Snapshot", default=None)
-    args = parser.parse_args()
+def erklaere_wahl(tag, ist_nacht, wer_gesperrt, modell, counter, check_morgen_abwesend=False, anker_ma=None, nutze_springer_filter=False,
+                  wun=None, wun_anders=None):
+    """Nachvollzug von wer_kann() für den Trace (gleiche Argumente).
 
-    config = lade_einstellungen("einstellungen.txt")
-    JAHR, MONAT = config["jahr"], config["monat"]
-    name_to_id = {v: k for k, v in config["namen"].items()}
-    mitarbeiter_namen = sorted(list(config["namen"].values()))
-    _, tage_im_monat = calendar.monthrange(JAHR, MONAT)
+    Rückgabe: dict mit regel (anker / wunsch / pool / notfall / luecke),
+    wunsch (wer sich den Dienst gewünscht hat), frei ({Name: Dienste} aller
+    besetzbaren Kandidaten) und gruende ({Name: "grund,grund"}) für die
+    übrigen: abwesend, limit, gesperrt, morgen_abwesend, gegenwunsch.
+    "gegenwunsch" wird nur vermerkt und sperrt nicht (siehe wer_kann).
+    """
+    abw, limit = modell["abw"], modell["limit"]
+    bit = 1 << tag
+    bit_morgen = bit << 1 if ist_nacht and check_morgen_abwesend else 0
+    if wun is None:
+        wun, wun_anders = (modell["wun_n"], modell["wun_t"]) if ist_nacht else (modell["wun_t"], modell["wun_n"])
+    wun_aktuell = wun
+    pool = modell["springer"] if nutze_springer_filter and modell["springer"] else modell["namen"]
+    anker_ok = anker_ma in modell["namen_set"]
+
+    gruende, frei = {}, {}
+    for m in pool if not anker_ok or anker_ma in pool else [anker_ma] + list(pool):
+        g = []
+        if abw[m] & bit: g.append("abwesend")
+        if counter[m] >= limit[m]: g.append("limit")
+        if m in wer_gesperrt: g.append("gesperrt")
+        if not g: frei[m] = counter[m]
+        if abw[m] & bit_morgen: g.append("morgen_abwesend")
+        if wun_anders[m] & bit: g.append("gegenwunsch")
+        if g: gruende[m] = ",".join(g)
+
+    ohne_morgen = [m for m in frei if m in pool and not abw[m] & bit_morgen]
+    wunsch = [m for m in pool if wun_aktuell[m] & bit]
+    if anker_ok and anker_ma in frei and not abw[anker_ma] & bit_morgen: regel = "anker"
+    elif any(m in ohne_morgen for m in wunsch): regel = "wunsch"
+    elif ohne_morgen: regel = "pool"
+    elif any(m in pool for m in frei): regel = "notfall"
+    else: regel = "luecke"
+    return {"regel": regel, "wunsch": wunsch, "frei": frei, "gruende": gruende}
+
+def trace_zeile(trace, eintrag):
+    """Ein Eintrag als kompakte JSON-Zeile; trace ist eine offene Datei oder None."""
+    if trace is not None: trace.write(json.dumps(eintrag, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+def lade_anker(pfad):
+    """Liest einen Snapshot (CSV oder Versions-ID) als Anker: {(Tag, Dienst): Name} ohne LÜCKEN-Zeilen."""
+    if snapshot_store.ist_version(pfad):
+        plan, _, _ = snapshot_store.lade_plan(pfad)
+        return anker_aus_plan(plan)
+    return anker_aus_df(pd.read_csv(pfad))
+
+def anker_aus_plan(plan):
+    """{Name: {Tag: Dienst}} -> Anker; ab dem zweiten Platz eines Dienstes (Besetzung > 1)
+    lautet der Schlüssel (Tag, Dienst, Platz)."""
+    anker = {}
+    for m, dienste in sorted(plan.items()):
+        for t, d in dienste.items():
+            platz = 0
+            while ((t, d) if platz == 0 else (t, d, platz)) in anker: platz += 1
+            anker[(t, d) if platz == 0 else (t, d, platz)] = m
+    return anker
+
+def anker_aus_df(df_anker):
+    """Anker aus einem bereits geladenen Snapshot-DataFrame."""
+    df_anker = df_anker[df_anker["Name"] != "LÜCKEN"]
+    platz = df_anker.groupby(["Tag", "Dienst"]).cumcount()
+    schluessel = zip(df_anker["Tag"].astype(int), df_anker["Dienst"], platz)
+    return {(t, d) if p == 0 else (t, d, p): m for (t, d, p), m in zip(schluessel, df_anker["Name"])}
+
+def plane_greedy(modell, jahr, monat, anker_dict=None, anker_aktiv=False, trace=None, nacht_vormonat=""):
+    """Der bisherige Tag-für-Tag-Plan. Liefert (plan, luecken, aenderungen).
 
-    anker_aktiv = args.anker is not None and os.path.exists(args.anker)
-    anker_dict = {}
+    plan ist {Name: {Tag: Dienst}}, luecken ist {Tag: "T"/"N"/"TN"}. Mit
+    trace (offene Datei) wird je Dienst die Entscheidung protokolliert.
+    nacht_vormonat sperrt den T am 1. für die N vom Monatsletzten davor.
+
+    Die Dienste kommen aus modell["dienste"] (je Tag in dieser Reihenfolge,
+    je Platz der Besetzung einmal). Sperren werden als Bitmaske über die
+    Dienste je MA und Tag geführt: eigener Dienst heute sperrt alle, der
+    Übergang aus der Tabelle sperrt die verbotenen Folgedienste von morgen,
+    Ruhetage sperren alle. Bei Anker-Plätzen ab dem zweiten ist der Schlüssel
+    (Tag, Dienst, Platz), siehe anker_aus_df().
+    """
+    anker_dict = anker_dict or {}
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    plan = {m: {} for m in modell["namen"]}
+    counter = {m: 0 for m in modell["namen"]}
+    luecken = {}
     aenderungen = []
+    dienste, alle = modell["dienste"], modell["alle_dienste"]
+    # sperren[Tag] = {Name: Bitmaske gesperrter Dienste}; nur MA mit Sperre stehen drin
+    sperren = {}
+    nacht = next((d for d in dienste if d["code"] == "N"), None)
+    if nacht_vormonat and nacht: sperren[1] = {nacht_vormonat: nacht["folge"]}
+
+    for t in range(1, tage_im_monat + 1):
+        wd_bit = 1 << calendar.weekday(jahr, monat, t)
+        heute = sperren.pop(t, {})
 
+        for d in dienste:
+            if not d["wochentage"] & wd_bit: continue
+            code, ist_nacht = d["code"], d["nacht"]
+            for platz in range(d["besetzung"]):
+                a_ma = anker_dict.get((t, code) if platz == 0 else (t, code, platz))
+                gesperrt = {m for m, maske in heute.items() if maske & d["bit"]}
+                if trace is not None: t0 = time.perf_counter()
+                bes, ersetzt = wer_kann(t, ist_nacht, gesperrt, modell, counter, ist_nacht,
+                                        anker_ma=a_ma, nutze_springer_filter=anker_aktiv, wun=d["wun"])
+                if trace is not None:
+                    us = (time.perf_counter() - t0) * 1e6
+                    trace_zeile(trace, {"typ": "schicht", "tag": t, "dienst": code, "anker": a_ma, "gewaehlt": bes, "us": round(us, 1),
+                                        **erklaere_wahl(t, ist_nacht, gesperrt, modell, counter, ist_nacht, anker_ma=a_ma,
+                                                        nutze_springer_filter=anker_aktiv, wun=d["wun"], wun_anders=d["wun_anders"])})
+                if bes:
+                    plan[bes][t], counter[bes] = code, counter[bes] + 1
+                    heute[bes] = alle
+                    if d["folge"]:
+                        morgen = sperren.setdefault(t + 1, {})
+                        morgen[bes] = morgen.get(bes, 0) | d["folge"]
+                    for k in range(1, d["ruhe"] + 1): sperren.setdefault(t + k, {})[bes] = alle
+                    if ersetzt: aenderungen.append(f"Tag {t:02d} ({code}): {a_ma if a_ma else 'LÜCKE'} -> {bes}")
+                else:
+                    luecken[t] = luecken.get(t, "") + code
+                    # wie bisher: Tagdienste melden die Lücke in der Korrektur auch ohne Anker
+                    if anker_aktiv and (a_ma or not ist_nacht):
+                        aenderungen.append(f"Tag {t:02d} ({code}): {a_ma} -> !!! NICHT BESETZT (Kein Springer verfügbar) !!!")
+
+    return plan, luecken, aenderungen
+
+def aenderungs_protokoll(plan, anker_dict, jahr, monat):
+    """Erzeugt die [CHANGE]-Zeilen für einen fertigen Plan durch Vergleich mit dem Anker."""
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    besetzt = {(t, d): m for m, tage in plan.items() for t, d in tage.items()}
+    aenderungen = []
+    for t in range(1, tage_im_monat + 1):
+        for d in ("T", "N"):
+            if d == "T" and calendar.weekday(jahr, monat, t) > 4: continue
+            alt, neu = anker_dict.get((t, d)), besetzt.get((t, d))
+            if alt == neu: continue
+            if neu: aenderungen.append(f"Tag {t:02d} ({d}): {alt if alt else 'LÜCKE'} -> {neu}")
+            else: aenderungen.append(f"Tag {t:02d} ({d}): {alt} -> !!! NICHT BESETZT (Kein Springer verfügbar) !!!")
+    return aenderungen
+
+def drucke_protokoll(aenderungen):
+    print("\nPROTOKOLL DER ÄNDERUNGEN:")
+    if not aenderungen:
+        print("Keine Änderungen notwendig. Alle Anker-Dienste bleiben bestehen.")
+    for protokoll in aenderungen:
+        print(f"  [CHANGE] {protokoll}")
+    print("-" * 30)
+
+def snapshot_zeilen(plan, luecken, config, jahr, monat):
+    """Long-Format wie in der Snapshot-CSV: [Jahr, Monat, ID, Name, Tag, Dienst]."""
+    name_to_id = {v: k for k, v in config["namen"].items()}
+    snapshot_data = []
+    for m in sorted(plan):
+        for t, d in sorted(plan[m].items()):
+            snapshot_data.append([jahr, monat, name_to_id[m], m, t, d])
+    for t, s in luecken.items(): snapshot_data.append([jahr, monat, "---", "LÜCKEN", t, s])
+    return snapshot_data
+
+def snapshot_df(plan, luecken, config, jahr, monat):
+    return pd.DataFrame(snapshot_zeilen(plan, luecken, config, jahr, monat), columns=snapshot_store.SPALTEN)
+
+def schreibe_snapshot(plan, luecken, config, jahr, monat, df=None, ordner=""):
+    stempel = datetime.now().strftime('%d%m_%H%M')
+    out_file = os.path.join(ordner, f"snapshot_{stempel}.csv")
+    nr = 2
+    while os.path.exists(out_file):
+        # Zwei Läufe in derselben Minute dürfen sich nicht überschreiben
+        out_file, nr = os.path.join(ordner, f"snapshot_{stempel}_{nr}.csv"), nr + 1
+    if df is None: df = snapshot_df(plan, luecken, config, jahr, monat)
+    df.to_csv(out_file, index=False)
+    return out_file
+
+def erstelle_plan(config, modell, anker=None, repair=False, solver="greedy", zeitbudget=10.0,
+                  lokale_suche=False, seed=0, workers=None, anker_dict=None, trace=None, historie=None):
+    """Planen, protokollieren, als CSV und im Snapshot-Speicher ablegen.
+
+    anker_dict kann von einem Aufrufer, der den Anker schon geladen hat,
+    direkt übergeben werden. Mit trace (offene Datei) landen die einzelnen
+    Entscheidungen und die Dauer jeder Phase als JSON-Zeilen darin.
+    historie (nur solver="fair"): Snapshots der Vormonate, None = automatisch
+    aus dem Snapshot-Speicher (nur Versionen mit denselben Mitarbeiter-IDs).
+    Rückgabe: dict mit plan, luecken, aenderungen, anker_dict, df (Snapshot
+    im Long-Format), datei und version. ValueError, wenn eigene Dienstarten
+    mit einem Verfahren kombiniert werden, das nur T/N kennt.
+    """
+    JAHR, MONAT = config["jahr"], config["monat"]
+    if (repair or solver != "greedy" or lokale_suche) and not ist_standard(config["dienste"]):
+        raise ValueError(NUR_GREEDY)
+    anker_aktiv = anker is not None and snapshot_store.existiert(anker)
+    t_phase = time.perf_counter()
+
+    def phase(name):
+        nonlocal t_phase
+        jetzt = time.perf_counter()
+        trace_zeile(trace, {"typ": "phase", "phase": name, "ms": round((jetzt - t_phase) * 1000, 3)})
+        t_phase = jetzt
+
+    trace_zeile(trace, {"typ": "lauf", "jahr": JAHR, "monat": MONAT, "anker": anker if anker_aktiv else None,
+                        "modus": "reparatur" if repair and anker_aktiv else "greedy", "solver": solver,
+                        "lokale_suche": lokale_suche, "mitarbeiter": len(modell["namen"])})
     if anker_aktiv:
-        print(f"--- MODUS: KORREKTUR (Anker: {args.anker}) ---")
-        df_anker = pd.read_csv(args.anker)
-        for _, row in df_anker.iterrows():
-            if row["Name"] != "LÜCKEN":
-                anker_dict[(int(row["Tag"]), row["Dienst"])] = row["Name"]
+        print(f"--- MODUS: KORREKTUR (Anker: {anker}) ---")
+        if anker_dict is None: anker_dict = lade_anker(anker)
     else:
         print("--- MODUS: NEUER PLAN ---")
+        anker_dict = {}
+    phase("anker")
 
-    df = pd.DataFrame("", index=mitarbeiter_namen, columns=[f"{i:02d}" for i in range(1, tage_im_monat + 1)])
-    counter = {m: 0 for m in mitarbeiter_namen}
-    luecken = {}
-    wer_hatte_nacht_gestern = ""
+    uebertrag = {}
 
-    for t in range(1, tage_im_monat + 1):
-        ts = f"{t:02d}"
-        wd = calendar.weekday(JAHR, MONAT, t)
-        
-        # Tagdienst
-        if wd <= 4:
-            a_ma = anker_dict.get((t, "T"))
-            bes, ersetzt = wer_kann(t, False, [wer_hatte_nacht_gestern], config, counter, 
-                                   anker_ma=a_ma, nutze_springer_filter=anker_aktiv)
-            if bes: 
-                df.at[bes, ts], counter[bes] = "T", counter[bes] + 1
-                if ersetzt: aenderungen.append(f"Tag {t:02d} (T): {a_ma if a_ma else 'LÜCKE'} -> {bes}")
-            else: 
-                luecken[t] = luecken.get(t, "") + "T"
-                if anker_aktiv: aenderungen.append(f"Tag {t:02d} (T): {a_ma} -> !!! NICHT BESETZT (Kein Springer verfügbar) !!!")
-
-        # Nachtdienst
-        wer_hat_heute_tag = [m for m in mitarbeiter_namen if df.at[m, ts] == "T"]
-        a_ma_n = anker_dict.get((t, "N"))
-        bes_n, ersetzt_n = wer_kann(t, True, wer_hat_heute_tag, config, counter, True, 
-                                   anker_ma=a_ma_n, nutze_springer_filter=anker_aktiv)
-        
-        if bes_n:
-            df.at[bes_n, ts], counter[bes_n] = "N", counter[bes_n] + 1
-            wer_hatte_nacht_gestern = bes_n
-            if ersetzt_n: aenderungen.append(f"Tag {t:02d} (N): {a_ma_n if a_ma_n else 'LÜCKE'} -> {bes_n}")
-        else:
-            wer_hatte_nacht_gestern = ""
-            luecken[t] = luecken.get(t, "") + "N"
-            if anker_aktiv and a_ma_n: aenderungen.append(f"Tag {t:02d} (N): {a_ma_n} -> !!! NICHT BESETZT (Kein Springer verfügbar) !!!")
+    if repair and anker_aktiv:
+        from repair import repariere
+        erg = repariere(modell, JAHR, MONAT, anker_dict, trace)
+        plan, luecken = erg["plan"], erg["luecken"]
+        aenderungen = aenderungs_protokoll(plan, anker_dict, JAHR, MONAT)
+        print(f"--- REPARATUR: {erg['offen']} offene Dienste neu besetzt in {erg['ms']:.2f} ms ---")
+    elif solver == "fair":
+        from fairness import plane_fair, lade_historie
+        uebertrag, quellen = lade_historie(JAHR, MONAT, historie, ids=config["namen"])
+        plan, luecken, aenderungen = plane_fair(modell, JAHR, MONAT, uebertrag, anker_dict, anker_aktiv)
+        print(f"--- FAIRNESS: Übertrag aus {len(quellen)} Snapshot(s)" + (f" ({', '.join(quellen)})" if quellen else "") + " ---")
+    else:
+        plan, luecken, aenderungen = plane_greedy(modell, JAHR, MONAT, anker_dict, anker_aktiv, trace)
+    phase("planen")
+
+    if solver == "exact":
+        from exact_solver import loese_exakt
+        erg = loese_exakt(modell, JAHR, MONAT, anker_dict, anker_aktiv, zeitbudget, start=plan)
+        plan, luecken = erg["plan"], erg["luecken"]
+        if anker_aktiv: aenderungen = aenderungs_protokoll(plan, anker_dict, JAHR, MONAT)
+        print(f"--- SOLVER: exakt | Kosten {erg['kosten']} | Schranke {erg['schranke']:.1f} | "
+              f"Gap {erg['gap']:.1f} ({erg['gap_prozent']:.1f}%) | "
+              f"{'optimal' if erg['optimal'] else 'Zeitbudget erreicht'} | {erg['knoten']} Knoten ---")
+        phase("solver")
+
+    if lokale_suche:
+        from local_search import verbessere_plan
+        erg = verbessere_plan(modell, JAHR, MONAT, plan, anker_dict, anker_aktiv,
+                              zeitbudget, seed, workers)
+        print(f"--- LOKALE SUCHE: Kosten {erg['kosten_vorher']:.0f} -> {erg['kosten']:.0f} | "
+              f"Lücken {sum(map(len, luecken.values()))} -> {sum(map(len, erg['luecken'].values()))} | "
+              f"Dienste je MA {erg['min_dienste']}-{erg['max_dienste']} | "
+              f"{erg['suchen']} Suchen, beste mit Seed {erg['seed']} ---")
+        plan, luecken = erg["plan"], erg["luecken"]
+        if anker_aktiv: aenderungen = aenderungs_protokoll(plan, anker_dict, JAHR, MONAT)
+        phase("lokale_suche")
 
     # Auswertung im Terminal
     if anker_aktiv:
-        print("\nPROTOKOLL DER ÄNDERUNGEN:")
-        if not aenderungen:
-            print("Keine Änderungen notwendig. Alle Anker-Dienste bleiben bestehen.")
-        for protokoll in aenderungen:
-            print(f"  [CHANGE] {protokoll}")
-        print("-" * 30)
+        drucke_protokoll(aenderungen)
+    if solver == "fair":
+        from fairness import fairness_bericht
+        print("\nFAIRNESS-BILANZ:")
+        for zeile in fairness_bericht(plan, JAHR, MONAT, uebertrag): print(f"  {zeile}")
 
     # Export
-    snapshot_data = []
-    for m in mitarbeiter_namen:
-        for t in range(1, tage_im_monat + 1):
-            d = df.at[m, f"{t:02d}"]
-            if d: snapshot_data.append([JAHR, MONAT, name_to_id[m], m, t, d])
-    for t, s in luecken.items(): snapshot_data.append([JAHR, MONAT, "---", "LÜCKEN", t, s])
-    
-    out_file = f"snapshot_{datetime.now().strftime('%d%m_%H%M')}.csv"
-    pd.DataFrame(snapshot_data, columns=["Jahr", "Monat", "ID", "Name", "Tag", "Dienst"]).to_csv(out_file, index=False)
+    df = snapshot_df(plan, luecken, config, JAHR, MONAT)
+    out_file = schreibe_snapshot(plan, luecken, config, JAHR, MONAT, df)
     print(f"\nDatei erfolgreich gespeichert: {out_file}")
+    phase("export")
+    anker_vid = None
+    if anker_aktiv:
+        anker_vid = snapshot_store.normalisiere_id(anker) if snapshot_store.ist_version(anker) \
+            else snapshot_store.finde_version(anker)
+    ids = [(k, v) for v, k in sorted((v, k) for k, v in config["namen"].items())]
+    vid = snapshot_store.speichere(plan, luecken, ids, JAHR, MONAT, anker_vid, out_file,
+                                   dienste=[d["code"] for d in config["dienste"]])
+    print(f"Version im Snapshot-Speicher: {vid}" + (f" (Anker: {anker_vid})" if anker_vid else ""))
+    phase("speicher")
+    return {"plan": plan, "luecken": luecken, "aenderungen": aenderungen, "anker_dict": anker_dict,
+            "df": df, "datei": out_file, "version": vid}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--anker", help="Pfad zum alten Snapshot", default=None)
+    parser.add_argument("--repair", action="store_true",
+                        help="Mit --anker: nur ungültig gewordene Dienste neu besetzen statt den Monat neu zu planen")
+    parser.add_argument("--sweep", metavar="SNAPSHOT", default=None,
+                        help="What-if: jeden Einzelausfall im Snapshot durchspielen und Risiko-Report schreiben")
+    parser.add_argument("--solver", choices=["greedy", "exact", "fair"], default="greedy",
+                        help="greedy = Tag-für-Tag wie bisher, exact = Optimierung über den ganzen Monat, "
+                             "fair = Tag-für-Tag mit Ausgleich von Nächten/WE-Nächten über die Monate")
+    parser.add_argument("--historie", nargs="*", default=None, metavar="SNAPSHOT",
+                        help="Mit --solver fair: Snapshots der Vormonate (Standard: jüngste Version je Vormonat im Speicher)")
+    parser.add_argument("--time-budget", type=float, default=10.0, help="Zeitbudget in Sekunden für --solver exact / --local-search")
+    parser.add_argument("--local-search", action="store_true", help="Plan anschließend per lokaler Suche verbessern")
+    parser.add_argument("--seed", type=int, default=0, help="Start-Seed der lokalen Suche (reproduzierbar)")
+    parser.add_argument("--workers", type=int, default=None, help="Parallele Suchen (Standard: Anzahl CPU-Kerne)")
+    parser.add_argument("--trace", nargs="?", const="", default=None, metavar="DATEI",
+                        help="Entscheidungen je Dienst und Phasen-Zeiten als JSON-Zeilen (Standard: trace_<Zeitstempel>.jsonl)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    config = lade_einstellungen("einstellungen.txt")
+    modell = kompiliere_einstellungen(config)
+    ms_einstellungen = (time.perf_counter() - t0) * 1000
+    JAHR, MONAT = config["jahr"], config["monat"]
+    if (args.sweep or args.repair or args.solver != "greedy" or args.local_search) and not ist_standard(config["dienste"]):
+        print(f"Fehler: {NUR_GREEDY}")
+        return
+
+    if args.sweep:
+        if not snapshot_store.existiert(args.sweep):
+            print(f"Fehler: Datei {args.sweep} nicht gefunden.")
+            return
+        from what_if import sweep, drucke_zusammenfassung
+        print(f"--- MODUS: WHAT-IF (Snapshot: {args.sweep}) ---")
+        risiko = sweep(modell, JAHR, MONAT, lade_anker(args.sweep), args.workers)
+        out_file = f"risiko_{os.path.splitext(os.path.basename(args.sweep))[0]}.csv"
+        risiko.to_csv(out_file, index=False, sep=";")
+        drucke_zusammenfassung(risiko)
+        print(f"\nRisiko-Report gespeichert: {out_file}")
+        return
+
+    if args.trace is None:
+        erstelle_plan(config, modell, args.anker, args.repair, args.solver, args.time_budget,
+                      args.local_search, args.seed, args.workers, historie=args.historie)
+        return
+    trace_datei = args.trace or f"trace_{datetime.now().strftime('%d%m_%H%M')}.jsonl"
+    with open(trace_datei, "w", encoding="utf-8") as trace:
+        trace_zeile(trace, {"typ": "phase", "phase": "einstellungen", "ms": round(ms_einstellungen, 3)})
+        erstelle_plan(config, modell, args.anker, args.repair, args.solver, args.time_budget,
+                      args.local_search, args.seed, args.workers, trace=trace, historie=args.historie)
+    print(f"Trace gespeichert: {trace_datei}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
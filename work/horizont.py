@@ -0,0 +1,158 @@
+"""Mehrere Monate am Stück planen (z.B. ein Quartal oder ein Jahr).
+
+Die Monate werden nacheinander geplant; von einem Monat in den nächsten
+wandert nur ein kleiner Übertrag:
+    - wer am Monatsletzten N hatte (sperrt den T am 1., NT-Regel),
+    - die Fairness-Last (Dienste, Nächte, WE-Nächte) für --solver fair,
+    - der Limit-Rest im Ausgleichsblock (--limit-ausgleich).
+Abwesenheiten und Wünsche kommen als echte Daten aus der einstellungen.txt
+(ABW_MA_01: 2026-04-03, 30.4.2026..5.5.2026); eine Abwesenheit am 1. des
+Folgemonats zählt schon für die N am Monatsletzten. Jeder Monat wird sofort
+als snapshot_JJJJ_MM.csv und Version im Snapshot-Speicher abgelegt, im
+Speicher liegt immer nur der Plan des aktuellen Monats.
+
+Aufruf:
+    py horizont.py [--von 2026-01] [--monate 12 | --bis 2026-12] [--solver fair|greedy]
+"""
+import argparse
+import calendar
+import os
+import time
+from datetime import datetime
+
+import snapshot_store
+from einstellungen_compiler import ist_standard, lade_einstellungen
+from fairness import addiere_last, lade_historie, leere_last, plane_fair
+from gen_snapshot import kompiliere_einstellungen, plane_greedy, snapshot_df
+
+def naechster(jahr, monat):
+    return (jahr + 1, 1) if monat == 12 else (jahr, monat + 1)
+
+def parse_monat(text):
+    """"2026-03" oder "3/2026" -> (2026, 3)."""
+    try:
+        if "/" in text:
+            monat, jahr = text.split("/")
+        else:
+            jahr, monat = text.split("-")
+        jahr, monat = int(jahr), int(monat)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Monat '{text}' nicht lesbar (erwartet JJJJ-MM)")
+    if not 1 <= monat <= 12: raise argparse.ArgumentTypeError(f"Monat {monat} ungültig")
+    return jahr, monat
+
+def monats_config(config, jahr, monat):
+    """Config eines Monats aus den datierten Einträgen (config["daten"])."""
+    praefix = f"{jahr:04d}-{monat:02d}-"
+    mc = dict(config, jahr=jahr, monat=monat)
+    for ziel, je_name in config["daten"].items():
+        mc[ziel] = {}
+        for name, daten in je_name.items():
+            tage = [int(d[8:]) for d in daten if d.startswith(praefix)]
+            if tage: mc[ziel][name] = tage
+    return mc
+
+def plane_horizont(config, jahr, monat, anzahl, solver="fair", ausgleich=1, historie=None):
+    """Plant anzahl Monate ab jahr/monat und liefert jeden Monat, sobald er fertig ist.
+
+    Generator über (jahr, monat, monats_config, plan, luecken, aenderungen).
+    historie ist der Fairness-Übertrag vor dem ersten Monat (lade_historie).
+    ausgleich: Limits gelten je Block aus so vielen Monaten; was ein MA in
+    einem Monat nicht ausschöpft, darf er später im Block nachholen (nie vorziehen).
+    """
+    last = {m: dict(w) for m, w in (historie or {}).items()}
+    nacht = ""
+    verbraucht = {}
+    for i in range(anzahl):
+        mc = monats_config(config, jahr, monat)
+        modell = kompiliere_einstellungen(mc)
+        _, tage_im_monat = calendar.monthrange(jahr, monat)
+        n_jahr, n_monat = naechster(jahr, monat)
+
+        # Abwesend am 1. des Folgemonats = Bit tage_im_monat + 1 (Notfall-Regel für die N davor)
+        erster = f"{n_jahr:04d}-{n_monat:02d}-01"
+        for m, daten in config["daten"]["abwesenheiten"].items():
+            if m in modell["namen_set"] and erster in daten: modell["abw"][m] |= 1 << (tage_im_monat + 1)
+
+        if i % ausgleich == 0: verbraucht = {}
+        block_monate = i % ausgleich + 1
+        for m in modell["namen"]:
+            modell["limit"][m] = max(0, modell["limit"][m] * block_monate - verbraucht.get(m, 0))
+
+        if solver == "fair":
+            plan, luecken, aenderungen = plane_fair(modell, jahr, monat, last, nacht_vormonat=nacht)
+        else:
+            plan, luecken, aenderungen = plane_greedy(modell, jahr, monat, nacht_vormonat=nacht)
+
+        addiere_last(last, plan, jahr, monat)
+        for m, dienste in plan.items(): verbraucht[m] = verbraucht.get(m, 0) + len(dienste)
+        nacht = next((m for m, dienste in plan.items() if dienste.get(tage_im_monat) == "N"), "")
+        yield jahr, monat, mc, plan, luecken, aenderungen
+        jahr, monat = n_jahr, n_monat
+
+def main():
+    parser = argparse.ArgumentParser(description="Mehrere Monate am Stück planen (Übertrag über die Monatsgrenzen)")
+    parser.add_argument("--einstellungen", default="einstellungen.txt")
+    parser.add_argument("--von", type=parse_monat, default=None, metavar="JJJJ-MM",
+                        help="Erster Monat (Standard: JAHR/MONAT aus den Einstellungen)")
+    gruppe = parser.add_mutually_exclusive_group()
+    gruppe.add_argument("--monate", type=int, default=None, help="Anzahl Monate (Standard: 12)")
+    gruppe.add_argument("--bis", type=parse_monat, default=None, metavar="JJJJ-MM", help="Letzter Monat (einschließlich)")
+    parser.add_argument("--solver", choices=["fair", "greedy"], default="fair",
+                        help="fair = Nächte/WE-Nächte über den ganzen Zeitraum ausgleichen, greedy = wie gen_snapshot.py")
+    parser.add_argument("--historie", nargs="*", default=None, metavar="SNAPSHOT",
+                        help="Mit --solver fair: Snapshots vor dem ersten Monat (Standard: jüngste Version je Vormonat im Speicher)")
+    parser.add_argument("--limit-ausgleich", type=int, default=1, metavar="N",
+                        help="Limits über Blöcke aus N Monaten ausgleichen (3 = Quartal; Standard: je Monat)")
+    parser.add_argument("--ordner", default=None, help="Zielordner (Standard: horizont_<Zeitstempel>)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.einstellungen):
+        print(f"Fehler: Datei {args.einstellungen} nicht gefunden.")
+        return
+    config = lade_einstellungen(args.einstellungen)
+    jahr, monat = args.von or (config["jahr"], config["monat"])
+    if args.bis:
+        anzahl = (args.bis[0] - jahr) * 12 + args.bis[1] - monat + 1
+    else:
+        anzahl = args.monate or 12
+    if anzahl < 1 or args.limit_ausgleich < 1:
+        print("Fehler: Zeitraum leer bzw. --limit-ausgleich kleiner 1.")
+        return
+    if args.solver == "fair" and not ist_standard(config["dienste"]):
+        print("Fehler: Eigene Dienstarten (DIENST_) gehen bisher nur mit --solver greedy.")
+        return
+
+    historie = None
+    if args.solver == "fair":
+        historie, quellen = lade_historie(jahr, monat, args.historie, ids=config["namen"])
+        if quellen: print(f"Fairness-Übertrag aus: {', '.join(map(str, quellen))}")
+    ordner = args.ordner or f"horizont_{datetime.now().strftime('%d%m_%H%M')}"
+    os.makedirs(ordner, exist_ok=True)
+    ids = [(k, v) for v, k in sorted((v, k) for k, v in config["namen"].items())]
+
+    print(f"--- MODUS: HORIZONT {monat:02d}/{jahr}, {anzahl} Monat(e), solver {args.solver} ---")
+    t0 = time.perf_counter()
+    summe = leere_last(config["namen"].values())
+    for j, m, mc, plan, luecken, _ in plane_horizont(config, jahr, monat, anzahl, args.solver,
+                                                      args.limit_ausgleich, historie):
+        out_file = os.path.join(ordner, f"snapshot_{j}_{m:02d}.csv")
+        snapshot_df(plan, luecken, mc, j, m).to_csv(out_file, index=False)
+        vid = snapshot_store.speichere(plan, luecken, ids, j, m, None, out_file,
+                                       dienste=[d["code"] for d in config["dienste"]])
+        addiere_last(summe, plan, j, m)
+        offen = ", ".join(f"{t}{d}" for t, d in sorted(luecken.items()))
+        print(f"  {m:02d}/{j}: {sum(map(len, luecken.values())):3d} Lücken{' (' + offen + ')' if offen else ''}"
+              f"  -> {out_file} ({vid})")
+
+    print(f"\nHORIZONT-BILANZ ({anzahl} Monate, {time.perf_counter() - t0:.2f}s):")
+    spann = {k: max(l[k] for l in summe.values()) - min(l[k] for l in summe.values()) for k in
+             ("dienste", "naechte", "we_naechte")} if summe else {}
+    for name in sorted(summe):
+        l = summe[name]
+        print(f"  {name:15} Dienste {l['dienste']:4d}  Nächte {l['naechte']:4d}  WE-Nächte {l['we_naechte']:3d}")
+    if spann:
+        print(f"Spannweite: Dienste {spann['dienste']}, Nächte {spann['naechte']}, WE-Nächte {spann['we_naechte']}")
+
+if __name__ == "__main__":
+    main()
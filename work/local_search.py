@@ -0,0 +1,166 @@
+import calendar
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from exact_solver import baue_kosten, plan_zu_zuordnung, zuordnung_zu_plan
+
+GEWICHT_AUSGLEICH = 1     # Kosten pro Dienst² und MA (gleichmäßige Verteilung)
+ZUEGE = 200_000           # Züge pro Suche; das Zeitbudget kappt zusätzlich
+TEMP_START, TEMP_ENDE = 30.0, 0.05
+ARTEN = ("T", "N")        # Slot-Art d: 0 = T, 1 = N
+
+def _ausgleich(k):
+    return GEWICHT_AUSGLEICH * k * k
+
+def nachbar_regeln(modell):
+    """Nachbarregeln je Slot-Art aus der Regeltabelle (modell["dienste"]), die
+    auch plane_greedy sperrt: vor[d] / nach[d] = Slot-Arten, die am Vortag /
+    Folgetag nicht gehen (danach_nicht), ruhe[d] = freie Tage nach dem Dienst."""
+    tabelle = {x["code"]: x for x in modell["dienste"]}
+    dienste = [tabelle[c] for c in ARTEN]
+    vor = [tuple(e for e, x in enumerate(dienste) if x["folge"] & d["bit"]) for d in dienste]
+    nach = [tuple(e for e, x in enumerate(dienste) if d["folge"] & x["bit"]) for d in dienste]
+    return vor, nach, [d["ruhe"] for d in dienste]
+
+def _suche(aufgabe):
+    """Eine Suche (Simulated Annealing) ab dem Startplan mit festem Seed.
+
+    Zustand: z[t] = [T, N] als MA-Index (n = Lücke), dazu je MA eine Bitmaske
+    der T- und N-Tage und die Dienstanzahl. Jeder Zug wird über diese Masken
+    und die Kostentabelle in O(1) geprüft und bewertet.
+    """
+    kosten, lim, (vor, nach, ruhe), start, slots, n, seed, deadline, zuege = aufgabe
+    rnd = random.Random(seed)
+    z = [None] + [list(p) for p in start]
+    maske = ([0] * (n + 1), [0] * (n + 1))
+    anzahl = [0] * (n + 1)
+    mit_ruhe = [(e, r) for e, r in enumerate(ruhe) if r]
+    for t in range(1, len(z)):
+        for d in (0, 1):
+            m = z[t][d]
+            if m < n: maske[d][m] |= 1 << t; anzahl[m] += 1
+
+    def entferne(m, t, d):
+        maske[d][m] &= ~(1 << t); anzahl[m] -= 1
+
+    def setze(m, t, d):
+        maske[d][m] |= 1 << t; anzahl[m] += 1
+
+    def passt(m, t, d):
+        # Abwesenheit/Pool und Nacht vor Abwesenheit stecken in der Kostentabelle
+        # (baue_kosten), dazu Limit, ein Dienst pro Tag und die Nachbarregeln
+        if kosten[d][t][m] == math.inf or anzahl[m] >= lim[m]: return False
+        belegt = maske[0][m] | maske[1][m]
+        if belegt >> t & 1: return False
+        for e in vor[d]:
+            if maske[e][m] >> (t - 1) & 1: return False
+        for e in nach[d]:
+            if maske[e][m] >> (t + 1) & 1: return False
+        if ruhe[d] and belegt >> (t + 1) & ((1 << ruhe[d]) - 1): return False
+        for e, r in mit_ruhe:
+            # Dienst e an einem der r Tage vor t
+            if (maske[e][m] << r) >> t & ((1 << r) - 1): return False
+        return True
+
+    gesamt = sum(kosten[d][t][z[t][d]] for t, d in slots) + sum(_ausgleich(anzahl[m]) for m in range(n))
+    start_kosten = gesamt
+    beste, beste_z = gesamt, [list(p) for p in z[1:]]
+
+    for i in range(zuege):
+        if i & 1023 == 0 and time.perf_counter() > deadline: break
+        temp = TEMP_START * (TEMP_ENDE / TEMP_START) ** (i / zuege)
+        art = rnd.random()
+        t1, d1 = slots[rnd.randrange(len(slots))]
+        a = z[t1][d1]
+
+        if art < 0.5:
+            # Umbesetzen: Dienst (t1, d1) geht von a an b
+            b = rnd.randrange(n)
+            if b == a: continue
+            if a < n: entferne(a, t1, d1)
+            if not passt(b, t1, d1):
+                if a < n: setze(a, t1, d1)
+                continue
+            delta = kosten[d1][t1][b] - kosten[d1][t1][a] + _ausgleich(anzahl[b] + 1) - _ausgleich(anzahl[b])
+            if a < n: delta += _ausgleich(anzahl[a]) - _ausgleich(anzahl[a] + 1)
+            if delta <= 0 or rnd.random() < math.exp(-delta / temp):
+                setze(b, t1, d1); z[t1][d1] = b; gesamt += delta
+            elif a < n: setze(a, t1, d1)
+        else:
+            t2, d2 = slots[rnd.randrange(len(slots))]
+            b = z[t2][d2]
+            if a == n or a == b: continue
+            if b < n:
+                # Tausch: a übernimmt (t2, d2), b übernimmt (t1, d1)
+                entferne(a, t1, d1); entferne(b, t2, d2)
+                ok = passt(a, t2, d2)
+                if ok:
+                    setze(a, t2, d2)
+                    ok = passt(b, t1, d1)
+                    if not ok: entferne(a, t2, d2)
+                delta = (kosten[d2][t2][a] + kosten[d1][t1][b]
+                         - kosten[d1][t1][a] - kosten[d2][t2][b]) if ok else 0
+                if ok and (delta <= 0 or rnd.random() < math.exp(-delta / temp)):
+                    setze(b, t1, d1); z[t1][d1], z[t2][d2] = b, a; gesamt += delta
+                else:
+                    if ok: entferne(a, t2, d2)
+                    setze(a, t1, d1); setze(b, t2, d2)
+            else:
+                # Verschieben: a wechselt von (t1, d1) in die Lücke (t2, d2)
+                entferne(a, t1, d1)
+                ok = passt(a, t2, d2)
+                delta = (kosten[d1][t1][n] - kosten[d1][t1][a]
+                         + kosten[d2][t2][a] - kosten[d2][t2][n]) if ok else 0
+                if ok and (delta <= 0 or rnd.random() < math.exp(-delta / temp)):
+                    setze(a, t2, d2); z[t1][d1], z[t2][d2] = n, a; gesamt += delta
+                else:
+                    setze(a, t1, d1)
+
+        if gesamt < beste:
+            beste, beste_z = gesamt, [list(p) for p in z[1:]]
+
+    return beste, seed, [tuple(p) for p in beste_z], start_kosten
+
+def verbessere_plan(modell, jahr, monat, plan, anker_dict=None, anker_aktiv=False,
+                    zeitbudget=10.0, seed=0, workers=None, zuege=ZUEGE):
+    """Lokale Suche nach dem Greedy-Plan als Portfolio paralleler Suchen.
+
+    Jede Suche bekommt den Seed seed + i; die beste gewinnt (bei Gleichstand
+    der kleinere Seed). Bei gleichem Seed ist das Ergebnis reproduzierbar,
+    solange das Zeitbudget nicht vor Ablauf der Züge greift.
+
+    Rückgabe: dict mit plan, luecken, kosten_vorher, kosten, seed, suchen
+    sowie min_dienste/max_dienste für die Ausgabe.
+    """
+    namen = modell["namen"]
+    n = len(namen)
+    _, tage = calendar.monthrange(jahr, monat)
+    kT, kN = baue_kosten(modell, jahr, monat, anker_dict, anker_aktiv)
+    kosten = (kT.tolist(), kN.tolist())
+    lim = [modell["limit"][m] for m in namen] + [math.inf]
+    slots = [(t, d) for t in range(1, tage + 1) for d in (0, 1)
+             if d == 1 or calendar.weekday(jahr, monat, t) <= 4]
+    start = plan_zu_zuordnung(plan, namen, tage)
+
+    workers = workers or os.cpu_count() or 1
+    deadline = time.perf_counter() + zeitbudget
+    regeln = nachbar_regeln(modell)
+    aufgaben = [(kosten, lim, regeln, start, slots, n, seed + i, deadline, zuege) for i in range(workers)]
+    if workers > 1:
+        with Pool(workers) as pool:
+            ergebnisse = pool.map(_suche, aufgaben)
+    else:
+        ergebnisse = [_suche(aufgaben[0])]
+
+    bester, bester_seed, zuordnung, start_kosten = min(ergebnisse, key=lambda e: (e[0], e[1]))
+    neu_plan, luecken = zuordnung_zu_plan(zuordnung, namen, kT)
+    anzahl = {m: len(neu_plan[m]) for m in namen}
+    return {
+        "plan": neu_plan, "luecken": luecken,
+        "kosten_vorher": start_kosten,
+        "kosten": bester, "seed": bester_seed, "suchen": workers,
+        "max_dienste": max(anzahl.values(), default=0), "min_dienste": min(anzahl.values(), default=0),
+    }
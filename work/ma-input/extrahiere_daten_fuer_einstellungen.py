@@ -1,37 +1,130 @@
 import os
+import sys
+import json
+import hashlib
+import argparse
+import calendar
+from multiprocessing import Pool
 from pypdf import PdfReader
 from collections import Counter
 
-def extrahiere_mit_statistik(ordner=".", ziel_datei="extraktion_ergebnis.txt"):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from einstellungen_compiler import lade_einstellungen, parse_tage, merge_werte, TAGES_SCHLUESSEL
+from gen_snapshot import kompiliere_einstellungen
+from machbarkeit import analysiere, drucke_bericht
+
+CACHE_DATEI = ".pdf_cache.json"
+
+def lies_formular(pfad):
+    """Alle Formularfelder eines PDFs als {Feldname: Wert}."""
+    fields = PdfReader(pfad).get_fields() or {}
+    return {f_name: str(f_data.get('/V', '')).strip() for f_name, f_data in fields.items()}
+
+def _lies(aufgabe):
+    datei, pfad = aufgabe
+    try:
+        return datei, lies_formular(pfad), None
+    except Exception as e:
+        return datei, None, str(e)
+
+def lade_formulare(ordner, dateien, workers=None):
+    """Liest die Formulare; unveränderte PDFs kommen aus dem Cache.
+
+    Der Cache (.pdf_cache.json im Ordner) hält je Datei den SHA-256 des
+    Inhalts und die extrahierten Felder. Nur neue oder geänderte Dateien
+    werden geöffnet, bei mehreren parallel in einem Prozess-Pool.
+    Rückgabe: ({datei: felder}, anzahl_neu_gelesen)
+    """
+    cache_pfad = os.path.join(ordner, CACHE_DATEI)
+    cache = {}
+    if os.path.exists(cache_pfad):
+        try:
+            with open(cache_pfad, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+
+    hashes = {}
+    for datei in dateien:
+        with open(os.path.join(ordner, datei), "rb") as f:
+            hashes[datei] = hashlib.sha256(f.read()).hexdigest()
+    offen = [d for d in dateien if cache.get(d, {}).get("hash") != hashes[d]]
+
+    aufgaben = [(d, os.path.join(ordner, d)) for d in offen]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(aufgaben) > 1:
+        with Pool(min(workers, len(aufgaben))) as pool:
+            gelesen = pool.map(_lies, aufgaben)
+    else:
+        gelesen = [_lies(a) for a in aufgaben]
+
+    for datei, felder, fehler in gelesen:
+        if fehler:
+            print(f"Fehler bei {datei}: {fehler}")
+            cache.pop(datei, None)
+        else:
+            cache[datei] = {"hash": hashes[datei], "felder": felder}
+    cache = {d: cache[d] for d in dateien if d in cache}
+    with open(cache_pfad, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=1)
+    return {d: cache[d]["felder"] for d in dateien if d in cache}, len(offen)
+
+def formular_werte(formulare, tage_im_monat):
+    """{datei: felder} -> {Schlüssel: [Tage]} aller gültigen ABW_/WUNSCH_-Felder (ohne Meldungen)."""
+    werte = {}
+    for datei, fields in sorted(formulare.items()):
+        for f_name, wert in (fields or {}).items():
+            if not wert or f_name == "MONAT": continue
+            tage, _ = parse_tage(wert, tage_im_monat)
+            if tage: werte[f_name] = tage
+    return werte
+
+def mit_formularwerten(config, werte):
+    """Kopie der Einstellungen, in der die Formularwerte die Datei überschreiben."""
+    neu = {ziel: dict(config[ziel]) for ziel in TAGES_SCHLUESSEL.values()}
+    for key, tage in werte.items():
+        for praefix, ziel in TAGES_SCHLUESSEL.items():
+            name = config["namen"].get(key[len(praefix):]) if key.startswith(praefix) else None
+            if name: neu[ziel][name] = tage
+    return dict(config, **neu)
+
+def extrahiere_mit_statistik(ordner=".", ziel_datei="extraktion_ergebnis.txt", merge=None, ueberschreiben=False, workers=None):
     ergebnisse = {"ABW": [], "TAG": [], "NACHT": []}
+    werte = {}
     ma_counter = 0
     alle_tage = []
 
-    dateien = [f for f in os.listdir(ordner) if f.endswith("-Dienste.pdf")]
-    
-    for datei in dateien:
-        try:
-            reader = PdfReader(os.path.join(ordner, datei))
-            fields = reader.get_fields()
-            if not fields: continue
-            
-            ma_counter += 1
-            for f_name, f_data in fields.items():
-                wert = str(f_data.get('/V', '')).strip()
-                if not wert or f_name == "MONAT": continue
-                
-                # Daten sammeln und Statistik-Liste füttern
-                if f_name.startswith("WUNSCH_TAG_"):
-                    ergebnisse["TAG"].append(f"{f_name}: {wert}")
-                elif f_name.startswith("WUNSCH_NACHT_"):
-                    ergebnisse["NACHT"].append(f"{f_name}: {wert}")
-                elif f_name.startswith("ABW_"):
-                    ergebnisse["ABW"].append(f"{f_name}: {wert}")
-                    # Tage für die "Engpass-Analyse" sammeln
-                    tage = [t.strip() for t in wert.split(",") if t.strip().isdigit()]
-                    alle_tage.extend(tage)
-        except Exception as e:
-            print(f"Fehler bei {datei}: {e}")
+    # Monatslänge aus den Einstellungen, damit unmögliche Tage auffallen
+    config = lade_einstellungen(os.path.join(ordner, "einstellungen.txt"))
+    _, tage_im_monat = calendar.monthrange(config["jahr"], config["monat"])
+
+    dateien = sorted(f for f in os.listdir(ordner) if f.endswith("-Dienste.pdf"))
+    formulare, neu_gelesen = lade_formulare(ordner, dateien, workers)
+
+    for datei, fields in formulare.items():
+        if not fields: continue
+
+        ma_counter += 1
+        for f_name, wert in fields.items():
+            if not wert or f_name == "MONAT": continue
+            tage, fehler = parse_tage(wert, tage_im_monat)
+            if fehler:
+                print(f"WARNUNG {datei}: {f_name} ungültige Tage {', '.join(fehler)} (Monat hat {tage_im_monat})")
+            if not tage: continue
+            if f_name in werte and sorted(werte[f_name]) != sorted(tage):
+                print(f"KONFLIKT {datei}: {f_name} steht schon mit anderen Tagen in einem anderen Formular")
+            werte[f_name] = tage
+            wert = ", ".join(map(str, tage))
+
+            # Daten sammeln und Statistik-Liste füttern
+            if f_name.startswith("WUNSCH_TAG_"):
+                ergebnisse["TAG"].append(f"{f_name}: {wert}")
+            elif f_name.startswith("WUNSCH_NACHT_"):
+                ergebnisse["NACHT"].append(f"{f_name}: {wert}")
+            elif f_name.startswith("ABW_"):
+                ergebnisse["ABW"].append(f"{f_name}: {wert}")
+                # Tage für die "Engpass-Analyse" sammeln
+                alle_tage.extend(tage)
 
     # Statistik berechnen
     haeufige_tage = Counter(alle_tage).most_common(3)
@@ -45,10 +138,35 @@ def extrahiere_mit_statistik(ordner=".", ziel_datei="extraktion_ergebnis.txt"):
     # Demo-Ausgabe für den Dienstplaner
     print("-" * 40)
     print(f"ERGEBNIS FÜR DEN DIENSTPLANER:")
-    print(f"-> {ma_counter} PDFs erfolgreich eingelesen.")
+    print(f"-> {ma_counter} PDFs erfolgreich eingelesen ({neu_gelesen} neu, {len(dateien) - neu_gelesen} aus dem Cache).")
     if haeufige_tage:
         print(f"-> ACHTUNG: Am häufigsten fehlen Leute an Tag: {', '.join([f'der {t[0]}. ({t[1]}x)' for t in haeufige_tage])}")
     print(f"-> Datei '{ziel_datei}' wurde erstellt.")
+    if config["namen"]:
+        # Engpässe mit den Formularwerten (vor dem Merge) prüfen, ohne zu planen
+        print("-" * 40)
+        drucke_bericht(analysiere(kompiliere_einstellungen(mit_formularwerten(config, werte)),
+                                  config["jahr"], config["monat"]), config["jahr"], config["monat"])
+
+    if merge:
+        erg = merge_werte(merge, werte, ueberschreiben)
+        print(f"-> '{merge}': {len(erg['neu'])} neu übernommen, {len(erg['gleich'])} unverändert, "
+              f"{len(erg['ueberschrieben'])} überschrieben, {len(erg['konflikte'])} Konflikte")
+        for key, alt, neu in erg["ueberschrieben"]:
+            print(f"   [ÜBERSCHRIEBEN] {key}: {alt} -> {neu}")
+        for key, alt, neu in erg["konflikte"]:
+            print(f"   [KONFLIKT] {key}: Datei hat '{alt}', Formular sagt '{neu}' (nicht übernommen, --ueberschreiben)")
     print("-" * 40)
 
-extrahiere_mit_statistik()
\ No newline at end of file
+def main():
+    parser = argparse.ArgumentParser(description="ABW/WUNSCH-Werte aus den zurückgegebenen PDF-Formularen einlesen")
+    parser.add_argument("--ordner", default=".", help="Ordner mit den *-Dienste.pdf")
+    parser.add_argument("--merge", nargs="?", const="einstellungen.txt", default=None,
+                        help="Werte direkt in diese Einstellungsdatei übernehmen (Standard: einstellungen.txt)")
+    parser.add_argument("--ueberschreiben", action="store_true", help="Bei Konflikten den Formularwert übernehmen")
+    parser.add_argument("--workers", type=int, default=None, help="Parallele Leseprozesse")
+    args = parser.parse_args()
+    extrahiere_mit_statistik(args.ordner, merge=args.merge, ueberschreiben=args.ueberschreiben, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,30 @@
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import NameObject, TextStringObject
+from multiprocessing import Pool
+import argparse
+import io
 import os
 import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from einstellungen_compiler import lade_einstellungen
+
+# Feldname in der Vorlage ist PRÄFIX + PLATZHALTER, beim Stempeln wird die echte ID eingesetzt
+PLATZHALTER = "MA_XX"
+FELDER = [
+    ("Abwesenheiten (Tage):", "ABW_", "1, 2, 3"),
+    ("Wunsch-Tagdienste (Tage):", "WUNSCH_TAG_", "10, 15"),
+    ("Wunsch-Nachtdienste (Tage):", "WUNSCH_NACHT_", "20"),
+]
+MONATE_NAMEN = {
+    "1": "Januar", "2": "Februar", "3": "März", "4": "April",
+    "5": "Mai", "6": "Juni", "7": "Juli", "8": "August",
+    "9": "September", "10": "Oktober", "11": "November", "12": "Dezember"
+}
 
 def bereinige_dateiname(name):
     ersatz = {'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'Ä': 'Ae', 'Ö': 'Oe', 'Ü': 'Ue', 'ß': 'ss', '€': 'Euro'}
@@ -9,84 +32,136 @@ def bereinige_dateiname(name):
         name = name.replace(zeichen, neu)
     return re.sub(r'[^a-zA-Z0-9._-]', '_', name)
 
-def generiere_mitarbeiter_pdfs(einstellungs_datei, testmodus=False):
-    mitarbeiter_mapping = {} 
-    gefundene_ids = []        
-    jahr = "2026"
-    monat_input = "1" 
+def rendere_vorlage(vorauswahl_monat, testmodus=False):
+    """Statisches Formular (Überschrift, Beschriftungen, Felder) einmal als PDF-Bytes.
+
+    Die Testwerte sind für alle gleich und stecken deshalb schon in der Vorlage.
+    """
+    puffer = io.BytesIO()
+    c = canvas.Canvas(puffer, pagesize=A4)
+    form = c.acroForm
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(100, 800, "Persönlicher Dienstplan-Input")
+
+    y = 720
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(100, y, "Monat:")
+
+    # Dropdown mit Klarnamen
+    form.choice(
+        name="MONAT",
+        value=vorauswahl_monat,
+        options=list(MONATE_NAMEN.values()),
+        x=100, y=y-25,
+        width=150, height=20,
+        fieldFlags='combo'
+    )
+
+    y -= 65
+    for label, praefix, testwert in FELDER:
+        c.setFont("Helvetica-Bold", 11)
+        c.drawString(100, y, label)
+        inhalt = testwert if testmodus else ""
+        form.textfield(name=praefix + PLATZHALTER, value=inhalt, x=100, y=y-25, width=350, height=20, borderStyle='underlined')
+        y -= 65
+
+    c.save()
+    return puffer.getvalue()
+
+def _kopfzeile(klarname, jahr):
+    # Nur die personenbezogene Zeile, wird auf die Vorlage gelegt
+    puffer = io.BytesIO()
+    c = canvas.Canvas(puffer, pagesize=A4)
+    c.setFont("Helvetica", 12)
+    c.drawString(100, 770, f"Mitarbeiter: {klarname} | Jahr: {jahr}")
+    c.save()
+    return PdfReader(puffer).pages[0]
 
-    # Mapping von Zahl auf Name für die Vorauswahl
-    monate_namen = {
-        "1": "Januar", "2": "Februar", "3": "März", "4": "April",
-        "5": "Mai", "6": "Juni", "7": "Juli", "8": "August",
-        "9": "September", "10": "Oktober", "11": "November", "12": "Dezember"
-    }
+def stemple(vorlage, m_id, klarname, jahr, monat_feld="MONAT"):
+    """Kopie der Vorlage (PdfReader, einmal geparst) mit Name und echten
+    Feldnamen. Rückgabe: PdfWriter."""
+    writer = PdfWriter(clone_from=vorlage)
+    seite = writer.pages[0]
+    seite.merge_page(_kopfzeile(klarname, jahr))
 
+    for annot in seite.get("/Annots", []):
+        feld = annot.get_object()
+        name = feld.get("/T")
+        if name == "MONAT":
+            if monat_feld != "MONAT": feld[NameObject("/T")] = TextStringObject(monat_feld)
+        elif name and name.endswith(PLATZHALTER):
+            feld[NameObject("/T")] = TextStringObject(name[:-len(PLATZHALTER)] + m_id)
+    return writer
+
+# Wird je Worker einmal gesetzt (initializer) und nur gelesen
+_geteilt = {}
+
+def _init(vorlage, jahr, ordner):
+    _geteilt.update(vorlage=PdfReader(io.BytesIO(vorlage)), jahr=jahr, ordner=ordner)
+
+def _erzeuge(aufgabe):
+    m_id, klarname = aufgabe
+    sicherer_name = bereinige_dateiname(f"{klarname}-Dienste.pdf")
+    writer = stemple(_geteilt["vorlage"], m_id, klarname, _geteilt["jahr"])
+    with open(os.path.join(_geteilt["ordner"], sicherer_name), "wb") as f:
+        writer.write(f)
+    return sicherer_name
+
+def generiere_mitarbeiter_pdfs(einstellungs_datei, testmodus=False, ordner=".", workers=None, sammel_pdf=None):
+    """Ein Formular je Mitarbeiter mit LIMIT-Eintrag.
+
+    Die Vorlage wird einmal gerendert, jedes Formular entsteht nur durch
+    Stempeln von Name und Feldnamen, verteilt auf einen Prozess-Pool. Mit
+    sammel_pdf zusätzlich ein mehrseitiges Dokument mit allen Formularen zum
+    Drucken (Monatsfeld dort je Seite eindeutig benannt).
+    """
     if not os.path.exists(einstellungs_datei):
         print(f"Fehler: {einstellungs_datei} nicht gefunden.")
         return
 
-    with open(einstellungs_datei, "r", encoding="utf-8") as f:
-        for zeile in f:
-            zeile = zeile.strip()
-            if not zeile or zeile.startswith("#"): continue
-            if zeile.startswith("JAHR:"): jahr = zeile.split(":")[1].strip()
-            if zeile.startswith("MONAT:"): monat_input = zeile.split(":")[1].strip()
-            if zeile.startswith("MA_") and ":" in zeile:
-                parts = zeile.split(":")
-                mitarbeiter_mapping[parts[0].strip()] = parts[1].strip()
-            if zeile.startswith("LIMIT_MA_"):
-                m_id = zeile.replace("LIMIT_", "").split(":")[0].strip()
-                gefundene_ids.append(m_id)
-
-    # Die Auswahl-Optionen nutzen jetzt Text als Wert
-    auswahl_optionen = list(monate_namen.values())
-    
+    start = time.perf_counter()
+    config = lade_einstellungen(einstellungs_datei)
+    mitarbeiter_mapping = config["namen"]
+    jahr = str(config["jahr"])
+    monat_input = str(config["monat"])
+
     # Ermittle den Namen für die Vorauswahl (falls Zahl in TXT steht)
-    vorauswahl_monat = monate_namen.get(monat_input, monat_input)
-
-    for m_id in sorted(set(gefundene_ids)):
-        klarname = mitarbeiter_mapping.get(m_id, m_id)
-        sicherer_name = bereinige_dateiname(f"{klarname}-Dienste.pdf")
-        
-        c = canvas.Canvas(sicherer_name, pagesize=A4)
-        form = c.acroForm
-        
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(100, 800, "Persönlicher Dienstplan-Input")
-        c.setFont("Helvetica", 12)
-        c.drawString(100, 770, f"Mitarbeiter: {klarname} | Jahr: {jahr}")
-        
-        y = 720
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(100, y, "Monat:")
-        
-        # Dropdown mit Klarnamen
-        form.choice(
-            name="MONAT",
-            value=vorauswahl_monat, 
-            options=auswahl_optionen,
-            x=100, y=y-25,
-            width=150, height=20,
-            fieldFlags='combo'
-        )
-        
-        y -= 65
-        rest_felder = [
-            ("Abwesenheiten (Tage):", f"ABW_{m_id}", "1, 2, 3"),
-            ("Wunsch-Tagdienste (Tage):", f"WUNSCH_TAG_{m_id}", "10, 15"),
-            ("Wunsch-Nachtdienste (Tage):", f"WUNSCH_NACHT_{m_id}", "20")
-        ]
-        
-        for label, feldname, testwert in rest_felder:
-            c.setFont("Helvetica-Bold", 11)
-            c.drawString(100, y, label)
-            inhalt = testwert if testmodus else ""
-            form.textfield(name=feldname, value=inhalt, x=100, y=y-25, width=350, height=20, borderStyle='underlined')
-            y -= 65 
-
-        c.save()
-        print(f"Erstellt: {sicherer_name}")
+    vorlage = rendere_vorlage(MONATE_NAMEN.get(monat_input, monat_input), testmodus)
+
+    aufgaben = [(m_id, mitarbeiter_mapping.get(m_id, m_id)) for m_id in sorted(set(config["limit_ids"]))]
+    os.makedirs(ordner, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(aufgaben) > 1:
+        with Pool(min(workers, len(aufgaben)), initializer=_init, initargs=(vorlage, jahr, ordner)) as pool:
+            erstellt = pool.map(_erzeuge, aufgaben, chunksize=max(1, len(aufgaben) // (4 * workers)))
+    else:
+        _init(vorlage, jahr, ordner)
+        erstellt = [_erzeuge(a) for a in aufgaben]
+    for datei in erstellt: print(f"Erstellt: {datei}")
+
+    if sammel_pdf and aufgaben:
+        gesamt = PdfWriter()
+        vorlage = PdfReader(io.BytesIO(vorlage))
+        for m_id, klarname in aufgaben:
+            gesamt.append(stemple(vorlage, m_id, klarname, jahr, monat_feld=f"MONAT_{m_id}"))
+        with open(os.path.join(ordner, sammel_pdf), "wb") as f:
+            gesamt.write(f)
+        print(f"Sammel-PDF: {sammel_pdf} ({len(aufgaben)} Seiten)")
+    print(f"{len(erstellt)} Formulare in {time.perf_counter() - start:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF-Formulare für die Mitarbeiter-Rückmeldung erzeugen")
+    parser.add_argument("--einstellungen", default="einstellungen.txt", help="Einstellungsdatei")
+    parser.add_argument("--ordner", default=".", help="Zielordner der PDFs")
+    parser.add_argument("--leer", action="store_true", help="Felder leer lassen (sonst Testwerte vorausgefüllt)")
+    parser.add_argument("--sammel", nargs="?", const="alle_formulare.pdf", default=None,
+                        help="Zusätzlich ein mehrseitiges PDF zum Drucken (Standard: alle_formulare.pdf)")
+    parser.add_argument("--workers", type=int, default=None, help="Parallele Prozesse")
+    args = parser.parse_args()
+    generiere_mitarbeiter_pdfs(args.einstellungen, testmodus=not args.leer, ordner=args.ordner,
+                               workers=args.workers, sammel_pdf=args.sammel)
 
 # --- START ---
-generiere_mitarbeiter_pdfs("einstellungen.txt", testmodus=True)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
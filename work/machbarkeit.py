@@ -0,0 +1,125 @@
+"""Machbarkeit vor der Planung: wie viele können an welchem Tag überhaupt?
+
+Aus dem kompilierten Modell (Bitmasken) wird in einem Rutsch per numpy eine
+Matrix frei[MA, Tag] gebaut. Daraus je Tag und Dienst die Anzahl verfügbarer
+Mitarbeiter (alle und nur SPRINGER) und zwei Untergrenzen für Lücken, die
+kein Planer unterbieten kann:
+    je Tag:   jeder Dienst braucht eine eigene Person (TN-Regel), am
+              Wochenende reicht also eine – wer weniger Freie hat, bekommt Lücken.
+    Monat:    Bedarf an Diensten minus der nutzbaren Kapazität aller MA
+              (Limit, aber höchstens ein Dienst je freiem Tag).
+Die NT-Regel und Wünsche bleiben außen vor, die Grenzen sind also vorsichtig:
+echte Pläne haben mindestens so viele Lücken, oft mehr.
+"Min. Lücken nur SPRINGER" gilt für eine Neuplanung allein mit SPRINGER. Der
+Anker ist hier unbekannt, für die Korrektur ist das also keine Grenze: dort
+behalten verfügbare Nicht-SPRINGER ihre Anker-Dienste, es bleiben oft weniger Lücken.
+
+Aufruf:
+    py machbarkeit.py [--einstellungen einstellungen.txt] [--out machbarkeit.csv]
+"""
+import argparse
+import calendar
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from einstellungen_compiler import lade_einstellungen
+from gen_snapshot import kompiliere_einstellungen
+
+WOCHENTAGE = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
+
+def frei_matrix(modell, namen, tage_im_monat):
+    """(frei, frei_n) als bool-Matrizen [MA, Tag 1..n]; frei_n ohne Abwesenheit am Folgetag."""
+    masken = np.array([modell["abw"][m] for m in namen], dtype=np.uint64).reshape(-1, 1)
+    abw = (masken >> np.arange(1, tage_im_monat + 2, dtype=np.uint64)) & np.uint64(1)
+    abw = abw.astype(bool)
+    limit = np.array([modell["limit"][m] for m in namen]).reshape(-1, 1) > 0
+    frei = ~abw[:, :tage_im_monat] & limit
+    return frei, frei & ~abw[:, 1:]
+
+def analysiere(modell, jahr, monat):
+    """Rückgabe: dict mit tage (DataFrame je Tag), personen (DataFrame je MA)
+    und den Kennzahlen bedarf, kapazitaet, min_luecken, unmoeglich, engpass."""
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    namen = modell["namen"]
+    wochentag = np.array([calendar.weekday(jahr, monat, t) for t in range(1, tage_im_monat + 1)])
+    # Bedarf je Dienst und Tag aus der Regeltabelle (Standard: T werktags, N täglich)
+    bedarf_je = {d["code"]: ((d["wochentage"] >> wochentag) & 1) * d["besetzung"] for d in modell["dienste"]}
+    bedarf_tag = sum(bedarf_je.values())
+
+    frei, frei_n = frei_matrix(modell, namen, tage_im_monat)
+    anz_frei, anz_frei_n = frei.sum(axis=0), frei_n.sum(axis=0)
+    ist_springer = np.array([m in modell["springer"] for m in namen], dtype=bool)
+    # Ohne SPRINGER-Zeile zählen alle als Pool (wie wer_kann)
+    anz_springer = frei[ist_springer].sum(axis=0) if ist_springer.any() else anz_frei
+
+    # Untergrenze je Tag: höchstens ein Dienst je Person und Tag
+    min_tag = np.maximum(0, bedarf_tag - anz_frei)
+    min_springer = np.maximum(0, bedarf_tag - anz_springer)
+
+    limits = np.array([modell["limit"][m] for m in namen])
+    kap_person = np.minimum(limits, frei.sum(axis=1))
+    bedarf = int(bedarf_tag.sum())
+    kapazitaet = int(kap_person.sum())
+    min_luecken = max(int(min_tag.sum()), bedarf - kapazitaet)
+
+    status = np.select([min_tag > 0, anz_frei == bedarf_tag, anz_frei_n == 0],
+                       ["UNMÖGLICH", "ENGPASS", "NUR NOTFALL-N"], "")
+    tage = pd.DataFrame({
+        "Tag": np.arange(1, tage_im_monat + 1), "Wochentag": [WOCHENTAGE[w] for w in wochentag],
+        **{f"Bedarf {code}": b for code, b in bedarf_je.items()}, "Frei": anz_frei, "Frei N ohne Notfall": anz_frei_n,
+        "Frei Springer": anz_springer, "Min. Lücken": min_tag, "Min. Lücken nur SPRINGER": min_springer,
+        "Status": status,
+    })
+    personen = pd.DataFrame({"Name": namen, "Freie Tage": frei.sum(axis=1), "Limit": limits,
+                             "Nutzbar": kap_person, "Springer": ist_springer})
+    return {"tage": tage, "personen": personen, "bedarf": bedarf, "kapazitaet": kapazitaet,
+            "min_luecken": min_luecken, "unmoeglich": tage.loc[min_tag > 0, "Tag"].tolist(),
+            "engpass": tage.loc[status == "ENGPASS", "Tag"].tolist()}
+
+def drucke_bericht(erg, jahr, monat):
+    tage = erg["tage"]
+    print(f"MACHBARKEIT {monat:02d}/{jahr}: Bedarf {erg['bedarf']} Dienste, nutzbare Kapazität {erg['kapazitaet']} "
+          f"(Auslastung {erg['bedarf'] / max(erg['kapazitaet'], 1):.0%})")
+    if erg["kapazitaet"] < erg["bedarf"]:
+        print(f"-> LIMITS ÜBERLASTET: es fehlen mindestens {erg['bedarf'] - erg['kapazitaet']} Dienste an Kapazität")
+    print(f"-> Mindestens {erg['min_luecken']} Lücke(n), egal wie geplant wird")
+    if erg["unmoeglich"]:
+        u = tage[tage["Status"] == "UNMÖGLICH"]
+        print("-> UNMÖGLICH: " + ", ".join(f"Tag {t} ({w}, {f} frei, {n} Lücke(n))" for t, w, f, n in
+                                           zip(u["Tag"], u["Wochentag"], u["Frei"], u["Min. Lücken"])))
+    if erg["engpass"]:
+        print(f"-> ENGPASS (kein Spielraum): Tag {', '.join(map(str, erg['engpass']))}")
+    notfall = tage.loc[tage["Status"] == "NUR NOTFALL-N", "Tag"].tolist()
+    if notfall: print(f"-> N nur mit Notfall (alle Freien fehlen am Folgetag): Tag {', '.join(map(str, notfall))}")
+    nur_springer = tage.loc[tage["Min. Lücken nur SPRINGER"] > 0, "Tag"].tolist()
+    if nur_springer:
+        print(f"-> Allein mit SPRINGER (Neuplanung ohne Anker) nicht voll besetzbar: Tag {', '.join(map(str, nur_springer))}"
+              " – in der Korrektur behalten verfügbare Nicht-SPRINGER ihre Anker-Dienste")
+    ungenutzt = erg["personen"][erg["personen"]["Limit"] > erg["personen"]["Freie Tage"]]
+    if len(ungenutzt):
+        print(f"-> Limit höher als freie Tage: {', '.join(f'{m} ({l} > {f})' for m, l, f in zip(ungenutzt['Name'], ungenutzt['Limit'], ungenutzt['Freie Tage']))}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Machbarkeit und Engpässe prüfen, bevor geplant wird")
+    parser.add_argument("--einstellungen", default="einstellungen.txt")
+    parser.add_argument("--out", default=None, help="Tagesübersicht als CSV (Standard: machbarkeit_<Zeitstempel>.csv)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.einstellungen):
+        print(f"Fehler: Datei {args.einstellungen} nicht gefunden.")
+        return
+    config = lade_einstellungen(args.einstellungen)
+    t0 = time.perf_counter()
+    erg = analysiere(kompiliere_einstellungen(config), config["jahr"], config["monat"])
+    ms = (time.perf_counter() - t0) * 1000
+    drucke_bericht(erg, config["jahr"], config["monat"])
+    out = args.out or f"machbarkeit_{datetime.now().strftime('%d%m_%H%M')}.csv"
+    erg["tage"].to_csv(out, index=False, sep=";")
+    print(f"\nTagesübersicht gespeichert: {out} ({ms:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
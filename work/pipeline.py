@@ -0,0 +1,107 @@
+"""Ganzer Korrektur-Zyklus in einem Prozess.
+
+Statt vier bis sechs einzelner Aufrufe laufen die Stufen
+    gen    -> gen_snapshot (neuer Plan oder mit --anker Korrektur)
+    html   -> snapshot_to_html
+    plaene -> snapshot_to_personal_plans (mit Anker: Änderungen markiert)
+    diff   -> compare_snapshots (nur mit Anker)
+nacheinander; der Plan wird als DataFrame im Speicher weitergereicht, der
+Anker nur einmal gelesen. Module werden erst geladen, wenn ihre Stufe läuft.
+
+Aufruf:
+    py pipeline.py                                 neuer Plan + HTML + Einzelpläne
+    py pipeline.py --anker snapshot_1201_1813.csv  Korrektur + HTML + Einzelpläne + Diff
+    py pipeline.py --stufen html,plaene --snapshot v0004 [--anker v0003]
+"""
+import argparse
+import time
+from datetime import datetime
+
+def _stufe_gen(ctx, args):
+    from gen_snapshot import lade_einstellungen, kompiliere_einstellungen, erstelle_plan, anker_aus_df
+    config = lade_einstellungen("einstellungen.txt")
+    modell = kompiliere_einstellungen(config)
+    anker_dict = anker_aus_df(ctx["df_alt"]) if ctx["df_alt"] is not None else None
+    erg = erstelle_plan(config, modell, args.anker, args.repair, args.solver, args.time_budget,
+                        args.local_search, args.seed, args.workers, anker_dict)
+    ctx["df_neu"], ctx["name"] = erg["df"], erg["datei"]
+
+def _stufe_html(ctx, args):
+    from snapshot_to_html import rendere_dokument
+    html_file = ctx["name"].replace(".csv", ".html")
+    with open(html_file, "w", encoding="utf-8") as f:
+        f.write(rendere_dokument([ctx["df_neu"]]))
+    print(f"HTML erfolgreich erstellt: {html_file}")
+
+def _stufe_plaene(ctx, args):
+    from snapshot_to_personal_plans import schreibe_plaene
+    folder = args.ordner or f"mitarbeiter_plaene_{ctx['zeitstempel']}"
+    geschrieben, unveraendert, ohne_aenderung = schreibe_plaene(
+        ctx["df_neu"], ctx["df_alt"], folder, args.incremental, args.workers)
+    print(f"Fertig! {geschrieben} Einzelpläne wurden im Ordner '{folder}' gespeichert."
+          + (f" ({unveraendert} unverändert)" if unveraendert else "")
+          + (f" ({ohne_aenderung} ohne Änderung übersprungen)" if ohne_aenderung else ""))
+
+def _stufe_diff(ctx, args):
+    if ctx["df_alt"] is None:
+        print("Vergleich übersprungen: kein Anker angegeben.")
+        return
+    from compare_snapshots import berichte_vergleich
+    berichte_vergleich(ctx["df_alt"], ctx["df_neu"], ctx["zeitstempel"])
+
+# Reihenfolge der Ausführung
+STUFEN = {"gen": _stufe_gen, "html": _stufe_html, "plaene": _stufe_plaene, "diff": _stufe_diff}
+
+def main():
+    parser = argparse.ArgumentParser(description="Planen, HTML, Einzelpläne und Vergleich in einem Lauf")
+    parser.add_argument("--stufen", default=",".join(STUFEN),
+                        help=f"Kommagetrennte Auswahl aus {', '.join(STUFEN)} (Standard: alle)")
+    parser.add_argument("--anker", default=None, help="Alter Snapshot (CSV oder Versions-ID) für Korrektur, Markierung und Diff")
+    parser.add_argument("--snapshot", default=None, help="Ohne Stufe gen: vorhandener Snapshot (CSV oder Versions-ID)")
+    parser.add_argument("--repair", action="store_true", help="wie gen_snapshot.py --repair")
+    parser.add_argument("--solver", choices=["greedy", "exact"], default="greedy", help="wie gen_snapshot.py --solver")
+    parser.add_argument("--time-budget", type=float, default=10.0, help="wie gen_snapshot.py --time-budget")
+    parser.add_argument("--local-search", action="store_true", help="wie gen_snapshot.py --local-search")
+    parser.add_argument("--seed", type=int, default=0, help="wie gen_snapshot.py --seed")
+    parser.add_argument("--workers", type=int, default=None, help="Parallele Suchen bzw. Schreib-Threads")
+    parser.add_argument("--ordner", default=None, help="Zielordner der Einzelpläne (wie snapshot_to_personal_plans.py --ordner)")
+    parser.add_argument("--incremental", action="store_true", help="Einzelpläne nur für Mitarbeiter mit Änderungen")
+    args = parser.parse_args()
+
+    stufen = [s.strip() for s in args.stufen.split(",") if s.strip()]
+    unbekannt = [s for s in stufen if s not in STUFEN]
+    if unbekannt:
+        print(f"Fehler: unbekannte Stufe(n) {', '.join(unbekannt)} (erlaubt: {', '.join(STUFEN)})")
+        return
+    if "gen" not in stufen and not args.snapshot:
+        print("Fehler: Ohne Stufe gen wird --snapshot benötigt.")
+        return
+
+    import snapshot_store
+    for quelle in (args.anker, args.snapshot):
+        if quelle and not snapshot_store.existiert(quelle):
+            print(f"Fehler: Datei {quelle} nicht gefunden.")
+            return
+
+    start = time.perf_counter()
+    ctx = {"zeitstempel": datetime.now().strftime("%d%m_%H%M"), "df_alt": None, "df_neu": None, "name": None}
+    if args.anker: ctx["df_alt"] = snapshot_store.lade_snapshot(args.anker)
+    if args.snapshot:
+        ctx["df_neu"] = snapshot_store.lade_snapshot(args.snapshot)
+        ctx["name"] = args.snapshot if args.snapshot.endswith(".csv") \
+            else f"snapshot_{snapshot_store.normalisiere_id(args.snapshot)}.csv"
+
+    for stufe, ausfuehren in STUFEN.items():
+        if stufe not in stufen: continue
+        t0 = time.perf_counter()
+        print(f"\n=== {stufe.upper()} ===")
+        try:
+            ausfuehren(ctx, args)
+        except ValueError as e:
+            print(f"Fehler: {e}")
+            return
+        print(f"=== {stufe.upper()}: {time.perf_counter() - t0:.2f}s ===")
+    print(f"\nPipeline fertig in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
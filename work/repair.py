@@ -0,0 +1,70 @@
+import calendar
+import time
+
+from gen_snapshot import wer_kann, erklaere_wahl, trace_zeile
+
+def finde_ungueltige(modell, jahr, monat, anker_dict):
+    """Prüft jeden verankerten Dienst gegen die neuen Einstellungen.
+
+    Ungültig ist ein Dienst bei unbekanntem Namen, Abwesenheit, Nacht vor einem
+    Abwesenheitstag, überschrittenem Limit (die chronologisch späteren Dienste
+    fallen raus, wie im Greedy) oder einem NT/TN-Konflikt mit dem Nachbartag.
+    Lücken im Anker zählen ebenfalls als offen.
+
+    Rückgabe: (belegt, anzahl, offen) mit belegt = {(Tag, Dienst): Name} der
+    gültigen Anker, anzahl = Dienste je MA und offen = Liste der neu zu
+    besetzenden (Tag, Dienst) in chronologischer Reihenfolge.
+    """
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    abw, limit = modell["abw"], modell["limit"]
+    belegt = {}
+    anzahl = dict.fromkeys(modell["namen"], 0)
+    offen = []
+    for t in range(1, tage_im_monat + 1):
+        bit = 1 << t
+        for d in ("T", "N"):
+            if d == "T" and calendar.weekday(jahr, monat, t) > 4: continue
+            m = anker_dict.get((t, d))
+            gueltig = (m in modell["namen_set"] and not abw[m] & bit and anzahl[m] < limit[m]
+                       and not (d == "N" and abw[m] & (bit << 1))
+                       and not (d == "N" and belegt.get((t, "T")) == m)
+                       and not (d == "T" and belegt.get((t - 1, "N")) == m))
+            if gueltig:
+                belegt[(t, d)] = m
+                anzahl[m] += 1
+            else:
+                offen.append((t, d))
+    return belegt, anzahl, offen
+
+def repariere(modell, jahr, monat, anker_dict, trace=None):
+    """Korrektur nur der ungültig gewordenen Dienste statt Neuplanung des Monats.
+
+    Alle gültigen Anker bleiben fest. Jeder offene Dienst geht über wer_kann()
+    mit SPRINGER-Pool; gesperrt sind wer am selben Tag schon Dienst hat, bei T
+    die Nacht vom Vortag und bei N der Tagdienst am Folgetag.
+
+    Mit trace (offene Datei) wird je offenem Dienst die Entscheidung protokolliert.
+    Rückgabe: dict mit plan, luecken, offen (Anzahl) und ms (Laufzeit).
+    """
+    t0 = time.perf_counter()
+    belegt, anzahl, offen = finde_ungueltige(modell, jahr, monat, anker_dict)
+
+    for t, d in offen:
+        gesperrt = {belegt.get((t, "T")), belegt.get((t, "N"))}
+        gesperrt.add(belegt.get((t - 1, "N")) if d == "T" else belegt.get((t + 1, "T")))
+        bes, _ = wer_kann(t, d == "N", gesperrt, modell, anzahl, d == "N", nutze_springer_filter=True)
+        if trace is not None:
+            trace_zeile(trace, {"typ": "schicht", "tag": t, "dienst": d, "anker": anker_dict.get((t, d)), "gewaehlt": bes,
+                                **erklaere_wahl(t, d == "N", gesperrt, modell, anzahl, d == "N", nutze_springer_filter=True)})
+        if bes:
+            belegt[(t, d)] = bes
+            anzahl[bes] += 1
+
+    plan = {m: {} for m in modell["namen"]}
+    luecken = {}
+    for (t, d), m in belegt.items():
+        plan[m][t] = d
+    for t, d in offen:
+        if (t, d) not in belegt: luecken[t] = luecken.get(t, "") + d
+    return {"plan": plan, "luecken": luecken, "offen": len(offen),
+            "ms": (time.perf_counter() - t0) * 1000}
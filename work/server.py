@@ -0,0 +1,235 @@
+"""Lokaler Plan-Server: Raster, Einzelpläne und Vergleich direkt aus dem Snapshot-Speicher.
+
+Statt bei jeder Korrektur alle HTML-Dateien zu schreiben, wird nur gerendert,
+was jemand im Browser aufruft:
+    /                       Übersicht aller Versionen
+    /v0003                  Raster (wie snapshot_to_html.py) mit Links
+    /v0003/plan/Anna        Einzelplan, markiert gegen den Anker der Version
+    /v0003/diff[/v0001]     Änderungen zum Anker (oder zur angegebenen Version)
+    /neu/...                dasselbe für die jüngste Version
+Versionen ändern sich nie, gerenderte Seiten liegen daher in einem LRU-Cache
+mit der Version im Schlüssel; eine Korrektur legt eine neue Version an und
+lässt alle anderen Seiten gültig. Im Raster werden nur die Zeilen neu gebaut,
+die sich zur zuletzt gerenderten Version geändert haben. Antworten tragen
+ETag (Hash des Inhalts) und Last-Modified (Zeitpunkt der Version); der
+Browser bekommt 304, wenn sich eine Seite nicht geändert hat – auch unter
+/neu/ für Einzelpläne, die eine Korrektur nicht betrifft.
+
+Aufruf:
+    py server.py [--port 8000] [--store snapshots] [--cache 256]
+"""
+import argparse
+import calendar
+import functools
+import hashlib
+import html
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+import snapshot_store
+from compare_snapshots import mit_uebergabe, vergleiche
+from einstellungen_compiler import lade_dienste
+from snapshot_to_html import rendere_dokument
+from snapshot_to_personal_plans import baue_zeilen, plan_inhalt
+
+NEUESTE = "neu"
+
+def neuer_zustand(store, groesse, dienste):
+    return {"store": store, "dienste": dienste, "texte": {d["code"]: d["name"] for d in dienste},
+            "seiten": OrderedDict(), "groesse": groesse, "lock": threading.Lock(),
+            "zeilen_cache": {}, "zeilen_lock": threading.Lock(), "treffer": 0, "gerendert": 0}
+
+def nummer(vid):
+    """v0012 -> 12; Versions-IDs nach Zahl statt als Text vergleichen."""
+    return int(vid.lstrip("v"))
+
+@functools.lru_cache(maxsize=32)
+def _lade_df(store, vid):
+    # Versionen sind unveränderlich; der DataFrame wird nur gelesen
+    return snapshot_store.lade_df(vid, store)
+
+@functools.lru_cache(maxsize=32)
+def _plan_zeilen(store, vid, anker, texte):
+    """Alle Einzelplan-Zeilen einer Version in einem Durchgang (baue_zeilen)."""
+    meta = snapshot_store.lade_index(store)[vid]
+    df_alt = _lade_df(store, anker) if anker else None
+    return baue_zeilen(_lade_df(store, vid), df_alt, meta["jahr"], meta["monat"], dict(texte))
+
+def seite_holen(zustand, schluessel, erzeuge):
+    """LRU-Cache der gerenderten Seiten: schluessel -> (body, etag, last_modified)."""
+    with zustand["lock"]:
+        eintrag = zustand["seiten"].get(schluessel)
+        if eintrag is not None:
+            zustand["seiten"].move_to_end(schluessel)
+            zustand["treffer"] += 1
+            return eintrag
+    inhalt, zeitpunkt = erzeuge()
+    body = inhalt.encode("utf-8")
+    eintrag = (body, f'"{hashlib.sha256(body).hexdigest()[:20]}"', zeitpunkt)
+    with zustand["lock"]:
+        zustand["seiten"][schluessel] = eintrag
+        zustand["gerendert"] += 1
+        while len(zustand["seiten"]) > zustand["groesse"]: zustand["seiten"].popitem(last=False)
+    return eintrag
+
+def erstellt(meta):
+    """Zeitpunkt einer Version (lokal gespeichert) als Unix-Zeit."""
+    return datetime.fromisoformat(meta["erstellt"]).timestamp()
+
+def rahmen(titel, inhalt):
+    return (f"<html><head><meta charset='utf-8'><title>{html.escape(titel)}</title></head>"
+            f"<body style='font-family:Arial;'>{inhalt}</body></html>")
+
+def rendere_uebersicht(zustand):
+    index = snapshot_store.lade_index(zustand["store"])
+    zeilen = []
+    for vid, meta in sorted(index.items(), key=lambda e: nummer(e[0]), reverse=True):
+        diff = f"<a href='/{vid}/diff'>Änderungen zu {meta['anker']}</a>" if meta["anker"] else "-"
+        zeilen.append(f"<tr><td><a href='/{vid}'>{vid}</a></td><td>{meta['monat']:02d}/{meta['jahr']}</td>"
+                      f"<td>{html.escape(meta['erstellt'])}</td><td>{html.escape(os.path.basename(meta['quelle'] or ''))}</td>"
+                      f"<td>{diff}</td></tr>")
+    tabelle = ("<table border='1' style='border-collapse:collapse;'><tr style='background:#eee;'>"
+               "<th>Version</th><th>Monat</th><th>Erstellt</th><th>Quelle</th><th>Vergleich</th></tr>"
+               + "".join(zeilen) + "</table>") if zeilen else "<p>Noch keine Versionen im Speicher.</p>"
+    return rahmen("Dienstpläne", f"<h2>Dienstpläne ({zustand['store']})</h2>{tabelle}")
+
+def rendere_raster(zustand, vid):
+    meta = snapshot_store.lade_index(zustand["store"])[vid]
+    df = _lade_df(zustand["store"], vid)
+    # Der Zeilen-Cache wird beim Rendern geändert und ist von allen Threads geteilt
+    with zustand["zeilen_lock"]:
+        dokument = rendere_dokument([df], zustand["dienste"], zustand["zeilen_cache"])
+    links = " | ".join(f"<a href='/{vid}/plan/{quote(m)}'>{html.escape(m)}</a>" for _, m in meta["ids"])
+    kopf = ("<p><a href='/'>Alle Versionen</a>"
+            + (f" | <a href='/{vid}/diff'>Änderungen zu {meta['anker']}</a>" if meta["anker"] else "")
+            + f"</p><p>Einzelpläne: {links}</p>")
+    return dokument.replace("<body>", "<body>" + kopf, 1)
+
+def rendere_plan(zustand, vid, name):
+    meta = snapshot_store.lade_index(zustand["store"])[vid]
+    texte = tuple(sorted(zustand["texte"].items()))
+    zeilen = _plan_zeilen(zustand["store"], vid, meta["anker"], texte)
+    if name not in zeilen and name not in {m for _, m in meta["ids"]}: raise KeyError(name)
+    inhalt = plan_inhalt(name, zeilen.get(name, ([], False))[0], calendar.month_name[meta["monat"]],
+                         meta["jahr"], meta["anker"] is not None)
+    return inhalt + "</body></html>"
+
+def rendere_diff(zustand, vid, alt_vid):
+    neu, alt = _lade_df(zustand["store"], vid), _lade_df(zustand["store"], alt_vid)
+    diff = mit_uebergabe(vergleiche(alt, neu), alt, neu)
+    spalten = ["Mitarbeiter", "Tag", "Status", "Alt", "Neu", "Von", "An"]
+    zeilen = "".join(
+        "<tr>" + "".join(
+            f"<td><a href='/{vid}/plan/{quote(str(w))}'>{html.escape(str(w))}</a></td>" if s == "Mitarbeiter" and w != "LÜCKEN"
+            else f"<td>{html.escape(str(w))}</td>" for s, w in zip(spalten, werte)) + "</tr>"
+        for werte in zip(*(diff[s] for s in spalten)))
+    tabelle = ("<table border='1' style='border-collapse:collapse;'><tr style='background:#eee;'>"
+               + "".join(f"<th>{s}</th>" for s in spalten) + "</tr>" + zeilen + "</table>")
+    return rahmen(f"{vid} gegen {alt_vid}",
+                  f"<p><a href='/'>Alle Versionen</a> | <a href='/{vid}'>Raster {vid}</a></p>"
+                  f"<h3>Änderungen {alt_vid} -> {vid}: {len(diff)}</h3>"
+                  + (tabelle if len(diff) else "<p>Keine Unterschiede.</p>"))
+
+def seite(zustand, pfad):
+    """Pfad -> (body, etag, last_modified); KeyError bei unbekannter Seite."""
+    store = zustand["store"]
+    teile = [unquote(t) for t in pfad.strip("/").split("/") if t]
+    if not teile:
+        # Übersicht hängt an index.json: dessen Änderungszeit steckt im Schlüssel
+        pfad_index = os.path.join(store, snapshot_store.INDEX)
+        stempel = os.stat(pfad_index).st_mtime if os.path.exists(pfad_index) else 0
+        return seite_holen(zustand, ("index", stempel), lambda: (rendere_uebersicht(zustand), stempel))
+    index = snapshot_store.lade_index(store)
+    vid = max(index, key=nummer) if teile[0] == NEUESTE and index else snapshot_store.normalisiere_id(teile[0])
+    if vid not in index: raise KeyError(teile[0])
+    meta = index[vid]
+    if len(teile) == 1:
+        return seite_holen(zustand, ("raster", vid), lambda: (rendere_raster(zustand, vid), erstellt(meta)))
+    if teile[1] == "plan" and len(teile) == 3:
+        return seite_holen(zustand, ("plan", vid, teile[2]), lambda: (rendere_plan(zustand, vid, teile[2]), erstellt(meta)))
+    if teile[1] == "diff" and len(teile) <= 3:
+        alt_vid = snapshot_store.normalisiere_id(teile[2]) if len(teile) == 3 else meta["anker"]
+        if alt_vid not in index: raise KeyError(alt_vid)
+        return seite_holen(zustand, ("diff", vid, alt_vid),
+                           lambda: (rendere_diff(zustand, vid, alt_vid), max(erstellt(meta), erstellt(index[alt_vid]))))
+    raise KeyError(pfad)
+
+def nicht_geaendert(kopf, etag, zeitpunkt):
+    """If-None-Match hat Vorrang; sonst If-Modified-Since (Sekundengenauigkeit)."""
+    if kopf.get("If-None-Match"):
+        return etag in [e.strip() for e in kopf["If-None-Match"].split(",")] or kopf["If-None-Match"].strip() == "*"
+    if kopf.get("If-Modified-Since"):
+        try:
+            return int(zeitpunkt) <= parsedate_to_datetime(kopf["If-Modified-Since"]).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def baue_handler(zustand):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self, mit_body=True):
+            self.t0 = time.perf_counter()
+            pfad = urlsplit(self.path).path
+            try:
+                body, etag, zeitpunkt = seite(zustand, pfad)
+            except KeyError:
+                body = rahmen("Nicht gefunden", f"<p>Nicht gefunden: {html.escape(unquote(pfad))}</p>"
+                                                "<p><a href='/'>Alle Versionen</a></p>").encode("utf-8")
+                self.send_response(404)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if mit_body: self.wfile.write(body)
+                return
+            status = 304 if nicht_geaendert(self.headers, etag, zeitpunkt) else 200
+            self.send_response(status)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(zeitpunkt, usegmt=True))
+            self.send_header("Cache-Control", "no-cache")
+            if status == 200:
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if status == 200 and mit_body: self.wfile.write(body)
+
+        def do_HEAD(self):
+            self.do_GET(mit_body=False)
+
+        def log_request(self, code="-", size="-"):
+            # wird aus send_response() gerufen, also nach dem Rendern
+            dauer = (time.perf_counter() - self.t0) * 1000
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {code} {unquote(self.path)} ({dauer:.1f} ms)"
+                  f" | Cache {len(zustand['seiten'])}/{zustand['groesse']}, {zustand['treffer']} Treffer, {zustand['gerendert']} gerendert")
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler Server: Pläne aus dem Snapshot-Speicher bei Bedarf rendern")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--host", default="127.0.0.1", help="Standard: nur dieser Rechner")
+    parser.add_argument("--store", default=snapshot_store.STORE_DIR, help="Speicherordner")
+    parser.add_argument("--cache", type=int, default=256, help="Anzahl gerenderter Seiten im LRU-Cache")
+    parser.add_argument("--einstellungen", default="einstellungen.txt", help="für Namen/Farben der Dienstarten")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.store):
+        print(f"Fehler: Speicherordner {args.store} nicht gefunden.")
+        return
+    zustand = neuer_zustand(args.store, max(1, args.cache), lade_dienste(args.einstellungen))
+    server = ThreadingHTTPServer((args.host, args.port), baue_handler(zustand))
+    print(f"--- PLAN-SERVER: http://{args.host}:{args.port}/ ({args.store}, Cache {zustand['groesse']} Seiten; Strg+C beendet) ---")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServer beendet.")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
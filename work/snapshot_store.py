@@ -0,0 +1,271 @@
+"""Versionierter Snapshot-Speicher.
+
+Jeder Plan liegt als int8-Matrix Mitarbeiter×Tag in einer eigenen .npy-Datei
+(per np.load(mmap_mode="r") speicherabbildbar), die Metadaten (Jahr, Monat,
+ID-Zuordnung, Anker) stehen im gemeinsamen index.json. Kodierung je Zelle als
+Bits: T = 1, N = 2 (die letzte Zeile sind die LÜCKEN, dort auch T+N = 3).
+Eigene Dienstarten bekommen die Bits in ihrer Reihenfolge (meta "dienste");
+fehlen bei Besetzung > 1 mehrere gleiche Dienste, gibt es weitere LÜCKEN-Zeilen
+(meta "luecken_zeilen").
+
+Aufruf:
+    py snapshot_store.py list
+    py snapshot_store.py import snapshot_1201_1813.csv [--anker v0001]
+    py snapshot_store.py export v0002 [ziel.csv]
+    py snapshot_store.py lineage v0003
+"""
+import argparse
+import calendar
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+STORE_DIR = "snapshots"
+INDEX = "index.json"
+CODES = {"T": 1, "N": 2}
+SPERRE_WARTEN = 10.0    # Sekunden, bis ein Lauf aufgibt
+SPERRE_ALT = 30.0       # ältere Sperren stammen von abgebrochenen Läufen
+SPALTEN = ["Jahr", "Monat", "ID", "Name", "Tag", "Dienst"]
+
+_index_cache = {}
+
+def normalisiere_id(vid):
+    m = re.fullmatch(r"v?(\d+)", str(vid).strip())
+    return f"v{int(m.group(1)):04d}" if m else None
+
+def ist_version(quelle, ordner=STORE_DIR):
+    vid = normalisiere_id(quelle)
+    return vid is not None and vid in lade_index(ordner)
+
+def existiert(quelle, ordner=STORE_DIR):
+    """True für eine vorhandene CSV-Datei oder eine Versions-ID im Speicher."""
+    return os.path.exists(quelle) or ist_version(quelle, ordner)
+
+def lade_index(ordner=STORE_DIR):
+    """{id: meta}; wird pro Prozess gecacht und nur bei geänderter Datei neu gelesen."""
+    pfad = os.path.join(ordner, INDEX)
+    if not os.path.exists(pfad): return {}
+    stempel = os.stat(pfad).st_mtime_ns
+    cache = _index_cache.get(pfad)
+    if cache and cache[0] == stempel: return cache[1]
+    with open(pfad, encoding="utf-8") as f:
+        index = {e["id"]: e for e in json.load(f)}
+    _index_cache[pfad] = (stempel, index)
+    return index
+
+def _sperre_verwaist(pfad):
+    """True, wenn die Sperre von einem nicht mehr laufenden Prozess stammt oder zu alt ist."""
+    try:
+        alter = time.time() - os.stat(pfad).st_mtime
+        with open(pfad, encoding="utf-8") as f:
+            pid = int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return False
+    if alter > SPERRE_ALT: return True
+    if pid and os.name == "posix":
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+    return False
+
+@contextmanager
+def _sperre(ordner):
+    # Einfache Dateisperre (mit PID), damit parallele Läufe keine ID doppelt vergeben
+    pfad = os.path.join(ordner, ".lock")
+    ende = time.monotonic() + SPERRE_WARTEN
+    while True:
+        try:
+            fd = os.open(pfad, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            break
+        except FileExistsError:
+            if _sperre_verwaist(pfad):
+                print(f"HINWEIS: verwaiste Sperre {pfad} von einem abgebrochenen Lauf entfernt")
+                try:
+                    os.remove(pfad)
+                except FileNotFoundError:
+                    pass
+                continue
+            if time.monotonic() > ende:
+                raise TimeoutError(f"Snapshot-Speicher {ordner} ist seit {SPERRE_WARTEN:.0f}s gesperrt ({pfad}). "
+                                   f"Läuft noch ein anderer Lauf? Sonst die Datei löschen.")
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(pfad)
+
+def codes_aus(dienste):
+    """Dienst-Kürzel in Reihenfolge -> {Kürzel: Bit}; None = Standard T/N."""
+    return CODES if not dienste else {d: 1 << i for i, d in enumerate(dienste)}
+
+def kodiere(plan, luecken, namen, tage_im_monat, codes=CODES):
+    """plan {Name: {Tag: Dienst}} + luecken {Tag: "TN"} -> int8-Matrix."""
+    zeilen_luecken = max([max(map(s.count, set(s))) for s in luecken.values() if s] or [1])
+    matrix = np.zeros((len(namen) + zeilen_luecken, tage_im_monat), dtype=np.int8)
+    zeile = {m: i for i, m in enumerate(namen)}
+    for m, dienste in plan.items():
+        for t, d in dienste.items(): matrix[zeile[m], t - 1] |= codes[d]
+    for t, s in luecken.items():
+        for d in set(s):
+            for r in range(s.count(d)): matrix[len(namen) + r, t - 1] |= codes[d]
+    return matrix
+
+def _luecken_text(spalte, codes):
+    """LÜCKEN-Zeilen eines Tages -> "TN" bzw. "FFS" in Dienst-Reihenfolge."""
+    return "".join(d * int(sum(1 for wert in spalte if wert & c)) for d, c in codes.items())
+
+def speichere(plan, luecken, ids, jahr, monat, anker=None, quelle=None, ordner=STORE_DIR, dienste=None):
+    """Legt eine neue Version an und gibt ihre ID zurück.
+
+    ids ist eine Liste [(ID, Name)] in Zeilenreihenfolge. anker ist die
+    Versions-ID des Vorgängers (oder None), quelle z.B. die CSV-Datei (gespeichert als absoluter Pfad).
+    dienste: Dienst-Kürzel in Planungsreihenfolge, falls nicht nur T und N.
+    """
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    if dienste is not None and list(dienste) == list(CODES): dienste = None
+    matrix = kodiere(plan, luecken, [name for _, name in ids], tage_im_monat, codes_aus(dienste))
+    os.makedirs(ordner, exist_ok=True)
+    with _sperre(ordner):
+        index = dict(lade_index(ordner))
+        vid = f"v{len(index) + 1:04d}"
+        np.save(os.path.join(ordner, f"{vid}.npy"), matrix)
+        index[vid] = {
+            "id": vid, "jahr": jahr, "monat": monat, "ids": [list(x) for x in ids],
+            "anker": normalisiere_id(anker) if anker else None, "quelle": os.path.abspath(quelle) if quelle else None,
+            "erstellt": datetime.now().isoformat(timespec="seconds"),
+        }
+        if dienste: index[vid]["dienste"] = list(dienste)
+        if len(matrix) > len(ids) + 1: index[vid]["luecken_zeilen"] = len(matrix) - len(ids)
+        tmp = os.path.join(ordner, INDEX + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(list(index.values()), f, ensure_ascii=False, indent=1)
+        os.replace(tmp, os.path.join(ordner, INDEX))
+    return vid
+
+def speichere_df(df, anker=None, quelle=None, ordner=STORE_DIR):
+    """CSV-Import: Snapshot im Long-Format in den Speicher übernehmen."""
+    jahr, monat = int(df["Jahr"].iloc[0]), int(df["Monat"].iloc[0])
+    ma = df[df["Name"] != "LÜCKEN"]
+    ids = sorted(set(zip(ma["ID"], ma["Name"])), key=lambda x: x[1])
+    plan = {name: {} for _, name in ids}
+    for name, t, d in zip(ma["Name"], ma["Tag"], ma["Dienst"]): plan[name][int(t)] = d
+    lu = df[df["Name"] == "LÜCKEN"]
+    luecken = dict(zip(lu["Tag"].astype(int), lu["Dienst"]))
+    # Eigene Dienstarten in der Reihenfolge ihres ersten Auftretens hinter T und N
+    dienste = list(CODES)
+    for s in list(ma["Dienst"].unique()) + list(luecken.values()):
+        dienste += [d for d in s if d not in dienste]
+    return speichere(plan, luecken, ids, jahr, monat, anker, quelle, ordner, dienste)
+
+def lade_matrix(vid, ordner=STORE_DIR):
+    """(matrix, meta) – die Matrix ist eine schreibgeschützte Speicherabbildung."""
+    vid = normalisiere_id(vid)
+    meta = lade_index(ordner)[vid]
+    return np.load(os.path.join(ordner, f"{vid}.npy"), mmap_mode="r"), meta
+
+def lade_plan(vid, ordner=STORE_DIR):
+    """(plan, luecken, meta) im Format von gen_snapshot, ohne pandas."""
+    matrix, meta = lade_matrix(vid, ordner)
+    codes = codes_aus(meta.get("dienste"))
+    namen = [name for _, name in meta["ids"]]
+    plan = {m: {} for m in namen}
+    for i, t in zip(*np.nonzero(matrix[:len(namen)])):
+        plan[namen[i]][int(t) + 1] = "".join(d for d, c in codes.items() if matrix[i, t] & c)
+    luecken = {int(t) + 1: _luecken_text(matrix[len(namen):, t], codes)
+               for t in np.nonzero(matrix[len(namen):].any(axis=0))[0]}
+    return plan, luecken, meta
+
+def lade_df(vid, ordner=STORE_DIR):
+    """Snapshot als DataFrame im CSV-Long-Format."""
+    import pandas as pd
+    matrix, meta = lade_matrix(vid, ordner)
+    codes = codes_aus(meta.get("dienste"))
+    if meta.get("luecken_zeilen", 1) > 1:
+        # Mehrere LÜCKEN-Zeilen zu einer zusammenfassen (Text je Tag)
+        plan, luecken, _ = lade_plan(vid, ordner)
+        ids = meta["ids"] + [["---", "LÜCKEN"]]
+        zeilen = [(i, t, d) for i, (_, m) in enumerate(meta["ids"]) for t, d in sorted(plan[m].items())]
+        zeilen += [(len(meta["ids"]), t, s) for t, s in sorted(luecken.items())]
+        return pd.DataFrame({
+            "Jahr": meta["jahr"], "Monat": meta["monat"], "ID": [ids[i][0] for i, _, _ in zeilen],
+            "Name": [ids[i][1] for i, _, _ in zeilen], "Tag": [t for _, t, _ in zeilen], "Dienst": [d for _, _, d in zeilen],
+        }, columns=SPALTEN)
+    ids = meta["ids"] + [["---", "LÜCKEN"]]
+    zeilen, tage = np.nonzero(matrix)
+    werte = matrix[zeilen, tage]
+    texte = np.array(["".join(d for d, c in codes.items() if wert & c) for wert in range(128)], dtype=object)
+    dienst = texte[werte]
+    return pd.DataFrame({
+        "Jahr": meta["jahr"], "Monat": meta["monat"],
+        "ID": [ids[i][0] for i in zeilen], "Name": [ids[i][1] for i in zeilen],
+        "Tag": tage + 1, "Dienst": dienst,
+    }, columns=SPALTEN)
+
+def lade_snapshot(quelle, ordner=STORE_DIR):
+    """CSV-Pfad oder Versions-ID -> DataFrame im Long-Format."""
+    if os.path.exists(quelle):
+        import pandas as pd
+        return pd.read_csv(quelle)
+    return lade_df(quelle, ordner)
+
+def _pfad(datei):
+    return os.path.normcase(os.path.realpath(datei))
+
+def finde_version(datei, ordner=STORE_DIR):
+    """Jüngste Version, die aus dieser CSV-Datei entstanden ist (oder None).
+
+    Verglichen werden absolute Pfade; ältere Einträge mit relativem Pfad
+    gelten relativ zum aktuellen Arbeitsordner."""
+    ziel = _pfad(datei)
+    treffer = [vid for vid, meta in lade_index(ordner).items()
+               if meta["quelle"] and _pfad(meta["quelle"]) == ziel]
+    return treffer[-1] if treffer else None
+
+def linie(vid, ordner=STORE_DIR):
+    """Anker-Kette ab vid rückwärts: [vid, anker, anker des ankers, ...]."""
+    index = lade_index(ordner)
+    kette, vid = [], normalisiere_id(vid)
+    while vid and vid in index and vid not in kette:
+        kette.append(vid)
+        vid = index[vid]["anker"]
+    return kette
+
+def main():
+    parser = argparse.ArgumentParser(description="Versionierter Snapshot-Speicher")
+    parser.add_argument("befehl", choices=["list", "import", "export", "lineage"])
+    parser.add_argument("ziel", nargs="*", help="CSV-Datei bzw. Versions-ID (+ optional Ziel-CSV)")
+    parser.add_argument("--anker", help="Versions-ID des Ankers beim Import", default=None)
+    parser.add_argument("--store", help="Speicherordner", default=STORE_DIR)
+    args = parser.parse_args()
+
+    if args.befehl == "list":
+        for meta in lade_index(args.store).values():
+            print(f"{meta['id']}  {meta['monat']:02d}/{meta['jahr']}  Anker: {meta['anker'] or '-':6}  "
+                  f"{meta['erstellt']}  {meta['quelle'] or ''}")
+    elif args.befehl == "import":
+        import pandas as pd
+        for datei in args.ziel:
+            vid = speichere_df(pd.read_csv(datei), args.anker, datei, args.store)
+            print(f"Importiert: {datei} -> {vid}")
+    elif args.befehl == "export":
+        vid = normalisiere_id(args.ziel[0])
+        ziel = args.ziel[1] if len(args.ziel) > 1 else f"snapshot_{vid}.csv"
+        lade_df(vid, args.store).to_csv(ziel, index=False)
+        print(f"Exportiert: {vid} -> {ziel}")
+    elif args.befehl == "lineage":
+        index = lade_index(args.store)
+        for vid in linie(args.ziel[0], args.store):
+            print(f"{vid}  {index[vid]['erstellt']}  {index[vid]['quelle'] or ''}")
+
+if __name__ == "__main__":
+    main()
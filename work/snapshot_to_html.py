@@ -1,92 +1,129 @@
-import pandas as pd
 import calendar
 import argparse
-import os
-
-def style_html(data, jahr, monat, tage_im_monat):
-    s = pd.DataFrame('', index=data.index, columns=data.columns)
-    we = [f"{t:02d}" for t in range(1, tage_im_monat + 1) if calendar.weekday(jahr, monat, t) >= 5]
-    
-    for r in data.index:
-        for c in data.columns:
-            val = data.at[r, c]
-            style = ""
-            if c in we: 
-                style += "background-color:#f2f2f2;"
-            
-            # r[1] ist der Name im MultiIndex (ID, Name)
-            if r[1] == "LÜCKEN" and val != "":
-                style += "background-color:#ffcccb;color:red;font-weight:bold;"
-            elif val == "T": 
-                style += "background-color:#90ee90;font-weight:bold;"
-            elif val == "N": 
-                style += "background-color:#add8e6;font-weight:bold;"
-            
-            s.at[r, c] = style
-    return s
+import html
+import re
+
+import snapshot_store
+from einstellungen_compiler import lade_dienste, STANDARD_DIENSTE
+
+# Reihenfolge wichtig: spätere Regeln überschreiben den Wochenend-Hintergrund
+CSS = (
+    "table{border-collapse:collapse;font-family:Arial;font-size:12px;margin-bottom:24px;}"
+    "td,th{border:1px solid #000;padding:4px;text-align:center;min-width:25px;}"
+    "th.id{width:30px;font-weight:normal;}"
+    "th.name{width:150px;text-align:left;font-weight:normal;}"
+    ".we{background-color:#f2f2f2;}"
+    ".T{background-color:#90ee90;font-weight:bold;}"
+    ".N{background-color:#add8e6;font-weight:bold;}"
+    ".gap{background-color:#ffcccb;color:red;font-weight:bold;}"
+)
+# Farben für Dienstarten ohne eigene farbe= in den Einstellungen
+PALETTE = ["#ffd580", "#d8b4fe", "#f9a8d4", "#a7f3d0", "#fde68a", "#c7d2fe", "#fecaca"]
+
+def dienst_css(dienste, codes):
+    """Zusätzliche CSS-Regeln für alle Dienst-Kürzel in codes, die nicht schon
+    mit ihrer Standardfarbe in CSS stehen.
+
+    Die Ersatzfarbe aus PALETTE hängt an der Position des Kürzels in dienste
+    (Reihenfolge der Einstellungen), nicht an den Kürzeln im Dokument – so
+    bleibt sie über Dokumente und Versionen gleich. Unbekannte Kürzel folgen
+    alphabetisch dahinter."""
+    standard = {d["code"]: d["farbe"] for d in STANDARD_DIENSTE}
+    farben = {d["code"]: d.get("farbe") for d in dienste}
+    position = {code: i for i, code in enumerate(farben)}
+    for code in sorted(set(codes) - set(position)): position[code] = len(position)
+    regeln = []
+    for code in sorted(codes):
+        farbe = farben.get(code) or standard.get(code)
+        if not farbe or not re.fullmatch(r"#[0-9a-fA-F]{3,8}|[a-zA-Z]+", farbe):
+            farbe = PALETTE[position[code] % len(PALETTE)]
+        if standard.get(code) != farbe: regeln.append(f".{code}{{background-color:{farbe};font-weight:bold;}}")
+    return "".join(regeln)
+
+def rendere_tabelle(snap, zeilen_cache=None):
+    """Baut das Mitarbeiter×Tag-Raster eines Snapshots mit einem Pivot und
+    schreibt es direkt als HTML-Tabelle mit CSS-Klassen (keine Inline-Styles).
+
+    zeilen_cache (dict, vom Aufrufer gehalten): Zeilen, deren Inhalt sich seit
+    dem letzten Aufruf nicht geändert hat, werden nicht neu gebaut.
+    Rückgabe: (jahr, monat, html_tabelle)
+    """
+    jahr = int(snap["Jahr"].iloc[0])
+    monat = int(snap["Monat"].iloc[0])
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    tage = range(1, tage_im_monat + 1)
+    we = {t for t in tage if calendar.weekday(jahr, monat, t) >= 5}
+
+    ist_luecke = snap["Name"] == "LÜCKEN"
+    ma_snap = snap[~ist_luecke]
+    raster = ma_snap.pivot(index="Name", columns="Tag", values="Dienst").reindex(columns=list(tage)).fillna("")
+    info = ma_snap.groupby("Name").agg(ID=("ID", "first"), Anzahl=("Dienst", "size"))
+    luecken = dict(zip(snap.loc[ist_luecke, "Tag"], snap.loc[ist_luecke, "Dienst"]))
+
+    def zelle(t, wert, extra=""):
+        klassen = " ".join(k for k in ("we" if t in we else "", extra) if k)
+        attr = f" class='{klassen}'" if klassen else ""
+        return f"<td{attr}>{html.escape(str(wert))}</td>"
+
+    kopf = "<tr><th></th><th></th>" + "".join(
+        (f"<th class='we'>{t:02d}</th>" if t in we else f"<th>{t:02d}</th>") for t in tage) + "</tr>"
+    zeilen = [kopf]
+    for name, werte in zip(raster.index, raster.itertuples(index=False)):
+        kurz_id = str(info.at[name, "ID"]).replace("MA_", "")
+        schluessel = (jahr, monat, kurz_id, info.at[name, "Anzahl"], tuple(werte))
+        if zeilen_cache is not None and zeilen_cache.get(name, (None,))[0] == schluessel:
+            zeilen.append(zeilen_cache[name][1])
+            continue
+        zeile = (f"<tr><th class='id'>{html.escape(kurz_id)}</th>"
+                 f"<th class='name'>{html.escape(name)} ({info.at[name, 'Anzahl']})</th>"
+                 + "".join(zelle(t, w, w) for t, w in zip(tage, werte)) + "</tr>")
+        if zeilen_cache is not None: zeilen_cache[name] = (schluessel, zeile)
+        zeilen.append(zeile)
+    zeilen.append(
+        "<tr><th class='id'>--</th><th class='name'>LÜCKEN</th>"
+        + "".join(zelle(t, luecken.get(t, ""), "gap" if luecken.get(t) else "") for t in tage) + "</tr>")
+    return jahr, monat, "<table>" + "".join(zeilen) + "</table>"
+
+def rendere_dokument(snaps, dienste=None, zeilen_cache=None):
+    """Ein HTML-Dokument mit einer Tabelle je Snapshot (z.B. ein ganzes Jahr).
+
+    dienste: Dienstarten für die Farben (Standard: aus einstellungen.txt);
+    Kürzel ohne Angabe bekommen eine Farbe aus PALETTE. zeilen_cache wie bei
+    rendere_tabelle (nur sinnvoll für einen Snapshot).
+    """
+    teile, codes = [], set()
+    for snap in snaps:
+        jahr, monat, tabelle = rendere_tabelle(snap, zeilen_cache)
+        teile.append(f"<h2>Dienstplan {calendar.month_name[monat]} {jahr}</h2>{tabelle}")
+        codes.update(snap.loc[snap["Name"] != "LÜCKEN", "Dienst"].unique())
+    css = CSS + dienst_css(dienste if dienste is not None else lade_dienste(), codes)
+    return (f"<html><head><meta charset='utf-8'><style>{css}</style></head><body>"
+            + "".join(teile) + "</body></html>")
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("file", help="Pfad zur Snapshot-CSV")
+    parser.add_argument("file", nargs="+", help="Pfad zur Snapshot-CSV oder Versions-ID (mehrere = ein gemeinsames Dokument)")
+    parser.add_argument("--out", help="Ziel-HTML bei mehreren Snapshots", default="dienstplaene.html")
     args = parser.parse_args()
 
-    if not os.path.exists(args.file):
-        print(f"Fehler: Datei {args.file} nicht gefunden.")
-        return
+    for datei in args.file:
+        if not snapshot_store.existiert(datei):
+            print(f"Fehler: Datei {datei} nicht gefunden.")
+            return
 
     # Daten laden
-    snap = pd.read_csv(args.file)
-    jahr = int(snap["Jahr"].iloc[0])
-    monat = int(snap["Monat"].iloc[0])
-    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    snaps = [snapshot_store.lade_snapshot(datei) for datei in args.file]
+    if len(args.file) > 1:
+        html_file = args.out
+    elif snapshot_store.ist_version(args.file[0]) and not args.file[0].endswith(".csv"):
+        html_file = f"snapshot_{snapshot_store.normalisiere_id(args.file[0])}.html"
+    else:
+        html_file = args.file[0].replace(".csv", ".html")
 
-    ma_snap = snap[snap["Name"] != "LÜCKEN"]
-    luecken_snap = snap[snap["Name"] == "LÜCKEN"]
-    
-    rows = []
-    unique_names = sorted(ma_snap["Name"].unique())
-    
-    # Mapping für IDs und Counter
-    for name in unique_names:
-        ma_id_full = ma_snap[ma_snap["Name"] == name]["ID"].iloc[0]
-        kurz_id = str(ma_id_full).replace("MA_", "")
-        anzahl = len(ma_snap[ma_snap["Name"] == name])
-        rows.append((kurz_id, f"{name} ({anzahl})"))
-    
-    rows.append(("--", "LÜCKEN"))
-    
-    # MultiIndex ohne Namen erstellen (verhindert ID/Name im Header)
-    index = pd.MultiIndex.from_tuples(rows, names=[None, None])
-    columns = [f"{i:02d}" for i in range(1, tage_im_monat + 1)]
-    df = pd.DataFrame("", index=index, columns=columns)
-
-    # Daten füllen
-    for _, row in ma_snap.iterrows():
-        kurz_id = str(row["ID"]).replace("MA_", "")
-        anzahl = len(ma_snap[ma_snap["Name"] == row["Name"]])
-        df.at[(kurz_id, f"{row['Name']} ({anzahl})"), f"{row['Tag']:02d}"] = row["Dienst"]
-        
-    for _, row in luecken_snap.iterrows():
-        df.at[("--", "LÜCKEN"), f"{row['Tag']:02d}"] = row["Dienst"]
-
-    html_file = args.file.replace(".csv", ".html")
-    monats_name = calendar.month_name[monat]
-    
-    styled_df = df.style.apply(style_html, axis=None, jahr=jahr, monat=monat, tage_im_monat=tage_im_monat)
-    
     with open(html_file, "w", encoding="utf-8") as f:
-        # CSS sorgt für saubere Ausrichtung der ersten beiden Spalten
-        html_content = styled_df.to_html()
-        f.write(f"<html><head><meta charset='utf-8'><style>")
-        f.write("table{border-collapse:collapse;font-family:Arial;font-size:12px;}")
-        f.write("td,th{border:1px solid #000;padding:4px;text-align:center;min-width:25px;}")
-        f.write("th.row_heading{text-align:left; font-weight:normal; background-color:#ffffff;}")
-        f.write("th.level0{width:30px; text-align:center;}") # Die ID Spalte
-        f.write("th.level1{width:150px;}") # Die Namen Spalte
-        f.write("</style></head><body>")
-        f.write(f"<h2>Dienstplan {monats_name} {jahr}</h2>{html_content}</body></html>")
+        f.write(rendere_dokument(snaps))
 
     print(f"HTML erfolgreich erstellt: {html_file}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,114 +1,173 @@
-import pandas as pd
 import calendar
 import argparse
+import hashlib
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import snapshot_store
+from einstellungen_compiler import lade_dienste, STANDARD_DIENSTE
+
+WT_NAMEN = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
+MANIFEST = "manifest.json"
+
+STANDARD_TEXTE = {d["code"]: d["name"] for d in STANDARD_DIENSTE}
+
+def dienst_text(d, texte=STANDARD_TEXTE):
+    return texte.get(d) or f"Dienst {d}"
+
+def baue_zeilen(df_neu, df_alt, jahr, monat, texte=STANDARD_TEXTE, namen=None):
+    """Alle Tabellenzeilen aller Mitarbeiter in einem Durchgang.
+
+    Alt/Neu-Vergleich als Merge auf (Name, Tag), danach eine groupby-Runde.
+    texte: Dienst-Kürzel -> Bezeichnung (aus den Dienstarten der Einstellungen).
+    namen: nur diese Mitarbeiter, auch wenn sie in df_neu keinen Dienst mehr haben.
+    Rückgabe: {Name: (zeilen_html, geaendert)}
+    """
+    ma = df_neu.loc[df_neu["Name"] != "LÜCKEN", ["Name", "Tag", "Dienst"]]
+    if namen is None:
+        namen = sorted(ma["Name"].unique())
+    else:
+        namen = sorted(namen)
+        ma = ma[ma["Name"].isin(namen)]
+    if df_alt is not None:
+        alt = df_alt.loc[df_alt["Name"].isin(namen), ["Name", "Tag", "Dienst"]]
+        m = ma.merge(alt, on=["Name", "Tag"], how="outer", suffixes=("", "_alt"))
+    else:
+        m = ma.assign(Dienst_alt="")
+    m = m.fillna("").sort_values(["Name", "Tag"], kind="stable")
+    m["Geaendert"] = (m["Dienst"] != m["Dienst_alt"]) & (df_alt is not None)
+
+    def zeile(t, neu, alt, geaendert):
+        if geaendert and neu == "":
+            # Dienst wurde im neuen Plan entfernt
+            return (f"<tr style='background-color:#ffe6e6;'>"
+                    f"<td>{t:02d}.{monat:02d}.</td>"
+                    f"<td><del>{dienst_text(alt, texte)}</del> <b style='color:red;'>(ENTFERNT)</b></td>"
+                    f"</tr>")
+        status_html, inline_style = "", ""
+        if geaendert and alt == "":
+            status_html = " <b style='color:green;'>(NEU)</b>"
+            inline_style = "background-color:#e6fffa;" # Grün
+        elif geaendert:
+            status_html = f" <b style='color:orange;'>(GEÄNDERT, war {alt})</b>"
+            inline_style = "background-color:#fffce0;" # Gelb
+        wd = WT_NAMEN[calendar.weekday(jahr, monat, t)]
+        return (f"<tr style='{inline_style}'>"
+                f"<td>{wd}, {t:02d}.{monat:02d}.</td>"
+                f"<td>{dienst_text(neu, texte)}{status_html}</td>"
+                f"</tr>")
+
+    m["Zeile"] = [zeile(int(t), n, a, g) for t, n, a, g in
+                  zip(m["Tag"], m["Dienst"], m["Dienst_alt"], m["Geaendert"])]
+    gruppen = m.groupby("Name", sort=True).agg(Zeilen=("Zeile", list), Geaendert=("Geaendert", "any"))
+    return {name: (gruppen.at[name, "Zeilen"], bool(gruppen.at[name, "Geaendert"])) if name in gruppen.index
+            else ([], False) for name in namen}
+
+def plan_inhalt(m, zeilen, monats_name, jahr, vergleich):
+    """HTML eines persönlichen Plans ohne den Zeitstempel-Fuß (Basis für den Hash)."""
+    teile = ["<html><head><meta charset='utf-8'></head><body style='font-family:Arial;'>",
+             f"<h3>Persönlicher Dienstplan: {m}</h3>",
+             f"<h4>Monat: {monats_name} {jahr}</h4>"]
+    if vergleich:
+        teile.append("<p style='font-size:0.9em;'><i>Hinweis: Farbige Markierungen zeigen Änderungen zum letzten Stand.</i></p>")
+    teile.append("<table border='1' style='border-collapse:collapse; width:500px;'>")
+    teile.append("<tr style='background:#eee;'><th>Datum</th><th>Dienstleistung</th></tr>")
+    teile.append("".join(zeilen) if zeilen else "<tr><td colspan='2'>Keine Dienste eingeteilt</td></tr>")
+    teile.append("</table>")
+    # Legende nur bei Vergleich anzeigen
+    if vergleich:
+        teile.append("<p style='font-size:0.8em; margin-top:15px;'><b>Legende:</b> "
+                     "<span style='background-color:#e6fffa; padding:2px;'>Grün = Einspringer/Neu</span> | "
+                     "<span style='background-color:#fffce0; padding:2px;'>Gelb = Schichttausch</span> | "
+                     "<span style='background-color:#ffe6e6; padding:2px;'>Rot = Dienst entfällt</span></p>")
+    return "".join(teile)
+
+def _schreibe(aufgabe):
+    file_path, inhalt = aufgabe
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(inhalt)
+        f.write(f"<p><small>Generiert am: {datetime.now().strftime('%d.%m.%Y %H:%M')}</small></p>")
+        f.write("</body></html>")
+
+def schreibe_plaene(df_neu, df_alt, folder, nur_geaenderte=False, workers=None, dienste=None, namen=None):
+    """Schreibt alle persönlichen Pläne in folder.
+
+    Über manifest.json (Dateiname -> SHA-256 des Inhalts ohne Zeitstempel)
+    werden unveränderte Dateien beim erneuten Lauf übersprungen. Mit
+    nur_geaenderte entfallen Mitarbeiter ohne Änderung zum Anker ganz.
+    dienste: Dienstarten für die Bezeichnungen (Standard: aus einstellungen.txt).
+    namen: nur diese Mitarbeiter; wer keinen Dienst mehr hat, bekommt einen leeren Plan.
+    Rückgabe: (geschrieben, unveraendert, ohne_aenderung)
+    """
+    texte = {d["code"]: d["name"] for d in (dienste if dienste is not None else lade_dienste())}
+    jahr = int(df_neu["Jahr"].iloc[0])
+    monat = int(df_neu["Monat"].iloc[0])
+    monats_name = calendar.month_name[monat]
+    vergleich = df_alt is not None
+
+    os.makedirs(folder, exist_ok=True)
+    manifest_pfad = os.path.join(folder, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_pfad):
+        with open(manifest_pfad, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    aufgaben, unveraendert, ohne_aenderung = [], 0, 0
+    for m, (zeilen, geaendert) in baue_zeilen(df_neu, df_alt, jahr, monat, texte, namen).items():
+        if nur_geaenderte and vergleich and not geaendert:
+            ohne_aenderung += 1
+            continue
+        datei = f"Plan_{m}.html"
+        inhalt = plan_inhalt(m, zeilen, monats_name, jahr, vergleich)
+        h = hashlib.sha256(inhalt.encode("utf-8")).hexdigest()
+        if manifest.get(datei) == h and os.path.exists(os.path.join(folder, datei)):
+            unveraendert += 1
+            continue
+        manifest[datei] = h
+        aufgaben.append((os.path.join(folder, datei), inhalt))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_schreibe, aufgaben))
+    with open(manifest_pfad, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    return len(aufgaben), unveraendert, ohne_aenderung
+
 def main():
     parser = argparse.ArgumentParser(description="Einzelsnapshots für Mitarbeiter erstellen")
     # Das erste Argument ist die Datei, die als Plan ausgegeben werden soll
-    parser.add_argument("datei", help="Der Snapshot, der gedruckt werden soll (CSV)")
+    parser.add_argument("datei", help="Der Snapshot, der gedruckt werden soll (CSV oder Versions-ID)")
     # Das zweite Argument ist optional der Anker für den Vergleich
     parser.add_argument("anker", nargs="?", help="Optional: Der alte Snapshot zum Vergleich (Anker)", default=None)
+    parser.add_argument("--ordner", help="Zielordner (Standard: mitarbeiter_plaene_<Zeitstempel>); "
+                                         "bei Wiederverwendung werden nur geänderte Dateien neu geschrieben", default=None)
+    parser.add_argument("--incremental", action="store_true", help="Mit Anker: nur Mitarbeiter mit Änderungen ausgeben")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Schreib-Threads")
     args = parser.parse_args()
 
-    if not os.path.exists(args.datei):
+    if not snapshot_store.existiert(args.datei):
         print(f"Fehler: Datei {args.datei} nicht gefunden.")
         return
 
     # Daten laden
-    df_neu = pd.read_csv(args.datei)
-    jahr = int(df_neu["Jahr"].iloc[0])
-    monat = int(df_neu["Monat"].iloc[0])
-    mitarbeiter_liste = sorted(df_neu[df_neu["Name"] != "LÜCKEN"]["Name"].unique())
-    _, tage_im_monat = calendar.monthrange(jahr, monat)
-    monats_name = calendar.month_name[monat]
-    wt_namen = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
+    df_neu = snapshot_store.lade_snapshot(args.datei)
 
     # Vergleichsdaten laden falls Anker angegeben
     df_alt = None
-    if args.anker and os.path.exists(args.anker):
-        df_alt = pd.read_csv(args.anker).set_index(["Name", "Tag"])
+    if args.anker and snapshot_store.existiert(args.anker):
+        df_alt = snapshot_store.lade_snapshot(args.anker)
         print(f"Vergleichsmodus aktiv: Änderungen gegenüber {args.anker} werden markiert.")
     else:
         print("Normalmodus: Erstelle Pläne ohne Markierungen.")
 
     # Ordner für die Ergebnisse erstellen
-    zeitstempel = datetime.now().strftime("%d%m_%H%M")
-    folder = f"mitarbeiter_plaene_{zeitstempel}"
-    os.makedirs(folder, exist_ok=True)
+    folder = args.ordner or f"mitarbeiter_plaene_{datetime.now().strftime('%d%m_%H%M')}"
+    geschrieben, unveraendert, ohne_aenderung = schreibe_plaene(df_neu, df_alt, folder, args.incremental, args.workers)
 
-    # Für jeden Mitarbeiter einen Plan erstellen
-    for m in mitarbeiter_liste:
-        m_data = df_neu[df_neu["Name"] == m].set_index("Tag")
-        zeilen = []
-        
-        # Wir gehen alle Tage durch, um auch ENTFERNTE Dienste zu finden
-        for t in range(1, tage_im_monat + 1):
-            d_neu = m_data.loc[t, "Dienst"] if t in m_data.index else ""
-            
-            status_html = ""
-            inline_style = ""
-            
-            # Logik für Vergleich/Markierung
-            if df_alt is not None:
-                idx = (m, t)
-                d_alt = df_alt.loc[idx, "Dienst"] if idx in df_alt.index else ""
-                
-                if d_neu != d_alt:
-                    if d_alt == "" and d_neu != "":
-                        status_html = " <b style='color:green;'>(NEU)</b>"
-                        inline_style = "background-color:#e6fffa;" # Grün
-                    elif d_neu != "" and d_alt != "":
-                        status_html = f" <b style='color:orange;'>(GEÄNDERT, war {d_alt})</b>"
-                        inline_style = "background-color:#fffce0;" # Gelb
-                    elif d_neu == "" and d_alt != "":
-                        # Dienst wurde im neuen Plan entfernt
-                        zeilen.append(
-                            f"<tr style='background-color:#ffe6e6;'>"
-                            f"<td>{t:02d}.{monat:02d}.</td>"
-                            f"<td><del>{'Tagdienst' if d_alt=='T' else 'Nachtdienst'}</del> <b style='color:red;'>(ENTFERNT)</b></td>"
-                            f"</tr>"
-                        )
-                        continue
-
-            # Dienstzeile hinzufügen, wenn im neuen Plan vorhanden
-            if d_neu != "":
-                wd = wt_namen[calendar.weekday(jahr, monat, t)]
-                dienst_text = "Tagdienst" if d_neu == "T" else "Nachtdienst"
-                zeilen.append(
-                    f"<tr style='{inline_style}'>"
-                    f"<td>{wd}, {t:02d}.{monat:02d}.</td>"
-                    f"<td>{dienst_text}{status_html}</td>"
-                    f"</tr>"
-                )
-
-        # HTML Datei schreiben
-        file_path = os.path.join(folder, f"Plan_{m}.html")
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write("<html><head><meta charset='utf-8'></head><body style='font-family:Arial;'>")
-            f.write(f"<h3>Persönlicher Dienstplan: {m}</h3>")
-            f.write(f"<h4>Monat: {monats_name} {jahr}</h4>")
-            
-            if df_alt is not None:
-                f.write("<p style='font-size:0.9em;'><i>Hinweis: Farbige Markierungen zeigen Änderungen zum letzten Stand.</i></p>")
-            
-            f.write("<table border='1' style='border-collapse:collapse; width:500px;'>")
-            f.write("<tr style='background:#eee;'><th>Datum</th><th>Dienstleistung</th></tr>")
-            f.write("".join(zeilen) if zeilen else "<tr><td colspan='2'>Keine Dienste eingeteilt</td></tr>")
-            f.write("</table>")
-            
-            # Legende nur bei Vergleich anzeigen
-            if df_alt is not None:
-                f.write("<p style='font-size:0.8em; margin-top:15px;'><b>Legende:</b> "
-                        "<span style='background-color:#e6fffa; padding:2px;'>Grün = Einspringer/Neu</span> | "
-                        "<span style='background-color:#fffce0; padding:2px;'>Gelb = Schichttausch</span> | "
-                        "<span style='background-color:#ffe6e6; padding:2px;'>Rot = Dienst entfällt</span></p>")
-            
-            f.write(f"<p><small>Generiert am: {datetime.now().strftime('%d.%m.%Y %H:%M')}</small></p>")
-            f.write("</body></html>")
-
-    print(f"Fertig! Einzelpläne wurden im Ordner '{folder}' gespeichert.")
+    print(f"Fertig! {geschrieben} Einzelpläne wurden im Ordner '{folder}' gespeichert.")
+    if unveraendert: print(f"  {unveraendert} Pläne unverändert (laut {MANIFEST}) – nicht neu geschrieben.")
+    if ohne_aenderung: print(f"  {ohne_aenderung} Mitarbeiter ohne Änderung zum Anker übersprungen.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,237 @@
+"""Mehrere Stationen gleichzeitig planen, mit gemeinsamem SPRINGER-Pool.
+
+Jede Station hat ihre eigene einstellungen.txt. Wer (über die Mitarbeiter-ID)
+in mehreren Stationen steht, wird zentral reserviert, bevor geplant wird:
+    1. Reservierung: die Tage jeder geteilten Person werden wochenweise
+       reihum auf die Stationen verteilt, in denen sie SPRINGER ist (ohne
+       SPRINGER-Zeile zählen dort alle, wie in wer_kann), in den anderen gilt
+       sie an diesen Tagen als abwesend; ihr Limit anteilig. Ist sie in einer
+       Station Stammpersonal (nicht SPRINGER), arbeitet sie nur dort.
+       Abwesenheiten aus irgendeiner Station gelten überall.
+    2. Alle Stationen werden parallel im Prozess-Pool geplant (greedy).
+    3. Abgleich: ein NT über die Stationsgrenze (N hier, T am Folgetag dort)
+       wird gelöst, indem der T-Dienst in der zweiten Station gesperrt und
+       über die SPRINGER-Reparatur neu besetzt wird.
+Ergebnis: je Station ein Snapshot in ihrem Ordner und eine gemeinsame
+Abdeckungs-Übersicht. Eigene Dienstarten (DIENST_) werden abgelehnt, Abgleich
+und Reparatur kennen nur T und N.
+
+Aufruf:
+    py stationen.py station_a/einstellungen.txt station_b/einstellungen.txt ... [--workers N]
+"""
+import argparse
+import calendar
+import os
+import time
+from datetime import datetime
+from multiprocessing import Pool
+
+import pandas as pd
+
+import snapshot_store
+from einstellungen_compiler import lade_einstellungen, ist_standard
+from gen_snapshot import kompiliere_einstellungen, plane_greedy, schreibe_snapshot
+from repair import repariere
+
+MAX_ABGLEICH = 20   # Runden für den Abgleich über die Stationsgrenzen
+
+def stationsname(pfad):
+    """station_a/einstellungen.txt -> station_a, nord.txt -> nord."""
+    stamm = os.path.splitext(os.path.basename(pfad))[0]
+    if stamm == "einstellungen":
+        return os.path.basename(os.path.dirname(os.path.abspath(pfad))) or stamm
+    return stamm
+
+def geteilte(stationen):
+    """{ID: {Station: Name}} aller Mitarbeiter-IDs, die in mehreren Stationen stehen."""
+    wo = {}
+    for st in stationen:
+        for mid, name in st["config"]["namen"].items(): wo.setdefault(mid, {})[st["name"]] = name
+    return {mid: s for mid, s in sorted(wo.items()) if len(s) > 1}
+
+def ist_springer(st, name):
+    """SPRINGER der Station; ohne SPRINGER-Zeile sind es alle (wie in wer_kann)."""
+    return not st["modell"]["springer"] or name in st["modell"]["springer"]
+
+def reserviere(stationen, geteilt, jahr, monat):
+    """Verteilt geteilte Personen auf ihre Stationen (ändert die Modelle).
+
+    geteilt wie von geteilte(). Rückgabe: {ID: {Tag: Station}}.
+    ValueError, wenn jemand in mehreren Stationen Stammpersonal ist.
+    """
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    nach_name = {st["name"]: st for st in stationen}
+
+    reservierung = {}
+    for nr, (mid, namen) in enumerate(geteilt.items()):
+        stamm = [s for s, m in namen.items() if not ist_springer(nach_name[s], m)]
+        if len(stamm) > 1:
+            raise ValueError(f"{mid} ist in {', '.join(stamm)} Stammpersonal (nicht SPRINGER) – "
+                             f"in höchstens einer Station erlaubt")
+        ziele = stamm or list(namen)
+        abw = 0
+        for s, m in namen.items(): abw |= nach_name[s]["modell"]["abw"][m]
+        limit = min(nach_name[s]["modell"]["limit"][namen[s]] for s in ziele)
+        tage = {}
+        for t in range(1, tage_im_monat + 1):
+            # Wochenblöcke, je Person versetzt, damit nicht alle gleichzeitig wechseln
+            tage[t] = ziele[((t - 1) // 7 + nr) % len(ziele)]
+        reservierung[mid] = tage
+        # Limit anteilig nach Tagen, Rest nach größtem Bruchteil, Summe bleibt = Limit
+        anteil = {s: limit * sum(1 for st in tage.values() if st == s) for s in namen}
+        teil = {s: a // tage_im_monat for s, a in anteil.items()}
+        for s in sorted(namen, key=lambda s: -(anteil[s] % tage_im_monat))[:limit - sum(teil.values())]:
+            teil[s] += 1
+        for s in namen:
+            sperre = 0
+            for t, st in tage.items():
+                if st != s: sperre |= 1 << t
+            modell = nach_name[s]["modell"]
+            modell["abw"][namen[s]] = abw | sperre
+            modell["limit"][namen[s]] = teil[s]
+    return reservierung
+
+def _plane(aufgabe):
+    name, modell, jahr, monat = aufgabe
+    t0 = time.perf_counter()
+    plan, luecken, _ = plane_greedy(modell, jahr, monat)
+    return name, plan, luecken, time.perf_counter() - t0
+
+def finde_konflikte(ergebnisse, geteilt):
+    """Dienste geteilter Personen, die über Stationen hinweg kollidieren.
+
+    geteilt wie von geteilte(). Rückgabe: Liste (Station, Name in der Station,
+    Tag) der Dienste, die weichen müssen: zweiter Dienst am selben Tag oder T
+    am Tag nach einer N in anderer Station.
+    """
+    konflikte = []
+    for namen in geteilt.values():
+        dienste = {}
+        for st, m in sorted(namen.items()):
+            for t, d in ergebnisse[st]["plan"].get(m, {}).items(): dienste.setdefault(t, []).append((st, d))
+        for t, liste in sorted(dienste.items()):
+            for st, d in liste[1:]: konflikte.append((st, namen[st], t))
+            st, d = liste[0]
+            for st_morgen, d_morgen in dienste.get(t + 1, [])[:1]:
+                if d == "N" and d_morgen == "T" and st_morgen != st: konflikte.append((st_morgen, namen[st_morgen], t + 1))
+    return konflikte
+
+def abgleich(stationen, ergebnisse, geteilt, jahr, monat):
+    """Löst Konflikte über die SPRINGER-Reparatur der betroffenen Station."""
+    nach_name = {st["name"]: st for st in stationen}
+    runden = geloest = 0
+    while runden < MAX_ABGLEICH:
+        konflikte = finde_konflikte(ergebnisse, geteilt)
+        if not konflikte: break
+        runden += 1
+        betroffen = {}
+        for st, m, t in konflikte:
+            nach_name[st]["modell"]["abw"][m] |= 1 << t
+            betroffen.setdefault(st, 0)
+            betroffen[st] += 1
+        for st, anzahl in betroffen.items():
+            plan = ergebnisse[st]["plan"]
+            anker_dict = {(t, d): m for m, dienste in plan.items() for t, d in dienste.items()}
+            erg = repariere(nach_name[st]["modell"], jahr, monat, anker_dict)
+            ergebnisse[st]["plan"], ergebnisse[st]["luecken"] = erg["plan"], erg["luecken"]
+            geloest += anzahl
+    return runden, geloest
+
+def abdeckung(stationen, ergebnisse, geteilt, jahr, monat):
+    """Gemeinsame Übersicht: je Station und Tag Soll, besetzt, Lücken, Springer-Dienste."""
+    _, tage_im_monat = calendar.monthrange(jahr, monat)
+    zeilen = []
+    for st in stationen:
+        erg = ergebnisse[st["name"]]
+        for t in range(1, tage_im_monat + 1):
+            soll = 2 if calendar.weekday(jahr, monat, t) <= 4 else 1
+            luecken = len(erg["luecken"].get(t, ""))
+            springer = sum(1 for namen in geteilt.values() if t in erg["plan"].get(namen.get(st["name"]), {}))
+            zeilen.append([st["name"], t, soll, soll - luecken, luecken, springer])
+    return pd.DataFrame(zeilen, columns=["Station", "Tag", "Soll", "Besetzt", "Lücken", "Geteilte Springer"])
+
+def plane_stationen(dateien, workers=None):
+    """Lädt, reserviert, plant parallel, gleicht ab. Rückgabe: dict mit stationen,
+    ergebnisse, geteilt, reservierung, jahr, monat, runden, geloest, sekunden."""
+    t0 = time.perf_counter()
+    stationen = []
+    for pfad in dateien:
+        config = lade_einstellungen(pfad)
+        stationen.append({"name": stationsname(pfad), "pfad": pfad, "config": config,
+                          "modell": kompiliere_einstellungen(config)})
+    zeitraeume = {(st["config"]["jahr"], st["config"]["monat"]) for st in stationen}
+    if len(zeitraeume) != 1:
+        raise ValueError(f"Stationen planen verschiedene Zeiträume: {sorted(zeitraeume)}")
+    if len({st["name"] for st in stationen}) != len(stationen):
+        raise ValueError("Stationsnamen sind nicht eindeutig (Ordner- bzw. Dateiname)")
+    for st in stationen:
+        if not ist_standard(st["config"]["dienste"]):
+            raise ValueError(f"Station {st['name']}: eigene Dienstarten (DIENST_) plant stationen.py nicht "
+                             f"(Abgleich und Reparatur kennen nur T und N)")
+    jahr, monat = zeitraeume.pop()
+
+    geteilt = geteilte(stationen)
+    reservierung = reserviere(stationen, geteilt, jahr, monat)
+    aufgaben = [(st["name"], st["modell"], jahr, monat) for st in stationen]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(aufgaben) > 1:
+        with Pool(min(workers, len(aufgaben))) as pool:
+            fertig = pool.map(_plane, aufgaben)
+    else:
+        fertig = [_plane(a) for a in aufgaben]
+    ergebnisse = {name: {"plan": plan, "luecken": luecken, "sekunden": s} for name, plan, luecken, s in fertig}
+
+    runden, geloest = abgleich(stationen, ergebnisse, geteilt, jahr, monat)
+    return {"stationen": stationen, "ergebnisse": ergebnisse, "geteilt": geteilt, "reservierung": reservierung,
+            "jahr": jahr, "monat": monat, "runden": runden, "geloest": geloest,
+            "sekunden": time.perf_counter() - t0}
+
+def main():
+    parser = argparse.ArgumentParser(description="Mehrere Stationen mit gemeinsamen SPRINGERN planen")
+    parser.add_argument("einstellungen", nargs="+", help="einstellungen.txt je Station (Station = Ordner- bzw. Dateiname)")
+    parser.add_argument("--workers", type=int, default=None, help="Parallele Prozesse (Standard: Anzahl CPU-Kerne)")
+    parser.add_argument("--out", default=None, help="Abdeckungs-Übersicht (Standard: abdeckung_<Zeitstempel>.csv)")
+    args = parser.parse_args()
+
+    fehlend = [d for d in args.einstellungen if not os.path.exists(d)]
+    if fehlend:
+        print(f"Fehler: Datei(en) nicht gefunden: {', '.join(fehlend)}")
+        return
+    try:
+        erg = plane_stationen(args.einstellungen, args.workers)
+    except ValueError as e:
+        print(f"Fehler: {e}")
+        return
+    jahr, monat = erg["jahr"], erg["monat"]
+    print(f"--- MODUS: {len(erg['stationen'])} STATIONEN ({monat:02d}/{jahr}), "
+          f"{len(erg['reservierung'])} geteilte Person(en) ---")
+    if erg["geloest"]:
+        print(f"Abgleich: {erg['geloest']} Dienst(e) über Stationsgrenzen in {erg['runden']} Runde(n) neu besetzt")
+
+    for st in erg["stationen"]:
+        e = erg["ergebnisse"][st["name"]]
+        ordner = os.path.dirname(st["pfad"])
+        out_file = schreibe_snapshot(e["plan"], e["luecken"], st["config"], jahr, monat, ordner=ordner)
+        ids = [(k, v) for v, k in sorted((v, k) for k, v in st["config"]["namen"].items())]
+        vid = snapshot_store.speichere(e["plan"], e["luecken"], ids, jahr, monat, None, out_file,
+                                       os.path.join(ordner, snapshot_store.STORE_DIR))
+        print(f"  {st['name']:15} {sum(map(len, e['luecken'].values())):3d} Lücken  "
+              f"{e['sekunden'] * 1000:7.1f} ms  -> {out_file} ({vid})")
+
+    df = abdeckung(erg["stationen"], erg["ergebnisse"], erg["geteilt"], jahr, monat)
+    out = args.out or f"abdeckung_{datetime.now().strftime('%d%m_%H%M')}.csv"
+    df.to_csv(out, index=False, sep=";")
+    summe = df.groupby("Station")[["Soll", "Besetzt", "Lücken", "Geteilte Springer"]].sum()
+    print("\nABDECKUNG:")
+    print(summe.to_string())
+    offen = df[df["Lücken"] > 0].groupby("Tag")["Lücken"].sum()
+    if len(offen): print(f"Tage mit Lücken (alle Stationen): {', '.join(f'{t} ({n}x)' for t, n in offen.items())}")
+    for mid, namen in erg["geteilt"].items():
+        dienste = {st: len(erg["ergebnisse"][st]["plan"][m]) for st, m in namen.items() if erg["ergebnisse"][st]["plan"].get(m)}
+        anzeige = "/".join(sorted(set(namen.values())))
+        print(f"  Springer {anzeige} ({mid}): {sum(dienste.values())} Dienste" + (" – " if dienste else "")
+              + ", ".join(f"{st} {n}" for st, n in dienste.items()))
+    print(f"\nÜbersicht gespeichert: {out} (gesamt {erg['sekunden']:.2f}s)")
+
+if __name__ == "__main__":
+    main()
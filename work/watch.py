@@ -0,0 +1,192 @@
+"""Beobachtungsmodus für die Planungswoche.
+
+Hält Einstellungen, Anker, aktuellen Plan und die gerenderten HTML-Zeilen im
+Speicher und prüft alle --intervall Sekunden, ob einstellungen.txt oder ein
+Formular in ma-input (*-Dienste.pdf) geändert wurde. Nur wenn sich danach
+die kompilierten Eingaben wirklich unterscheiden, wird im Korrekturmodus
+(nur SPRINGER, Anker bleibt fest) neu geplant. Danach:
+    - Snapshot-CSV (--out) überschrieben + neue Version im Snapshot-Speicher,
+    - HTML-Raster (--html): nur Zeilen geänderter Mitarbeiter neu gebaut,
+    - Einzelpläne nur für Mitarbeiter, deren Dienste sich geändert haben.
+Formularwerte gelten nur im Speicher (wie extrahiere_... ohne --merge) und
+überschreiben die Werte aus der einstellungen.txt.
+
+Ohne --anker wird beim Start neu geplant; dieser Plan ist dann der Anker.
+Fehlt einstellungen.txt gerade (Editor speichert per Umbenennen, Datei wird
+noch kopiert) oder ist sie ohne JAHR/MONAT bzw. Mitarbeiter, wird nicht
+geplant; die nächste Prüfung versucht es erneut.
+
+Aufruf:
+    py watch.py [--anker snapshot_1201_1813.csv | v0003] [--intervall 0.5]
+"""
+import argparse
+import calendar
+import os
+import sys
+import time
+from datetime import datetime
+
+import snapshot_store
+from compare_snapshots import vergleiche
+from einstellungen_compiler import lade_einstellungen
+from gen_snapshot import anker_aus_df, kompiliere_einstellungen, plane_greedy, snapshot_df
+from snapshot_to_html import rendere_dokument
+from snapshot_to_personal_plans import schreibe_plaene
+
+# Formular-Auslese liegt in ma-input (wird erst bei vorhandenen PDFs importiert)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ma-input"))
+
+PDF_ENDUNG = "-Dienste.pdf"
+
+def pdf_dateien(ordner):
+    if not os.path.isdir(ordner): return []
+    return sorted(f for f in os.listdir(ordner) if f.endswith(PDF_ENDUNG))
+
+def stempel(einstellungen, pdf_ordner):
+    """{pfad: (mtime_ns, größe)} aller beobachteten Dateien – ein stat() je Datei."""
+    pfade = [einstellungen] + [os.path.join(pdf_ordner, f) for f in pdf_dateien(pdf_ordner)]
+    ergebnis = {}
+    for pfad in pfade:
+        try:
+            st = os.stat(pfad)
+        except OSError:
+            continue
+        ergebnis[pfad] = (st.st_mtime_ns, st.st_size)
+    return ergebnis
+
+def unvollstaendig(einstellungen, config):
+    """Grund, warum die Einstellungen (noch) nicht planbar sind, sonst None."""
+    try:
+        with open(einstellungen, encoding="utf-8-sig") as f:
+            schluessel = {z.split(":", 1)[0].strip() for z in f if ":" in z}
+    except (OSError, UnicodeDecodeError):
+        return "nicht lesbar"
+    fehlt = [k for k in ("JAHR", "MONAT") if k not in schluessel]
+    if fehlt: return f"{'/'.join(fehlt)} fehlt"
+    if not config["namen"]: return "keine Mitarbeiter"
+    return None
+
+def melde(zustand, text):
+    """Hinweise/Fehler nur einmal ausgeben, solange sie sich nicht ändern."""
+    if text != zustand["meldung"]: print(f"[{datetime.now().strftime('%H:%M:%S')}] {text}")
+    zustand["meldung"] = text
+
+def lade_eingaben(einstellungen, pdf_ordner):
+    """Einstellungen plus Formularwerte (PDF-Cache: nur geänderte PDFs werden gelesen)."""
+    config = lade_einstellungen(einstellungen)
+    dateien = pdf_dateien(pdf_ordner)
+    if not dateien: return config
+    from extrahiere_daten_fuer_einstellungen import lade_formulare, formular_werte, mit_formularwerten
+    formulare, _ = lade_formulare(pdf_ordner, dateien, workers=1)
+    _, tage_im_monat = calendar.monthrange(config["jahr"], config["monat"])
+    return mit_formularwerten(config, formular_werte(formulare, tage_im_monat))
+
+def neuer_zustand(args):
+    zustand = {"stempel": {}, "config": None, "warte": None, "meldung": None, "df": None, "zeilen_cache": {},
+               "anker_df": None, "anker_dict": None, "anker_vid": None}
+    if args.anker:
+        zustand["anker_df"] = snapshot_store.lade_snapshot(args.anker)
+        zustand["anker_dict"] = anker_aus_df(zustand["anker_df"])
+        zustand["anker_vid"] = snapshot_store.normalisiere_id(args.anker) if snapshot_store.ist_version(args.anker) \
+            else snapshot_store.finde_version(args.anker)
+    return zustand
+
+def zyklus(zustand, args):
+    """Eine Prüfung; plant und rendert nur bei geänderten Eingaben. Rückgabe: True bei Neuplanung."""
+    neu = stempel(args.einstellungen, args.pdf_ordner)
+    if neu == zustand["stempel"] or neu == zustand["warte"]: return False
+    ausloeser = sorted(os.path.basename(p) for p in set(neu) | set(zustand["stempel"])
+                       if neu.get(p) != zustand["stempel"].get(p))
+    t0 = time.perf_counter()
+    config = lade_eingaben(args.einstellungen, args.pdf_ordner) if args.einstellungen in neu else None
+    grund = unvollstaendig(args.einstellungen, config) if config else "nicht gefunden"
+    if grund:
+        # Stempel bleibt alt: sobald sich die Datei wieder ändert, wird neu versucht
+        zustand["warte"] = neu
+        melde(zustand, f"{args.einstellungen} {grund} – warte")
+        return False
+    zustand["stempel"] = neu
+    zustand["meldung"] = None
+    if config == zustand["config"]: return False
+    zustand["config"] = config
+    jahr, monat = config["jahr"], config["monat"]
+
+    anker_df = zustand["anker_df"]
+    erster = anker_df is None
+    if anker_df is not None and (int(anker_df["Jahr"].iloc[0]), int(anker_df["Monat"].iloc[0])) != (jahr, monat):
+        print(f"HINWEIS: Anker ist aus {anker_df['Monat'].iloc[0]}/{anker_df['Jahr'].iloc[0]}, "
+              f"Einstellungen planen {monat}/{jahr} – plane ohne Anker.")
+        anker_df = None
+    anker_dict = zustand["anker_dict"] if anker_df is not None else {}
+    plan, luecken, aenderungen = plane_greedy(kompiliere_einstellungen(config), jahr, monat,
+                                              anker_dict, anker_df is not None)
+    df = snapshot_df(plan, luecken, config, jahr, monat)
+    t_plan = time.perf_counter()
+
+    # Nur was sich zum vorigen Stand geändert hat, wird neu ausgegeben
+    vorher = zustand["df"]
+    if vorher is None or (int(vorher["Jahr"].iloc[0]), int(vorher["Monat"].iloc[0])) != (jahr, monat):
+        # Alle: auch wer im neuen Monat keinen Dienst hat, braucht einen neuen Plan
+        betroffen = set(config["namen"].values()) | set(df["Name"]) | set(vorher["Name"] if vorher is not None else ())
+        betroffen.discard("LÜCKEN")
+        zustand["zeilen_cache"].clear()
+    else:
+        diff = vergleiche(vorher, df)
+        betroffen = set(diff.loc[diff["Mitarbeiter"] != "LÜCKEN", "Mitarbeiter"])
+    zustand["df"] = df
+
+    df.to_csv(args.out, index=False)
+    ids = [(k, v) for v, k in sorted((v, k) for k, v in config["namen"].items())]
+    vid = snapshot_store.speichere(plan, luecken, ids, jahr, monat, zustand["anker_vid"] if anker_df is not None else None,
+                                   args.out, dienste=[d["code"] for d in config["dienste"]])
+    if zustand["anker_df"] is None:
+        # Erster Plan ohne --anker wird zum Anker der folgenden Korrekturen
+        zustand["anker_df"], zustand["anker_dict"], zustand["anker_vid"] = df, anker_aus_df(df), vid
+    with open(args.html, "w", encoding="utf-8") as f:
+        f.write(rendere_dokument([df], config["dienste"], zustand["zeilen_cache"]))
+    geschrieben = 0
+    if betroffen:
+        # namen=: auch wer keinen Dienst mehr hat, bekommt einen (leeren) Plan statt der alten Datei
+        geschrieben, _, _ = schreibe_plaene(df, anker_df, args.ordner, dienste=config["dienste"], namen=betroffen)
+    t_ende = time.perf_counter()
+
+    status = (f"{len(aenderungen)} Änderung(en) zum Anker" if anker_df is not None
+              else "neuer Plan (ab jetzt Anker)" if erster else "ohne Anker geplant")
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {', '.join(ausloeser)}: {status}, "
+          f"{sum(map(len, luecken.values()))} Lücken, {len(betroffen)} MA betroffen, {geschrieben} Plan/Pläne geschrieben "
+          f"-> {vid} | planen {(t_plan - t0) * 1000:.0f} ms, ausgeben {(t_ende - t_plan) * 1000:.0f} ms")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Eingaben beobachten und nur bei Änderungen neu planen und ausgeben")
+    parser.add_argument("--anker", default=None, help="Anker-Snapshot (CSV oder Versions-ID); ohne: erster Plan wird Anker")
+    parser.add_argument("--einstellungen", default="einstellungen.txt")
+    parser.add_argument("--pdf-ordner", default="ma-input", help="Ordner mit den zurückgegebenen *-Dienste.pdf")
+    parser.add_argument("--intervall", type=float, default=0.5, help="Sekunden zwischen zwei Prüfungen")
+    parser.add_argument("--out", default="snapshot_watch.csv", help="Snapshot-CSV (wird jedes Mal überschrieben)")
+    parser.add_argument("--html", default="snapshot_watch.html", help="HTML-Raster")
+    parser.add_argument("--ordner", default="mitarbeiter_plaene_watch", help="Ordner der Einzelpläne")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.einstellungen):
+        print(f"Fehler: Datei {args.einstellungen} nicht gefunden.")
+        return
+    if args.anker and not snapshot_store.existiert(args.anker):
+        print(f"Fehler: Datei {args.anker} nicht gefunden.")
+        return
+
+    zustand = neuer_zustand(args)
+    print(f"--- MODUS: WATCH ({args.einstellungen}, {args.pdf_ordner}/*{PDF_ENDUNG}, alle {args.intervall}s; Strg+C beendet) ---")
+    try:
+        while True:
+            try:
+                zyklus(zustand, args)
+            except Exception as e:
+                # z.B. PDF zwischen Auflisten und Lesen gelöscht: melden, weiter beobachten
+                melde(zustand, f"FEHLER: {type(e).__name__}: {e}")
+            time.sleep(args.intervall)
+    except KeyboardInterrupt:
+        print("\nWatch beendet.")
+
+if __name__ == "__main__":
+    main()
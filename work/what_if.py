@@ -0,0 +1,66 @@
+import os
+from multiprocessing import Pool
+
+import pandas as pd
+
+from repair import repariere
+
+# Wird je Worker einmal gesetzt (initializer) und nur gelesen
+_geteilt = {}
+
+def _init(modell, jahr, monat, anker_dict):
+    _geteilt.update(modell=modell, jahr=jahr, monat=monat, anker_dict=anker_dict)
+
+def simuliere_ausfall(szenario):
+    """Ein Szenario: MA fällt an Tag aus, Korrektur über die SPRINGER-Reparatur."""
+    t, d, m = szenario
+    modell, anker_dict = _geteilt["modell"], _geteilt["anker_dict"]
+    abw = dict(modell["abw"])
+    abw[m] |= 1 << t
+    erg = repariere({**modell, "abw": abw}, _geteilt["jahr"], _geteilt["monat"], anker_dict)
+
+    ersatz = next((n for n, dienste in erg["plan"].items() if dienste.get(t) == d), "")
+    geaendert = sum(1 for (tag, dienst), alt in anker_dict.items()
+                    if erg["plan"].get(alt, {}).get(tag) != dienst)
+    return {
+        "Tag": t, "Dienst": d, "Name": m,
+        "Abgedeckt": "ja" if ersatz else "nein", "Ersatz": ersatz,
+        "Lücken": sum(map(len, erg["luecken"].values())),
+        "Geänderte Dienste": geaendert,
+    }
+
+def sweep(modell, jahr, monat, anker_dict, workers=None):
+    """Simuliert für jeden besetzten Dienst den Ausfall des MA an diesem Tag.
+
+    Modell und Anker werden einmal pro Worker übergeben, die Aufgaben selbst
+    sind nur (Tag, Dienst, Name). Rückgabe: Risiko-DataFrame, sortiert nach
+    nicht abdeckbar, zusätzlichen Lücken und Anzahl geänderter Dienste.
+    """
+    szenarien = [(t, d, m) for (t, d), m in sorted(anker_dict.items()) if m in modell["namen_set"]]
+    workers = workers or os.cpu_count() or 1
+    basis = (modell, jahr, monat, anker_dict)
+    if workers > 1 and len(szenarien) > 1:
+        with Pool(workers, initializer=_init, initargs=basis) as pool:
+            zeilen = pool.map(simuliere_ausfall, szenarien, chunksize=max(1, len(szenarien) // (4 * workers)))
+    else:
+        _init(*basis)
+        zeilen = [simuliere_ausfall(s) for s in szenarien]
+
+    basis_luecken = sum(map(len, repariere(modell, jahr, monat, anker_dict)["luecken"].values()))
+
+    df = pd.DataFrame(zeilen, columns=["Tag", "Dienst", "Name", "Abgedeckt", "Ersatz", "Lücken", "Geänderte Dienste"])
+    df["Neue Lücken"] = df["Lücken"] - basis_luecken
+    df = df.drop(columns="Lücken")
+    return df.sort_values(["Abgedeckt", "Neue Lücken", "Geänderte Dienste", "Tag"],
+                          ascending=[False, False, False, True], kind="stable").reset_index(drop=True)
+
+def drucke_zusammenfassung(df):
+    offen = df[df["Abgedeckt"] == "nein"]
+    print("\nWHAT-IF: EINZELAUSFÄLLE")
+    print(f"  {len(df)} Szenarien, {len(offen)} nicht abdeckbar")
+    for _, r in offen.head(10).iterrows():
+        print(f"  [RISIKO] Tag {r['Tag']:02d} ({r['Dienst']}): Ausfall {r['Name']} -> kein Ersatz")
+    if len(offen):
+        je_ma = offen["Name"].value_counts()
+        print("  Kritischste MA: " + ", ".join(f"{n} ({k}x)" for n, k in je_ma.head(5).items()))
+    print("-" * 30)